@@ -0,0 +1,230 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# ==========================================
+# 生成器基准测试
+# ==========================================
+# 每个 (版本, 事件数) 在独立子进程里跑，互不影响峰值内存：
+#   timed 进程：生成耗时 / events/s、各输出格式的字节数、写入与解析耗时、峰值 RSS
+#   traced 进程：开着 tracemalloc 再生成一遍，只取 Python 堆峰值 (tracemalloc 会拖慢生成，所以单独跑)
+# 结果存成 JSON，和上一次的结果对比，超过阈值的退化会被标出来并以非零状态退出。
+
+DEFAULT_SIZES = [2000, 50000, 1000000]
+DEFAULT_RESULTS = "bench_results.json"
+RESULTS_VERSION = 1
+
+# 指标名 -> 数值越大越好 (True) / 越小越好 (False)
+METRICS = {
+    "events_per_sec": True,
+    "peak_rss_kb": False,
+    "tracemalloc_peak": False,
+}
+FORMAT_METRICS = {
+    "bytes": False,
+    "parse_seconds": False,
+}
+
+# ==========================================
+# 子进程
+# ==========================================
+
+def run_timed(profile_name, total, seed, formats):
+    from profile_engine import PROFILES, generate_profile
+    import generate_events12 as g
+
+    start = time.perf_counter()
+    events = generate_profile(PROFILES[profile_name], seed, total)
+    gen_seconds = time.perf_counter() - start
+
+    outputs = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in formats:
+            path = os.path.join(tmp, f"events.{fmt}")
+            start = time.perf_counter()
+            g.write_output(iter(events), path, fmt)
+            write_seconds = time.perf_counter() - start
+            size = os.path.getsize(path)
+            start = time.perf_counter()
+            parsed = g.read_output(path, fmt)
+            parse_seconds = time.perf_counter() - start
+            if len(parsed) != len(events):
+                raise SystemExit(f"{profile_name} {fmt}: 读回 {len(parsed)} 个事件，应为 {len(events)}")
+            del parsed
+            outputs[fmt] = {"bytes": size, "write_seconds": write_seconds, "parse_seconds": parse_seconds}
+
+    return {
+        "events": len(events),
+        "gen_seconds": gen_seconds,
+        "events_per_sec": len(events) / gen_seconds if gen_seconds else 0.0,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "outputs": outputs,
+    }
+
+def run_traced(profile_name, total, seed):
+    from profile_engine import PROFILES, generate_profile
+
+    tracemalloc.start()
+    events = generate_profile(PROFILES[profile_name], seed, total)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"events": len(events), "tracemalloc_peak": peak}
+
+def spawn(mode, profile_name, total, seed, formats=()):
+    """在新解释器里跑一次测量，返回子进程打印的 JSON"""
+    command = [sys.executable, os.path.abspath(__file__), "worker", mode, profile_name,
+               str(total), str(seed), ",".join(formats)]
+    result = subprocess.run(command, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(f"{profile_name} x {total} ({mode}) 失败:\n{result.stderr}")
+    return json.loads(result.stdout)
+
+# ==========================================
+# 运行与对比
+# ==========================================
+
+def run_suite(profiles, sizes, seed, formats, traced=True):
+    runs = []
+    for total in sizes:
+        for profile_name in profiles:
+            run = {"profile": profile_name, "size": total}
+            run.update(spawn("timed", profile_name, total, seed, formats))
+            if traced:
+                run["tracemalloc_peak"] = spawn("traced", profile_name, total, seed)["tracemalloc_peak"]
+            runs.append(run)
+            print_run(run)
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "formats": list(formats),
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "runs": runs,
+    }
+
+def print_run(run):
+    traced = run.get("tracemalloc_peak")
+    traced_text = f"{traced / 2 ** 20:>9.1f}MB" if traced is not None else f"{'-':>11}"
+    print(f"{run['profile']:<8}{run['size']:>10,}{run['events_per_sec']:>12,.0f}/s"
+          f"{run['peak_rss_kb'] / 1024:>9.1f}MB{traced_text}", end="")
+    for fmt, output in run["outputs"].items():
+        print(f"  {fmt} {output['bytes']:,}B 解析 {output['parse_seconds']:.3f}s", end="")
+    print()
+
+def _worse_by(old, new, higher_is_better):
+    """相对退化比例，正数表示变差"""
+    if not old:
+        return 0.0
+    change = (new - old) / old
+    return -change if higher_is_better else change
+
+def compare(baseline, current, threshold):
+    """返回 [(profile, size, 指标, 旧值, 新值, 退化比例), ...]"""
+    old_runs = {(run["profile"], run["size"]): run for run in baseline["runs"]}
+    regressions = []
+    for run in current["runs"]:
+        old = old_runs.get((run["profile"], run["size"]))
+        if old is None:
+            continue
+        checks = [(name, old.get(name), run.get(name), better) for name, better in METRICS.items()]
+        for fmt, output in run["outputs"].items():
+            old_output = old["outputs"].get(fmt, {})
+            checks += [(f"{fmt}.{name}", old_output.get(name), output.get(name), better)
+                       for name, better in FORMAT_METRICS.items()]
+        for name, old_value, new_value, better in checks:
+            if old_value is None or new_value is None:
+                continue
+            worse = _worse_by(old_value, new_value, better)
+            if worse > threshold:
+                regressions.append((run["profile"], run["size"], name, old_value, new_value, worse))
+    return regressions
+
+def report_regressions(regressions, threshold):
+    if not regressions:
+        print(f"✅ 没有超过 {threshold:.0%} 的退化")
+        return
+    print(f"⚠️  {len(regressions)} 项退化超过 {threshold:.0%}:")
+    for profile_name, size, name, old_value, new_value, worse in regressions:
+        print(f"   {profile_name:<8}{size:>10,}  {name:<24}{old_value:>16,.3f} -> {new_value:<16,.3f}(+{worse:.1%})")
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        results = json.load(f)
+    if results.get("version") != RESULTS_VERSION:
+        raise ValueError(f"{path}: 不支持的结果版本 {results.get('version')}")
+    return results
+
+def main(argv=None):
+    from profile_engine import PROFILES
+    import generate_events12 as g
+
+    parser = argparse.ArgumentParser(description="各生成器版本 / 输出格式的基准测试")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_cmd = sub.add_parser("run", help="跑基准并保存结果")
+    run_cmd.add_argument("--profiles", default=",".join(PROFILES), help="逗号分隔的版本")
+    run_cmd.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="逗号分隔的事件数")
+    run_cmd.add_argument("--formats", default="pretty", help=f"逗号分隔的输出格式 ({', '.join(g.OUTPUT_FORMATS)})")
+    run_cmd.add_argument("--seed", type=int, default=0)
+    run_cmd.add_argument("--no-tracemalloc", action="store_true", help="跳过 tracemalloc 进程")
+    run_cmd.add_argument("-o", "--output", default=DEFAULT_RESULTS, help="结果文件")
+    run_cmd.add_argument("--baseline", default=None, help="与之对比的旧结果文件")
+    run_cmd.add_argument("--threshold", type=float, default=0.10, help="退化阈值 (比例)")
+
+    compare_cmd = sub.add_parser("compare", help="对比两份结果")
+    compare_cmd.add_argument("baseline")
+    compare_cmd.add_argument("current")
+    compare_cmd.add_argument("--threshold", type=float, default=0.10, help="退化阈值 (比例)")
+
+    worker_cmd = sub.add_parser("worker", help=argparse.SUPPRESS)
+    worker_cmd.add_argument("mode", choices=["timed", "traced"])
+    worker_cmd.add_argument("profile")
+    worker_cmd.add_argument("total", type=int)
+    worker_cmd.add_argument("seed", type=int)
+    worker_cmd.add_argument("formats")
+
+    args = parser.parse_args(argv)
+    if args.command == "worker":
+        if args.mode == "timed":
+            result = run_timed(args.profile, args.total, args.seed, [f for f in args.formats.split(",") if f])
+        else:
+            result = run_traced(args.profile, args.total, args.seed)
+        print(json.dumps(result))
+        return
+
+    if args.command == "compare":
+        regressions = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+        report_regressions(regressions, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    profiles = args.profiles.split(",")
+    formats = args.formats.split(",")
+    unknown = [name for name in profiles if name not in PROFILES]
+    unknown += [fmt for fmt in formats if fmt not in g.OUTPUT_FORMATS]
+    if unknown:
+        parser.error(f"未知的版本或格式: {', '.join(unknown)}")
+
+    print(f"{'版本':<6}{'事件数':>9}{'生成速度':>13}{'峰值RSS':>10}{'tracemalloc':>12}")
+    results = run_suite(profiles, [int(size) for size in args.sizes.split(",")],
+                        args.seed, formats, traced=not args.no_tracemalloc)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"📁 结果已保存: {args.output}")
+
+    if args.baseline:
+        regressions = compare(load_results(args.baseline), results, args.threshold)
+        report_regressions(regressions, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+import game_formulas as f
+import generate_events12 as g
+
+# ==========================================
+# 突破过程的吸收马尔可夫链 (精确解)
+# ==========================================
+# 同一等级上的反复突破只取决于：成功率 breakSuccess(level)、连续失败 3 次后的保底、
+# 失败惩罚 breakFailPenalty(level) 和手上的护身符，状态很小，可以精确求解。
+#
+# 暂态 = (连续失败次数 f ∈ 0..3, 剩余护身符 c ∈ 0..C)，下标 c * 4 + f；吸收态 = 以 c 个护身符突破成功。
+#   小层 (attemptBreak)：f >= 3 必定成功；否则成功率 s，失败 -> (f + 1, c - 1)，
+#                        c = 0 时没有护身符挡，扣 penalty * 当前灵气；
+#   大境界 (finalizeMiniGame，level % 9 == 0)：渡劫胜率 w，没有保底，失败不改 f。
+# 成功会把 f 清零、大境界不改 f，所以每一级都从 f = 0 开始，只有护身符跨等级带过去。
+#
+# 突破时灵气按正好等于突破消耗计 (一够就突破)，所以每次无护身符的失败扣 penalty * breakCost，
+# 「损失灵气」下面都以 breakCost 为单位，再乘以该级消耗得到绝对值。
+# 144 个等级的转移矩阵一起堆成 (等级, 状态, 状态) 的数组，用批量 np.linalg.solve 求基本矩阵相关的量：
+#   期望次数     t  = N 1
+#   次数方差     2 N t - t - t^2
+#   期望损失     m1 = N ρ          ρ_i  = 从 i 出发这一步的期望损失
+#   损失二阶矩   m2 = N (ρ2 + 2 Q_r m1)，Q_r[i, j] = Q[i, j] * 这一步的损失
+#   出口分布     B  = N R          (成功时剩下几个护身符)
+
+PITY_STATES = f.PITY_FAILURES + 1
+
+def levels_range(text):
+    """"1-144" / "90" / "1-9,19" -> 等级列表"""
+    levels = []
+    for part in text.split(","):
+        first, _, last = part.partition("-")
+        levels.extend(range(int(first), int(last or first) + 1))
+    if any(not 1 <= level < f.MAX_LEVEL for level in levels):
+        raise ValueError(f"等级必须在 1 ~ {f.MAX_LEVEL - 1} 之间 (满级不再突破)")
+    return levels
+
+def state_index(failures, charms):
+    return charms * PITY_STATES + failures
+
+class BreakthroughChains:
+    """所有等级的转移矩阵：Q (等级, n, n)、R (等级, n, C + 1)、每一步的损失"""
+
+    def __init__(self, levels, max_charms=0, tribulation_win=0.8):
+        if not 0 < tribulation_win <= 1:
+            raise ValueError("渡劫胜率必须在 (0, 1] 之间，否则大境界永远过不去")
+        self.levels = np.asarray(levels, dtype=np.int64)
+        self.max_charms = max_charms
+        count = len(self.levels)
+        states = PITY_STATES * (max_charms + 1)
+        self.Q = np.zeros((count, states, states))
+        self.R = np.zeros((count, states, max_charms + 1))
+        self.loss = np.zeros((count, states))   # 失败那一步的损失 (以 breakCost 为单位)
+
+        major = f.is_major(self.levels)
+        success = np.where(major, tribulation_win, f.break_success(self.levels))
+        penalty = f.break_fail_penalty(self.levels)
+        for charms in range(max_charms + 1):
+            left = max(charms - 1, 0)
+            for failures in range(PITY_STATES):
+                i = state_index(failures, charms)
+                pity = (failures >= f.PITY_FAILURES) & ~major
+                win = np.where(pity, 1.0, success)
+                self.R[:, i, charms] = win
+                # 大境界失败不改连续失败计数
+                j = np.where(major, state_index(failures, left),
+                             state_index(min(failures + 1, f.PITY_FAILURES), left))
+                self.Q[np.arange(count), i, j] += 1.0 - win
+                if charms == 0:
+                    self.loss[:, i] = penalty
+        self.fail = 1.0 - self.R.sum(axis=2)
+
+class ChainSolution:
+    """
+    下标 [等级序号, 初始护身符 c]，都从 f = 0 出发：
+      attempts_mean / attempts_var   突破次数
+      loss_mean / loss_var           损失的灵气 (以 breakCost 为单位)
+      exit[k, c, c']                 成功时剩 c' 个护身符的概率
+    """
+
+    def __init__(self, chains):
+        self.levels = chains.levels
+        self.max_charms = chains.max_charms
+        count, states, _ = chains.Q.shape
+        A = np.eye(states) - chains.Q
+        ones = np.ones((count, states, 1))
+        t = np.linalg.solve(A, ones)
+        Nt = np.linalg.solve(A, t)
+        rho = (chains.fail * chains.loss)[..., None]
+        m1 = np.linalg.solve(A, rho)
+        rho2 = (chains.fail * chains.loss ** 2)[..., None]
+        Qr = chains.Q * chains.loss[..., None]
+        m2 = np.linalg.solve(A, rho2 + 2 * Qr @ m1)
+        B = np.linalg.solve(A, chains.R)
+
+        start = [state_index(0, charms) for charms in range(chains.max_charms + 1)]
+        t, Nt, m1, m2 = (x[:, start, 0] for x in (t, Nt, m1, m2))
+        self.attempts_mean = t
+        self.attempts_var = np.maximum(2 * Nt - t - t ** 2, 0.0)
+        self.loss_mean = m1
+        self.loss_var = np.maximum(m2 - m1 ** 2, 0.0)
+        self.exit = B[:, start, :]
+        self.cost = f.break_cost(self.levels)
+
+    def charm_path(self, start_charms):
+        """
+        从 start_charms 个护身符开始依次突破所有等级 (中途不补充)。
+        返回每一级开始时的护身符分布 (等级序号, C + 1)，以及按该分布混合后的
+        次数均值 / 方差、损失均值 / 方差 (以 breakCost 为单位)，方差用全方差公式。
+        """
+        dist = np.zeros(self.max_charms + 1)
+        dist[start_charms] = 1.0
+        dists = np.zeros((len(self.levels), self.max_charms + 1))
+        for k in range(len(self.levels)):
+            dists[k] = dist
+            dist = dist @ self.exit[k]
+        attempts = _mixture(dists, self.attempts_mean, self.attempts_var)
+        loss = _mixture(dists, self.loss_mean, self.loss_var)
+        return dists, attempts, loss
+
+def _mixture(dists, mean, var):
+    total = (dists * mean).sum(axis=1)
+    return total, (dists * (var + mean ** 2)).sum(axis=1) - total ** 2
+
+def solve(levels, max_charms=0, tribulation_win=0.8):
+    return ChainSolution(BreakthroughChains(levels, max_charms, tribulation_win))
+
+# ==========================================
+# 蒙特卡洛对照
+# ==========================================
+
+def monte_carlo(level, charms, trials, tribulation_win, rng):
+    """逐次模拟同一等级上的突破，返回 (次数数组, 损失数组, 剩余护身符数组)"""
+    major = bool(f.is_major(level))
+    success_rate = tribulation_win if major else float(f.break_success(level))
+    penalty = float(f.break_fail_penalty(level))
+    attempts = np.zeros(trials, dtype=np.int64)
+    loss = np.zeros(trials)
+    failures = np.zeros(trials, dtype=np.int64)
+    left = np.full(trials, charms, dtype=np.int64)
+    active = np.arange(trials)
+    while len(active):
+        attempts[active] += 1
+        pity = (failures[active] >= f.PITY_FAILURES) & (not major)
+        won = pity | (rng.random(len(active)) <= success_rate)
+        lost = active[~won]
+        if not major:
+            failures[lost] += 1
+        protected = left[lost] > 0
+        left[lost[protected]] -= 1
+        loss[lost[~protected]] += penalty
+        active = lost
+    return attempts, loss, left
+
+def verify(solution, trials, tribulation_win, seed):
+    """每个等级、每个初始护身符数跑一次蒙特卡洛，返回最大 |z| 与各自耗时"""
+    rng = np.random.default_rng(seed)
+    worst = 0.0
+    start = time.perf_counter()
+    for k, level in enumerate(solution.levels):
+        for charms in range(solution.max_charms + 1):
+            attempts, loss, left = monte_carlo(int(level), charms, trials, tribulation_win, rng)
+            for sample, mean, var in ((attempts, solution.attempts_mean, solution.attempts_var),
+                                      (loss, solution.loss_mean, solution.loss_var)):
+                se = np.sqrt(var[k, charms] / trials)
+                if se > 0:
+                    worst = max(worst, abs(sample.mean() - mean[k, charms]) / se)
+                elif abs(sample.mean() - mean[k, charms]) > 1e-12:
+                    worst = float("inf")
+            exit_mc = np.bincount(left, minlength=solution.max_charms + 1) / trials
+            se = np.sqrt(solution.exit[k, charms] * (1 - solution.exit[k, charms]) / trials)
+            diff = np.abs(exit_mc - solution.exit[k, charms])
+            worst = max(worst, float(np.max(np.where(se > 0, diff / np.where(se > 0, se, 1), 0.0))))
+    return worst, time.perf_counter() - start
+
+# ==========================================
+# 输出
+# ==========================================
+
+def print_solution(solution, start_charms, step):
+    dists, (attempts, attempts_var), (loss, loss_var) = solution.charm_path(start_charms)
+    charm_mean = dists @ np.arange(solution.max_charms + 1)
+    print(f"{'等级':<6}{'段位':<8}{'期望次数':>10}{'次数标准差':>12}{'期望损失':>10}{'损失标准差':>12}"
+          f"{'损失灵气':>20}{'护身符':>8}")
+    for k, level in enumerate(solution.levels):
+        if step > 1 and level % step and k not in (0, len(solution.levels) - 1):
+            continue
+        major = "*" if f.is_major(level) else " "
+        print(f"{level:<5}{major}{g.STAGES[f.stage_of(level)]:<8}"
+              f"{attempts[k]:>10.3f}{np.sqrt(max(attempts_var[k], 0.0)):>12.3f}"
+              f"{loss[k]:>10.3f}{np.sqrt(max(loss_var[k], 0.0)):>12.3f}"
+              f"{loss[k] * solution.cost[k]:>20,.0f}{charm_mean[k]:>8.2f}")
+    print(f"合计: 期望突破 {attempts.sum():,.1f} 次，期望损失灵气 {(loss * solution.cost).sum():,.0f}"
+          f" (损失以该级突破消耗为单位，护身符为该级开始时的期望剩余)")
+
+def to_dict(solution, start_charms):
+    dists, (attempts, attempts_var), (loss, loss_var) = solution.charm_path(start_charms)
+    return {
+        "start_charms": start_charms,
+        "levels": [
+            {
+                "level": int(level),
+                "break_cost": float(solution.cost[k]),
+                "attempts_mean": float(attempts[k]),
+                "attempts_var": float(attempts_var[k]),
+                "loss_ratio_mean": float(loss[k]),
+                "loss_ratio_var": float(loss_var[k]),
+                "loss_mean": float(loss[k] * solution.cost[k]),
+                "charms": dists[k].tolist(),
+            }
+            for k, level in enumerate(solution.levels)
+        ],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="突破次数 / 损失灵气的精确解 (吸收马尔可夫链，* 为渡劫大境界)")
+    parser.add_argument("--levels", default=f"1-{f.MAX_LEVEL - 1}", help="如 1-143、90、1-9,19")
+    parser.add_argument("--charms", type=int, default=0, help="第一级开始时的护身符数量 (中途不补充)")
+    parser.add_argument("--tribulation-win", type=float, default=0.8, help="渡劫小游戏胜率")
+    parser.add_argument("--step", type=int, default=f.LEVELS_PER_STAGE, help="每隔多少级打印一行，1 为全部")
+    parser.add_argument("--verify", type=int, default=0, metavar="TRIALS",
+                        help="每个 (等级, 护身符) 再跑 TRIALS 次蒙特卡洛对照")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_output", help="把逐级结果写到该文件")
+    args = parser.parse_args(argv)
+
+    levels = levels_range(args.levels)
+    start = time.perf_counter()
+    solution = solve(levels, args.charms, args.tribulation_win)
+    seconds = time.perf_counter() - start
+    print_solution(solution, args.charms, args.step)
+    print(f"⏱️  {len(levels)} 个等级 x {PITY_STATES * (args.charms + 1)} 个状态，求解 {seconds * 1000:.1f}ms")
+    if args.verify:
+        worst, mc_seconds = verify(solution, args.verify, args.tribulation_win, args.seed)
+        print(f"🎲 蒙特卡洛 {args.verify:,} 次/格，耗时 {mc_seconds:.2f}s，与精确解的最大偏差 {worst:.2f} 个标准误")
+        if worst > 5:
+            parser.exit(1, "❌ 蒙特卡洛与精确解不一致\n")
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as file:
+            json.dump(to_dict(solution, args.charms), file, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+import game_formulas as f
+import progression_sim as ps
+from stage_index import resolve_window
+from validate_events import EventStream
+
+# ==========================================
+# 事件选项的期望 / 方差分析
+# ==========================================
+# 每个效果在每个可出现的等级上换算成「灵气等价」的两点分布 (输 / 赢各 50%，确定性效果两点相同)：
+#   gain_qi / lose_qi     +v / -v
+#   gamble                赢 +1.5v，输 -0.5v
+#   gain_*_temp           点击 (tapGain * taps) 或自动 (autoGain) 收益 * v * duration
+#   gamble_tap            赢 点击收益 * v * duration，输 点击收益 * -0.5 * duration
+#   gamble_auto           赢 自动收益 * v * duration，输 debuff 0.5：(点击 + 自动) * 0.5 * duration 的损失
+#   grant_item            一个护身符 = 挡一次失败惩罚 breakFailPenalty * breakCost (--charm-value zero 时记 0)
+# Buff 按「没有同类 Buff 在身上」计 (叠加时实际收益更低)，qi 按够扣计 (不触发 max(0, ...) 截断)。
+#
+# 期望 = (输 + 赢) / 2，方差 = ((赢 - 输) / 2)^2。两个选项在每个可出现等级上比较：
+#   严格占优   输、赢两个分位都不差且至少一处更好 (一阶随机占优)，选另一个没有任何理由；
+#   均值方差占优   期望不低、方差不高且至少一处更好。
+# 事件用 validate_events.EventStream 流式读取，每块 BLOCK_EVENTS 个事件借 progression_sim.EventTable
+# 摊平成效果数组，再和 LevelTables 的 144 级收益表广播成 (效果, 等级) 矩阵一次算完。
+# 期望统一除以当级基础收益 (点击 + 自动，每秒)，以「相当于几秒修炼」表示，跨等级可比。
+
+BLOCK_EVENTS = 20000
+LEVELS = np.arange(1, f.MAX_LEVEL + 1)
+CHARM_VALUES = ("penalty", "zero")
+EFFECT_NAMES = {code: name for name, code in ps.EFFECT_CODES.items()}
+
+def effect_coefficients(kind, value, duration, charm_value="penalty"):
+    """
+    每个效果的输 / 赢都是 [1, 点击收益, 自动收益, 护身符价值] 四个按等级变化的量的线性组合，
+    返回两个 (效果数, 4) 的系数矩阵 (输, 赢)。
+    """
+    v = np.nan_to_num(value)
+    d = np.nan_to_num(duration)
+    low = np.zeros((len(kind), 4))
+    high = np.zeros((len(kind), 4))
+    for code, column, win, lose in (
+            (ps.GAIN_QI, 0, v, v),
+            (ps.LOSE_QI, 0, -v, -v),
+            (ps.GAMBLE, 0, v * f.GAMBLE_WIN_FACTOR, -v * f.GAMBLE_LOSE_FACTOR),
+            (ps.GAIN_TAP_TEMP, 1, v * d, v * d),
+            (ps.GAIN_AUTO_TEMP, 2, v * d, v * d),
+            (ps.GAMBLE_TAP, 1, v * d, f.GAMBLE_TAP_LOSE_BONUS * d)):
+        sel = kind == code
+        high[sel, column] = win[sel]
+        low[sel, column] = lose[sel]
+    # gamble_auto 输了是 debuff 0.5，点击和自动收益一起减半
+    sel = kind == ps.GAMBLE_AUTO
+    high[sel, 2] = v[sel] * d[sel]
+    low[sel, 1] = low[sel, 2] = -(1.0 - f.GAMBLE_AUTO_LOSE_MULTIPLIER) * d[sel]
+    if charm_value == "penalty":
+        sel = kind == ps.GRANT_ITEM
+        high[sel, 3] = low[sel, 3] = 1.0
+    return low, high
+
+def level_basis(tables, taps=0.5):
+    """(4, 144)：1、点击收益 (tapGain * taps)、自动收益 (autoGain)、护身符价值 (breakFailPenalty * breakCost)"""
+    return np.stack([
+        np.ones(len(LEVELS)),
+        tables.tap_gain[LEVELS] * taps,
+        tables.auto_gain[LEVELS],
+        tables.break_fail_penalty[LEVELS] * tables.break_cost[LEVELS],
+    ])
+
+def effect_outcomes(kind, value, duration, tables, taps=0.5, charm_value="penalty"):
+    """(效果数,) -> 输 / 赢 两个分位 (效果数, 144)，单位为灵气"""
+    low, high = effect_coefficients(kind, value, duration, charm_value)
+    basis = level_basis(tables, taps)
+    return low @ basis, high @ basis
+
+def eligible_levels(windows):
+    """(事件数, 2) 段位区间 -> (事件数, 144) 可出现等级的掩码"""
+    stage = f.stage_of(LEVELS)[None, :]
+    return (windows[:, :1] <= stage) & (stage <= windows[:, 1:])
+
+def dominates(low_a, high_a, low_b, high_b, mask):
+    """a 对 b 在 mask 内处处一阶随机占优且至少一处严格 (逐行)"""
+    not_worse = np.all(~mask | ((low_a >= low_b) & (high_a >= high_b)), axis=1)
+    better = np.any(mask & ((low_a > low_b) | (high_a > high_b)), axis=1)
+    return not_worse & better
+
+def mv_dominates(mean_a, var_a, mean_b, var_b, mask):
+    not_worse = np.all(~mask | ((mean_a >= mean_b) & (var_a <= var_b)), axis=1)
+    better = np.any(mask & ((mean_a > mean_b) | (var_a < var_b)), axis=1)
+    return not_worse & better
+
+class ChoiceAnalysis:
+    """
+    groups[选项类型组合] = {"events", "dominated", "mv_dominated", "ev": [各选项期望秒数之和], "sd": [...]}
+    events 为逐事件结果 (keep_events=True 时保留)：id、偏移、各选项的期望 / 标准差 (秒，按可出现等级平均)、占优关系
+    """
+
+    def __init__(self, taps=0.5, charm_value="penalty", keep_events=False):
+        self.taps = taps
+        self.charm_value = charm_value
+        self.tables = f.LevelTables()
+        self.base_rate = (self.tables.tap_gain[LEVELS] * taps + self.tables.auto_gain[LEVELS])[None, :]
+        self.keep_events = keep_events
+        self.events = []
+        self.groups = defaultdict(lambda: {"events": 0, "dominated": 0, "mv_dominated": 0, "ev": None, "sd": None})
+        self.count = 0
+        self.dominated = 0
+        self.mv_dominated = 0
+
+    def add_block(self, block):
+        offsets, events = zip(*block)
+        table = ps.EventTable(list(events))
+        kind = table.effective_type()
+        low, high = effect_outcomes(kind, table.effect_value, table.effect_duration, self.tables,
+                                    self.taps, self.charm_value)
+        mean = (low + high) / 2
+        var = ((high - low) / 2) ** 2
+        mask = eligible_levels(np.array([resolve_window(event) for event in events], dtype=np.int64))
+        levels = mask.sum(axis=1)
+        self.count += len(events)
+
+        choices = int(table.choice_count.max(initial=0))
+        start = table.choice_start
+        has = [table.choice_count > index for index in range(choices)]
+        at = [np.minimum(start + index, len(kind) - 1) for index in range(choices)]
+        ev = np.stack([np.where(mask, mean[at[i]] / self.base_rate, 0.0).sum(axis=1) / levels
+                       for i in range(choices)], axis=1) if choices else np.zeros((len(events), 0))
+        sd = np.stack([np.where(mask, np.sqrt(var[at[i]]) / self.base_rate, 0.0).sum(axis=1) / levels
+                       for i in range(choices)], axis=1) if choices else np.zeros((len(events), 0))
+
+        # 每对选项比较：winner[e] = 严格占优的选项下标 (没有为 -1)
+        winner = np.full(len(events), -1, dtype=np.int64)
+        mv_winner = np.full(len(events), -1, dtype=np.int64)
+        for a in range(choices):
+            for b in range(choices):
+                if a == b:
+                    continue
+                both = has[a] & has[b]
+                ia, ib = at[a], at[b]
+                strict = both & dominates(low[ia], high[ia], low[ib], high[ib], mask)
+                mv = both & mv_dominates(mean[ia], var[ia], mean[ib], var[ib], mask)
+                winner = np.where(strict & (winner < 0), a, winner)
+                mv_winner = np.where(mv & (mv_winner < 0), a, mv_winner)
+        self.dominated += int((winner >= 0).sum())
+        self.mv_dominated += int((mv_winner >= 0).sum())
+
+        # 按选项类型组合分组：选项数和各选项类型编成一个整数键
+        key = table.choice_count.copy()
+        for index in range(choices):
+            key = key * len(EFFECT_NAMES) + np.where(has[index], kind[at[index]], 0)
+        _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+        for group_index, e in enumerate(first):
+            count = int(table.choice_count[e])
+            signature = " / ".join(EFFECT_NAMES[int(kind[start[e] + i])] for i in range(count))
+            members = inverse == group_index
+            group = self.groups[signature]
+            group["events"] += int(members.sum())
+            group["dominated"] += int((winner[members] >= 0).sum())
+            group["mv_dominated"] += int((mv_winner[members] >= 0).sum())
+            ev_sum = ev[members, :count].sum(axis=0)
+            sd_sum = sd[members, :count].sum(axis=0)
+            group["ev"] = ev_sum if group["ev"] is None else group["ev"] + ev_sum
+            group["sd"] = sd_sum if group["sd"] is None else group["sd"] + sd_sum
+
+        if self.keep_events:
+            for e in range(len(events)):
+                count = int(table.choice_count[e])
+                ids = [choice.get("id") for choice in events[e]["choices"]]
+                self.events.append({
+                    "id": events[e].get("id"),
+                    "offset": offsets[e],
+                    "choices": [{"id": ids[i], "type": EFFECT_NAMES[int(kind[start[e] + i])],
+                                 "ev_seconds": float(ev[e, i]), "sd_seconds": float(sd[e, i])}
+                                for i in range(count)],
+                    "dominant": ids[winner[e]] if winner[e] >= 0 else None,
+                    "mv_dominant": ids[mv_winner[e]] if mv_winner[e] >= 0 else None,
+                })
+
+def analyze_file(file_path, taps=0.5, charm_value="penalty", keep_events=False):
+    analysis = ChoiceAnalysis(taps, charm_value, keep_events)
+    block = []
+    with open(file_path, "rb") as handle:
+        for offset, event in EventStream(handle):
+            block.append((offset, event))
+            if len(block) >= BLOCK_EVENTS:
+                analysis.add_block(block)
+                block = []
+    if block:
+        analysis.add_block(block)
+    return analysis
+
+def print_analysis(analysis, seconds):
+    print(f"📊 {analysis.count:,} 个事件，耗时 {seconds:.2f}s；严格占优 {analysis.dominated:,} 个，"
+          f"均值方差占优 {analysis.mv_dominated:,} 个 (期望 / 标准差为相当于几秒基础修炼，按可出现等级平均)")
+    print(f"   {'选项组合':<34}{'事件':>8}{'严格占优':>10}{'均值方差':>10}   各选项 期望±标准差")
+    for signature, group in sorted(analysis.groups.items(), key=lambda item: -item[1]["events"]):
+        count = group["events"]
+        cells = "  ".join(f"{ev / count:,.1f}±{sd / count:,.1f}" for ev, sd in zip(group["ev"], group["sd"]))
+        print(f"   {signature:<34}{count:>8,}{group['dominated'] / count:>10.1%}"
+              f"{group['mv_dominated'] / count:>10.1%}   {cells}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="每个事件选项的灵气等价期望 / 方差，并标出被严格占优的事件")
+    parser.add_argument("file", help="events.json")
+    parser.add_argument("--taps", type=float, default=0.5, help="每秒点击次数")
+    parser.add_argument("--charm-value", choices=CHARM_VALUES, default="penalty",
+                        help="护身符折算：penalty 按当级失败惩罚 / zero 不计")
+    parser.add_argument("--json", dest="json_output", help="把逐事件结果写到该文件")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        analysis = analyze_file(args.file, args.taps, args.charm_value, keep_events=bool(args.json_output))
+    except ValueError as error:
+        print(f"❌ {args.file}: {error}", file=sys.stderr)
+        sys.exit(1)
+    print_analysis(analysis, time.perf_counter() - start)
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as file:
+            json.dump({"taps": args.taps, "charm_value": args.charm_value, "events": analysis.events},
+                      file, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
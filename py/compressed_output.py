@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+import zlib
+
+import generate_events12 as g
+
+# ==========================================
+# 紧凑输出：minified JSON 与 zlib 压缩
+# ==========================================
+# minified : 去掉缩进与空格的 JSON 数组 (separators=(",", ":"))
+# zlib     : minified JSON 再做 zlib 压缩
+# zlib-dict: 同上，但使用由词库常量训练的预设字典 (zdict)。
+#            小分片没有足够的上下文，预设字典让第一次出现的词也能被引用。
+# 解压 zlib-dict 需要同一份字典；字典的 adler32 会写在 zlib 头里，对不上时解压直接报错。
+
+MINIFIED_SEPARATORS = (",", ":")
+ZLIB_LEVEL = 9
+ZDICT_LIMIT = 32 * 1024  # zlib 只会回看最近 32KB
+
+def encode_minified(event):
+    return json.dumps(event, ensure_ascii=False, separators=MINIFIED_SEPARATORS)
+
+def iter_minified_chunks(events):
+    """逐段产出 minified JSON，拼起来与 json.dumps(events, separators=...) 一致"""
+    yield "["
+    first = True
+    for event in events:
+        yield encode_minified(event) if first else "," + encode_minified(event)
+        first = False
+    yield "]"
+
+def write_minified(events, file_path):
+    count = 0
+    with open(file_path, "w", encoding="utf-8") as f:
+        for chunk in iter_minified_chunks(events):
+            f.write(chunk)
+            count += 1
+    return count - 2
+
+def build_zdict():
+    """
+    用词库常量训练预设字典。zlib 越靠后的内容引用距离越短，
+    所以低频的词放前面，结构骨架和高频字段放最后。
+    """
+    pieces = []
+    for data in (g.DATA_LOW, g.DATA_MID, g.DATA_HIGH):
+        for item in data:
+            pieces.append(item["sub"])
+            pieces.extend(item["acts"])
+    for prefixes in (g.PREFIX_LOW, g.PREFIX_MID, g.PREFIX_HIGH):
+        pieces.extend(prefixes)
+    for pool in (g.ACTION_B_LEAVE, g.ACTION_B_SAFE, g.ACTION_B_FIGHT):
+        for level_key in ("low", "mid", "high"):
+            pieces.extend(pool[level_key])
+    suffixes = [template["desc_suffix"] for template in g.EVENT_TEMPLATES] + [" 心血来潮！"]
+    pieces.extend(f'{suffix}","rarity":"' for suffix in dict.fromkeys(suffixes))
+    pieces.extend(f'"minStage":"{name}","maxStage":"' for name in g.STAGES)
+    pieces.extend([
+        '"gain_tap_ratio_temp","value":0.5,"duration":60}',
+        '"gain_auto_temp","value":0.5,"duration":60}',
+        '"gamble_tap","value":3.0,"duration":',
+        '"gamble_auto","value":',
+        '"grant_item","value":null}',
+        '"lose_qi","value":',
+        '"gamble","value":',
+        '"gain_qi","value":',
+        '{"type":"nothing"}}]}',
+        '"rarity":"common",', '"rarity":"rare",', '"rarity":"epic",',
+        '"desc":"偶遇', '"desc":"发现', '"desc":"触碰',
+        '"choices":[{"id":"a","text":"',
+        '"effect":{"type":',
+        '},{"id":"b","text":"',
+        '},{"id":"evt_4char_',
+        '","title":"',
+    ])
+    zdict = "".join(pieces).encode("utf-8")
+    return zdict[-ZDICT_LIMIT:]
+
+ZDICT = build_zdict()
+
+def write_zlib(events, file_path, use_zdict=True, level=ZLIB_LEVEL):
+    """minified JSON 流式压缩写入，返回写入的事件数"""
+    if use_zdict:
+        compressor = zlib.compressobj(level, zdict=ZDICT)
+    else:
+        compressor = zlib.compressobj(level)
+    count = 0
+    with open(file_path, "wb") as f:
+        for chunk in iter_minified_chunks(events):
+            f.write(compressor.compress(chunk.encode("utf-8")))
+            count += 1
+        f.write(compressor.flush())
+    return count - 2
+
+def decompress_bytes(data, use_zdict=True):
+    decompressor = zlib.decompressobj(zdict=ZDICT) if use_zdict else zlib.decompressobj()
+    return decompressor.decompress(data) + decompressor.flush()
+
+def read_zlib(file_path, use_zdict=True):
+    with open(file_path, "rb") as f:
+        return json.loads(decompress_bytes(f.read(), use_zdict))
+
+# ==========================================
+# 基准测试
+# ==========================================
+
+def _best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def _read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def benchmark(sizes, seed, repeat):
+    from event_pack import decode_pack, write_pack
+    from interned_json import expand_interned, write_interned
+
+    formats = [
+        ("pretty", g.write_events_stream, lambda data: json.loads(data)),
+        ("minified", write_minified, lambda data: json.loads(data)),
+        ("interned", write_interned, lambda data: expand_interned(json.loads(data))),
+        ("zlib", lambda ev, path: write_zlib(ev, path, use_zdict=False),
+         lambda data: json.loads(decompress_bytes(data, use_zdict=False))),
+        ("zlib-dict", write_zlib, lambda data: json.loads(decompress_bytes(data))),
+        ("pack", write_pack, decode_pack),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        for total in sizes:
+            events = list(g.generate(counts=g.scale_counts(total), seed=seed))
+            print(f"📊 {total:,} 个事件")
+            print(f"   {'格式':<12}{'字节':>14}{'占比':>9}{'读取耗时':>12}")
+            baseline = None
+            for name, write, read in formats:
+                path = os.path.join(tmp, name)
+                write(iter(events), path)
+                data = _read_bytes(path)
+                if read(data) != events:
+                    raise SystemExit(f"❌ {name} 往返校验失败")
+                seconds = _best_of(lambda: read(data), repeat)
+                baseline = baseline or len(data)
+                print(f"   {name:<12}{len(data):>14,}{len(data) / baseline:>9.1%}{seconds * 1000:>10.2f}ms")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="minified / zlib 输出：解压 / 基准测试")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    decompress_cmd = sub.add_parser("decompress", help="zlib -> pretty JSON")
+    decompress_cmd.add_argument("zlib_path")
+    decompress_cmd.add_argument("json_path")
+    decompress_cmd.add_argument("--no-zdict", action="store_true", help="文件未使用预设字典")
+
+    bench_cmd = sub.add_parser("bench", help="各输出格式的体积与读取耗时")
+    bench_cmd.add_argument("--sizes", default="50,2000", help="逗号分隔的事件数 (小分片 / 完整池)")
+    bench_cmd.add_argument("--seed", type=int, default=0)
+    bench_cmd.add_argument("--repeat", type=int, default=5)
+
+    args = parser.parse_args(argv)
+    if args.command == "decompress":
+        events = read_zlib(args.zlib_path, use_zdict=not args.no_zdict)
+        g.write_events_stream(events, args.json_path)
+        print(f"✅ {len(events)} 个事件 -> {args.json_path}")
+    else:
+        benchmark([int(size) for size in args.sizes.split(",")], args.seed, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+import argparse
+import time
+from json.encoder import encode_basestring
+
+import numpy as np
+
+import event_model as em
+import generate_events12 as g
+
+# ==========================================
+# NumPy 批量事件生成引擎 (--engine numpy)
+# ==========================================
+# 按段位一次抽完模板、词库下标、灵气抖动，分布与 python 引擎一致，但随机流不同，输出不同。
+# 快的只是抽样本身 (几十倍)；物化成事件 dict 后端到端只快 2~3 倍，
+# 再走 json.dumps(indent=2) 编码就几乎没有优势了。写 pretty 文件时用 iter_encoded
+# 直接从数组拼文本 (生成 + 编码约 8 倍)；其他输出格式仍然要先物化 dict。
+# 数字见 `python event_batch_engine.py --total 100000`。
+
+# ==========================================
+# 1. 词库预处理 (按段位档次展开成定长数组)
+# ==========================================
+
+# B 选项词库类别：0 = 离开, 1 = 稳健, 2 = 反抗
+B_LEAVE, B_SAFE, B_FIGHT = 0, 1, 2
+
+# 模板变体：0~4 对应 EVENT_TEMPLATES，5 是 buff_gamble 切换成赌点击的版本
+TAP_VARIANT = len(g.EVENT_TEMPLATES)
+BUFF_GAMBLE = next(i for i, t in enumerate(g.EVENT_TEMPLATES) if t["type"] == "buff_gamble")
+
+def _b_category(logic_type):
+    """与 get_action_b_text 的分支保持一致"""
+    if logic_type == "nothing":
+        return B_LEAVE
+    if logic_type in ["gain_auto_safe", "gain_tap_safe"]:
+        return B_SAFE
+    if logic_type == "gamble_qi":
+        return B_FIGHT
+    return None
+
+def _build_variants():
+    variants = []
+    for template in g.EVENT_TEMPLATES:
+        variants.append((template["choice_a_logic"], template["choice_b_logic"], template["desc_suffix"]))
+    # buff_gamble 的 50% 赌点击分支，与 build_event 一致
+    variants.append(("gamble_buff_tap", "gain_tap_safe", " 心血来潮！"))
+    return variants
+
+VARIANTS = _build_variants()
+VARIANT_B_CATEGORY = np.array(
+    [-1 if _b_category(logic_b) is None else _b_category(logic_b) for _, logic_b, _ in VARIANTS]
+)
+
+class LexiconTier:
+    """一个段位档次 (low / mid / high) 的词库，展开成按下标取值的列表"""
+
+    def __init__(self, level_key, data, prefixes, desc_verb):
+        self.level_key = level_key
+        self.subjects = [item["sub"] for item in data]
+        self.acts = [item["acts"] for item in data]
+        self.act_counts = np.array([len(acts) for acts in self.acts])
+        self.prefixes = prefixes
+        self.desc_verb = desc_verb
+        self.b_texts = [
+            g.ACTION_B_LEAVE[level_key],
+            g.ACTION_B_SAFE[level_key],
+            g.ACTION_B_FIGHT[level_key],
+        ]
+        self.b_counts = np.array([len(texts) for texts in self.b_texts])
+
+TIERS = {
+    "low": LexiconTier("low", g.DATA_LOW, g.PREFIX_LOW, "偶遇"),
+    "mid": LexiconTier("mid", g.DATA_MID, g.PREFIX_MID, "发现"),
+    "high": LexiconTier("high", g.DATA_HIGH, g.PREFIX_HIGH, "触碰"),
+}
+
+def tier_for_stage(stage_idx):
+    """与 get_title_and_action_a 的段位划分一致"""
+    if stage_idx <= 3:
+        return TIERS["low"]
+    elif stage_idx <= 9:
+        return TIERS["mid"]
+    return TIERS["high"]
+
+# ==========================================
+# 2. 批量抽样
+# ==========================================
+
+class StageBatch:
+    """一个段位的批量抽样结果，全部是 NumPy 数组；写文件时直接拼文本，需要 dict 时再物化"""
+
+    def __init__(self, stage_idx, variant, item, prefix, act, b_text, qi):
+        self.stage_idx = stage_idx
+        self.variant = variant
+        self.item = item
+        self.prefix = prefix
+        self.act = act
+        self.b_text = b_text
+        self.qi = qi
+
+    def __len__(self):
+        return len(self.variant)
+
+    def _rows(self, start_number):
+        """逐行取出 (编号, 标题, 描述, 模板变体, A 文案, B 文案, qi)"""
+        tier = tier_for_stage(self.stage_idx)
+        columns = zip(
+            self.variant.tolist(),
+            self.item.tolist(),
+            self.prefix.tolist(),
+            self.act.tolist(),
+            self.b_text.tolist(),
+            self.qi.tolist(),
+        )
+        for offset, (variant, item, prefix, act, b_text, qi_val) in enumerate(columns):
+            logic_a, logic_b, suffix = VARIANTS[variant]
+            title = f"{tier.prefixes[prefix]}{tier.subjects[item]}"
+            b_category = VARIANT_B_CATEGORY[variant]
+            btn_b = "尝试一下" if b_category < 0 else tier.b_texts[b_category][b_text]
+            yield (start_number + offset, title, f"{tier.desc_verb}{title}。{suffix}", variant,
+                   g.polish_choice_text(tier.acts[item][act], logic_a), g.polish_choice_text(btn_b, logic_b), qi_val)
+
+    def iter_events(self, start_number=1):
+        """逐个物化成与 build_event 相同结构的事件 dict"""
+        stage_idx = self.stage_idx
+        rarity = g.stage_rarity(stage_idx)
+        min_stage = g.STAGES[stage_idx]
+        max_stage = g.STAGES[min(stage_idx + 2, 15)]
+        for number, title, desc, variant, text_a, text_b, qi_val in self._rows(start_number):
+            logic_a, logic_b, _ = VARIANTS[variant]
+            yield {
+                "id": g.event_id(number),
+                "title": title,
+                "desc": desc,
+                "rarity": rarity,
+                "minStage": min_stage,
+                "maxStage": max_stage,
+                "choices": [
+                    {"id": "a", "text": text_a, "effect": g.build_effect(logic_a, qi_val, stage_idx)},
+                    {"id": "b", "text": text_b, "effect": g.build_effect(logic_b, qi_val, stage_idx)},
+                ],
+            }
+
+    def iter_encoded(self, start_number=1):
+        """
+        直接拼出 pretty JSON 文本，与 g.encode_event(iter_events 的 dict) 逐字节一致。
+        不建事件 dict、不走 json.dumps(indent=2)；与 qi 无关的效果每个段位只编码一次。
+        """
+        stage_idx = self.stage_idx
+        fields = "".join(
+            f',\n    "{key}": {encode_basestring(value)}'
+            for key, value in (("rarity", g.stage_rarity(stage_idx)), ("minStage", g.STAGES[stage_idx]),
+                               ("maxStage", g.STAGES[min(stage_idx + 2, 15)]))
+        )
+        effects = [(_effect_encoder(logic_a, stage_idx), _effect_encoder(logic_b, stage_idx))
+                   for logic_a, logic_b, _ in VARIANTS]
+        for number, title, desc, variant, text_a, text_b, qi_val in self._rows(start_number):
+            effect_a, effect_b = effects[variant]
+            yield "".join((
+                '{\n    "id": ', encode_basestring(g.event_id(number)),
+                ',\n    "title": ', encode_basestring(title),
+                ',\n    "desc": ', encode_basestring(desc),
+                fields,
+                ',\n    "choices": [\n      {\n        "id": "a",\n        "text": ', encode_basestring(text_a),
+                ',\n        "effect": ', effect_a(qi_val),
+                '\n      },\n      {\n        "id": "b",\n        "text": ', encode_basestring(text_b),
+                ',\n        "effect": ', effect_b(qi_val),
+                "\n      }\n    ]\n  }",
+            ))
+
+def _effect_encoder(logic, stage_idx):
+    """logic -> (qi -> 效果的 JSON 文本)，缩进与事件里的位置一致；与 qi 无关的只编码一次"""
+    def encode(qi_val):
+        effect = g.build_effect(logic, qi_val, stage_idx)
+        return em.encode_effect(em.Effect(effect["type"], effect.get("value", em.MISSING),
+                                          effect.get("duration", em.MISSING)))
+
+    probe = encode(1000)
+    if probe == encode(2000):
+        return lambda qi_val: probe
+    return encode
+
+def synthesize_stage(stage_idx, count, rng):
+    """一次性抽完一个段位的模板、词库下标、抖动系数与取整"""
+    tier = tier_for_stage(stage_idx)
+
+    weights = np.array(g.get_weights_by_stage(stage_idx), dtype=float)
+    variant = rng.choice(len(weights), size=count, p=weights / weights.sum())
+    # buff_gamble 有 50% 概率切换成赌点击
+    flip = (variant == BUFF_GAMBLE) & (rng.random(count) < 0.5)
+    variant[flip] = TAP_VARIANT
+
+    item = rng.integers(0, len(tier.subjects), size=count)
+    prefix = rng.integers(0, len(tier.prefixes), size=count)
+    act = (rng.random(count) * tier.act_counts[item]).astype(np.int64)
+
+    b_category = VARIANT_B_CATEGORY[variant]
+    b_counts = np.where(b_category < 0, 1, tier.b_counts[np.maximum(b_category, 0)])
+    b_text = (rng.random(count) * b_counts).astype(np.int64)
+
+    jitter = rng.uniform(*g.QI_CURVE.jitter, size=count)
+    qi = g.QI_CURVE.sample_batch(stage_idx, jitter)
+
+    return StageBatch(stage_idx, variant, item, prefix, act, b_text, qi)
+
+def stage_generator(seed, stage_idx):
+    """每个段位独立的 NumPy 随机流 (与进程数、其他段位无关)"""
+    return np.random.default_rng([seed, stage_idx])
+
+def generate_batched(stages=range(16), counts=g.STAGE_COUNTS, seed=None):
+    """按段位批量抽样，再惰性物化成事件 dict，接口与 generate() 一致"""
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % (2 ** 32))
+
+    for stage_idx, count, _, start_number, _ in g.stage_tasks(stages, counts, seed):
+        batch = synthesize_stage(stage_idx, count, stage_generator(seed, stage_idx))
+        yield from batch.iter_events(start_number)
+
+def encode_batched(stages=range(16), counts=g.STAGE_COUNTS, seed=None):
+    """与 generate_batched 同样的事件，直接产出 pretty JSON 文本 (g.encode_event 的格式)"""
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % (2 ** 32))
+
+    for stage_idx, count, _, start_number, _ in g.stage_tasks(stages, counts, seed):
+        batch = synthesize_stage(stage_idx, count, stage_generator(seed, stage_idx))
+        yield from batch.iter_encoded(start_number)
+
+def write_batched(file_path, stages=range(16), counts=g.STAGE_COUNTS, seed=None):
+    """pretty 格式写出，与 write_events_stream(generate_batched(...)) 字节一致，返回写入数量"""
+    return g.write_json_chunks(encode_batched(stages, counts, seed), file_path)
+
+# ==========================================
+# 3. 基准测试
+# ==========================================
+
+def _events_per_sec(count, seconds):
+    return count / seconds if seconds > 0 else float("inf")
+
+def _drain(iterator):
+    for _ in iterator:
+        pass
+
+def benchmark(total, seed):
+    counts = g.scale_counts(total)
+    tasks = list(g.stage_tasks(range(16), counts, seed))
+
+    start = time.perf_counter()
+    _drain(event for task in tasks for event in g.generate_stage(*task))
+    python_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batches = [synthesize_stage(stage_idx, count, stage_generator(seed, stage_idx))
+               for stage_idx, count, _, _, _ in tasks]
+    synth_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _drain(event for batch, task in zip(batches, tasks) for event in batch.iter_events(task[3]))
+    materialize_time = time.perf_counter() - start
+
+    # 写文件的真实路径：生成 + 编码成 pretty JSON
+    start = time.perf_counter()
+    _drain(g.encode_event(event) for task in tasks for event in g.generate_stage(*task))
+    python_encode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _drain(g.encode_event(event) for event in generate_batched(counts=counts, seed=seed))
+    dict_encode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _drain(encode_batched(counts=counts, seed=seed))
+    direct_encode_time = time.perf_counter() - start
+
+    groups = [
+        ("只生成 (相对逐个生成 dict)", python_time, [
+            ("逐个生成 dict (python)", python_time),
+            ("批量抽样 (numpy)", synth_time),
+            ("批量抽样 + 物化 dict", synth_time + materialize_time),
+        ]),
+        ("生成 + 编码 (相对 python 写文件路径)", python_encode_time, [
+            ("逐个生成 + encode_event", python_encode_time),
+            ("物化 dict + encode_event", dict_encode_time),
+            ("批量抽样 + 直接编码", direct_encode_time),
+        ]),
+    ]
+    print(f"📊 {total} 个事件")
+    for title, baseline, rows in groups:
+        print(f"   {title}")
+        for name, seconds in rows:
+            speedup = baseline / seconds if seconds > 0 else float("inf")
+            print(f"   {name:<22} {seconds:8.3f}s  {_events_per_sec(total, seconds):14,.0f} 个/秒  x{speedup:.1f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NumPy 批量事件生成引擎基准测试")
+    parser.add_argument("--total", type=int, default=1_000_000, help="事件总量")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args(argv)
+    benchmark(args.total, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+import argparse
+import gc
+import json
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from json.encoder import encode_basestring
+
+import generate_events12 as g
+
+# ==========================================
+# 事件模型 (对应 Swift GameEvent / EventChoice / EventEffect)
+# ==========================================
+# 事件 dict 每个都带两个选项 dict 和两个效果 dict，大池子里几百万个小 dict 是主要内存开销。
+# 这里用 __slots__ 类代替，并且：
+#   - Effect / Choice 构造后视为不可变，相同内容的实例在一次生成中共享 (ModelInterner)；
+#     流式生成时每张表最多留 STREAM_INTERN_LIMIT 项，满了就清空，内存不随池子增长；
+#   - 标题、描述等字符串也按内容去重；
+#   - 编码器直接拼出与 json.dump(indent=2) 相同的文本，Effect / Choice 的编码结果缓存在实例上。
+# Swift 里 rarity / minStage / maxStage / value / duration 都是可选字段：
+# MISSING 表示 JSON 里没有这个键，None 表示键存在、值为 null。
+
+class _Missing:
+    __slots__ = ()
+
+    def __repr__(self):
+        return "MISSING"
+
+MISSING = _Missing()
+
+class Effect:
+    __slots__ = ("type", "value", "duration", "_encoded")
+
+    def __init__(self, type, value=MISSING, duration=MISSING):
+        self.type = type
+        self.value = value
+        self.duration = duration
+        self._encoded = None
+
+    def to_dict(self):
+        effect = {"type": self.type}
+        if self.value is not MISSING:
+            effect["value"] = self.value
+        if self.duration is not MISSING:
+            effect["duration"] = self.duration
+        return effect
+
+class Choice:
+    __slots__ = ("id", "text", "effect", "_encoded")
+
+    def __init__(self, id, text, effect):
+        self.id = id
+        self.text = text
+        self.effect = effect
+        self._encoded = None
+
+    def to_dict(self):
+        return {"id": self.id, "text": self.text, "effect": self.effect.to_dict()}
+
+class Event:
+    __slots__ = ("id", "title", "desc", "rarity", "min_stage", "max_stage", "choices")
+
+    def __init__(self, id, title, desc, choices, rarity=MISSING, min_stage=MISSING, max_stage=MISSING):
+        self.id = id
+        self.title = title
+        self.desc = desc
+        self.choices = choices
+        self.rarity = rarity
+        self.min_stage = min_stage
+        self.max_stage = max_stage
+
+    def to_dict(self):
+        """与生成器的 dict 键顺序一致"""
+        event = {"id": self.id, "title": self.title, "desc": self.desc}
+        if self.rarity is not MISSING:
+            event["rarity"] = self.rarity
+        if self.min_stage is not MISSING:
+            event["minStage"] = self.min_stage
+        if self.max_stage is not MISSING:
+            event["maxStage"] = self.max_stage
+        event["choices"] = [choice.to_dict() for choice in self.choices]
+        return event
+
+STREAM_INTERN_LIMIT = 4096
+
+class ModelInterner:
+    """按内容共享字符串、Effect、Choice 实例；limit 不为空时每张表超过 limit 项就清空"""
+
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.strings = {}
+        self.effects = {}
+        self.choices = {}
+
+    def _store(self, table, key, value):
+        if self.limit is not None and len(table) >= self.limit:
+            table.clear()
+        table[key] = value
+        return value
+
+    def string(self, text):
+        shared = self.strings.get(text)
+        if shared is None:
+            shared = self._store(self.strings, text, text)
+        return shared
+
+    def effect(self, type, value=MISSING, duration=MISSING):
+        # 1 与 1.0 相等但编码不同，键里带上类型
+        key = (type, value.__class__, value, duration.__class__, duration)
+        effect = self.effects.get(key)
+        if effect is None:
+            effect = self._store(self.effects, key, Effect(type, value, duration))
+        return effect
+
+    def effect_from_dict(self, data):
+        return self.effect(data["type"], data.get("value", MISSING), data.get("duration", MISSING))
+
+    def choice(self, choice_id, text, effect):
+        # effect 已经去重，直接按实例作键
+        key = (choice_id, text, effect)
+        choice = self.choices.get(key)
+        if choice is None:
+            choice = self._store(self.choices, key, Choice(self.string(choice_id), self.string(text), effect))
+        return choice
+
+    def event_from_dict(self, data):
+        choices = [
+            self.choice(c["id"], c["text"], self.effect_from_dict(c["effect"])) for c in data["choices"]
+        ]
+        return Event(
+            data["id"], self.string(data["title"]), self.string(data["desc"]), choices,
+            data.get("rarity", MISSING), data.get("minStage", MISSING), data.get("maxStage", MISSING),
+        )
+
+# ==========================================
+# 生成
+# ==========================================
+
+def build_event(stage_idx, event_number, rng, interner, unique_text=None):
+    """与 generate_events12.build_event 同一随机流、同样内容，只是产出 Event"""
+    title, desc, text_a, effect_a, text_b, effect_b = g.event_fields(stage_idx, rng, unique_text)
+    choices = [
+        interner.choice("a", text_a, interner.effect_from_dict(effect_a)),
+        interner.choice("b", text_b, interner.effect_from_dict(effect_b)),
+    ]
+    return Event(
+        g.event_id(event_number), interner.string(title), interner.string(desc), choices,
+        g.stage_rarity(stage_idx), g.STAGES[stage_idx], g.STAGES[min(stage_idx + 2, 15)],
+    )
+
+def generate(stages=range(16), counts=g.STAGE_COUNTS, seed=None, unique=False, interner=None):
+    """对应 generate_events12.generate()，同一 seed 下内容一致；默认的 interner 有上限，内存不随池子增长"""
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    interner = interner or ModelInterner(STREAM_INTERN_LIMIT)
+    for stage_idx, count, seed, start_number, unique in g.stage_tasks(stages, counts, seed, unique):
+        rng = g.stage_rng(seed, stage_idx)
+        unique_text = g.UniqueStageText(stage_idx, seed) if unique else None
+        for offset in range(count):
+            yield build_event(stage_idx, start_number + offset, rng, interner, unique_text)
+
+# ==========================================
+# 编码：直接拼出 indent=2 文本
+# ==========================================
+
+def _scalar(value):
+    if value is None:
+        return "null"
+    if value.__class__ is int:
+        return int.__repr__(value)
+    if value.__class__ is float and value == value and value not in (float("inf"), float("-inf")):
+        return float.__repr__(value)
+    return json.dumps(value)
+
+def encode_effect(effect):
+    """缩进位置：事件位于数组第一层，效果在第四层"""
+    if effect._encoded is None:
+        lines = ['\n          "type": ' + encode_basestring(effect.type)]
+        if effect.value is not MISSING:
+            lines.append('\n          "value": ' + _scalar(effect.value))
+        if effect.duration is not MISSING:
+            lines.append('\n          "duration": ' + _scalar(effect.duration))
+        effect._encoded = "{" + ",".join(lines) + "\n        }"
+    return effect._encoded
+
+def encode_choice(choice):
+    if choice._encoded is None:
+        choice._encoded = (
+            '{\n        "id": ' + encode_basestring(choice.id)
+            + ',\n        "text": ' + encode_basestring(choice.text)
+            + ',\n        "effect": ' + encode_effect(choice.effect)
+            + "\n      }"
+        )
+    return choice._encoded
+
+def encode_event(event):
+    """与 generate_events12.encode_event(event.to_dict()) 逐字节一致"""
+    parts = [
+        '{\n    "id": ', encode_basestring(event.id),
+        ',\n    "title": ', encode_basestring(event.title),
+        ',\n    "desc": ', encode_basestring(event.desc),
+    ]
+    for key, value in (("rarity", event.rarity), ("minStage", event.min_stage), ("maxStage", event.max_stage)):
+        if value is not MISSING:
+            parts.append(f',\n    "{key}": ')
+            parts.append("null" if value is None else encode_basestring(value))
+    if event.choices:
+        parts.append(',\n    "choices": [\n      ')
+        parts.append(",\n      ".join(encode_choice(choice) for choice in event.choices))
+        parts.append("\n    ]\n  }")
+    else:
+        parts.append(',\n    "choices": []\n  }')
+    return "".join(parts)
+
+def write_events(events, file_path):
+    """Event 流 -> pretty JSON，返回写入数量"""
+    return g.write_json_chunks((encode_event(event) for event in events), file_path)
+
+# ==========================================
+# 内存 / 速度基准
+# ==========================================
+
+def measure(kind, total, seed):
+    """在当前进程里生成 total 个事件并全部留在内存，返回每事件字节数与耗时"""
+    counts = g.scale_counts(total)
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    if kind == "dict":
+        events = list(g.generate(counts=counts, seed=seed))
+    else:
+        events = list(generate(counts=counts, seed=seed, interner=ModelInterner()))
+    seconds = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    encode = g.encode_event if kind == "dict" else encode_event
+    for event in events:
+        encode(event)
+    encode_seconds = time.perf_counter() - start
+    return {"kind": kind, "events": len(events), "bytes_per_event": current / len(events),
+            "total_bytes": current, "build_seconds": seconds, "encode_seconds": encode_seconds}
+
+def benchmark(total, seed):
+    print(f"📊 {total:,} 个事件常驻内存 (tracemalloc，各自独立进程)")
+    print(f"   {'模型':<8}{'字节/事件':>12}{'总计':>12}{'生成':>10}{'编码':>10}")
+    for kind in ("dict", "slots"):
+        command = [sys.executable, __file__, "measure", kind, str(total), str(seed)]
+        result = json.loads(subprocess.run(command, capture_output=True, text=True, check=True).stdout)
+        print(f"   {kind:<8}{result['bytes_per_event']:>12,.0f}{result['total_bytes'] / 2 ** 20:>10,.0f}MB"
+              f"{result['build_seconds']:>9.2f}s{result['encode_seconds']:>9.2f}s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="slots 事件模型：生成 / 基准测试")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    generate_cmd = sub.add_parser("generate", help="用 slots 模型生成 pretty JSON")
+    generate_cmd.add_argument("-o", "--output", default=g.DEFAULT_OUTPUT)
+    generate_cmd.add_argument("--seed", type=int, default=0)
+    generate_cmd.add_argument("--total", type=int, default=None)
+
+    bench_cmd = sub.add_parser("bench", help="dict 与 slots 模型的内存 / 编码耗时对比")
+    bench_cmd.add_argument("--total", type=int, default=1000000)
+    bench_cmd.add_argument("--seed", type=int, default=0)
+
+    measure_cmd = sub.add_parser("measure", help=argparse.SUPPRESS)
+    measure_cmd.add_argument("kind", choices=["dict", "slots"])
+    measure_cmd.add_argument("total", type=int)
+    measure_cmd.add_argument("seed", type=int)
+
+    args = parser.parse_args(argv)
+    if args.command == "generate":
+        counts = g.scale_counts(args.total) if args.total is not None else g.STAGE_COUNTS
+        total = write_events(generate(counts=counts, seed=args.seed), args.output)
+        print(f"✅ {total} 个事件 -> {args.output}")
+    elif args.command == "bench":
+        benchmark(args.total, args.seed)
+    else:
+        print(json.dumps(measure(args.kind, args.total, args.seed)))
+
+if __name__ == "__main__":
+    main()
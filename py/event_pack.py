@@ -0,0 +1,342 @@
+import argparse
+import json
+import os
+import struct
+import time
+
+from generate_events12 import STAGES
+from stage_index import STAGE_CODES
+
+# ==========================================
+# 二进制事件包 (.pack)
+# ==========================================
+# 布局 (小端)：
+#   文件头    magic "PSEV" | u16 版本 | u16 保留 | u32 字符串数 | u32 字符串区字节数 | u32 事件数 | u32 选项数
+#   字符串表  u32 结束偏移 * 字符串数 | UTF-8 字节区 (去重，记录里只存下标)
+#   事件记录  EVENT_RECORD * 事件数 (定长)
+#   选项记录  CHOICE_RECORD * 选项数 (定长)
+#   段位原文  u32 字符串下标 * N：境界名不是规范简体写法 (如繁体「築基」) 时，记录里存境界下标，
+#             原文进字符串表，按事件顺序、先 min 后 max 排在这里，解码时原样还原
+# 与 GameEvent / EventChoice / EventEffect 的 JSON 结构可以无损互转。
+
+MAGIC = b"PSEV"
+VERSION = 2
+
+HEADER = struct.Struct("<4sHHIIII")
+# id, title, desc, rarity (字符串下标) | minStage, maxStage (境界下标) | 选项数 | 标记位 | 第一个选项下标
+EVENT_RECORD = struct.Struct("<IIIIBBBBI")
+# id, text (字符串下标) | 效果类型 | 标记位 | value | duration
+CHOICE_RECORD = struct.Struct("<IIBBxxdd")
+
+NULL_STRING = 0xFFFFFFFF
+NULL_STAGE = 0xFF
+
+# 事件标记位：字段是否出现在 JSON 里 (出现但为 null 时用 NULL_* 表示)
+HAS_RARITY = 1
+HAS_MIN_STAGE = 2
+HAS_MAX_STAGE = 4
+MIN_STAGE_SPELLED = 8
+MAX_STAGE_SPELLED = 16
+
+# 效果标记位
+HAS_VALUE = 1
+VALUE_IS_NULL = 2
+VALUE_IS_INT = 4
+HAS_DURATION = 8
+DURATION_IS_INT = 16
+
+# value / duration 存成 f64，超过 2**53 的整数往返后会变
+MAX_EXACT_INT = 2 ** 53
+
+# 与 Swift EventEffect.EffectType 一一对应
+EFFECT_TYPES = [
+    "gain_qi", "lose_qi",
+    "gain_tap_ratio_temp", "gain_auto_temp",
+    "grant_item", "nothing",
+    "gamble_tap", "gamble_auto", "gamble",
+]
+EFFECT_CODES = {name: idx for idx, name in enumerate(EFFECT_TYPES)}
+
+EVENT_KEYS = {"id", "title", "desc", "rarity", "minStage", "maxStage", "choices"}
+CHOICE_KEYS = {"id", "text", "effect"}
+EFFECT_KEYS = {"type", "value", "duration"}
+
+# ==========================================
+# 编码
+# ==========================================
+
+class PackEncoder:
+    """逐个 add() 事件，最后 to_bytes()；事件本身不保留，只保留定长记录与字符串表"""
+
+    def __init__(self):
+        self.strings = {}
+        self.events = bytearray()
+        self.choices = bytearray()
+        self.stage_names = bytearray()
+        self.event_count = 0
+        self.choice_count = 0
+
+    def _string(self, text):
+        """可为 null 的字符串字段 (rarity)"""
+        if text is None:
+            return NULL_STRING
+        if not isinstance(text, str):
+            raise ValueError(f"字段应为字符串: {text!r}")
+        index = self.strings.get(text)
+        if index is None:
+            index = self.strings[text] = len(self.strings)
+        return index
+
+    def _stage(self, name, spelled_flag):
+        """返回 (境界下标, 标记位)；简体 / 繁体都认 (同 stage_index.STAGE_CODES)，非规范写法另存原文"""
+        if name is None:
+            return NULL_STAGE, 0
+        code = STAGE_CODES.get(name)
+        if code is None:
+            raise ValueError(f"未知境界: {name!r}")
+        if name == STAGES[code]:
+            return code, 0
+        self.stage_names += struct.pack("<I", self._string(name))
+        return code, spelled_flag
+
+    def _required(self, record, key, owner):
+        """GameEvent / EventChoice 的非可选字符串字段：缺失或为 null 时 Swift 解码会失败"""
+        text = record.get(key)
+        if text is None:
+            raise ValueError(f"{owner} 缺少必填字段 {key}")
+        return self._string(text)
+
+    @staticmethod
+    def _number(value, present_flag, null_flag, int_flag):
+        """返回 (标记位, 浮点值)"""
+        if value is None:
+            return present_flag | null_flag, 0.0
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"效果数值应为数字: {value!r}")
+        if isinstance(value, int):
+            if abs(value) > MAX_EXACT_INT:
+                raise ValueError(f"整数超出 f64 可精确表示的范围: {value}")
+            return present_flag | int_flag, float(value)
+        return present_flag, float(value)
+
+    def add(self, event):
+        unknown = event.keys() - EVENT_KEYS
+        if unknown:
+            raise ValueError(f"事件 {event.get('id')} 含 pack 不支持的字段: {sorted(unknown)}")
+
+        flags = 0
+        if "rarity" in event:
+            flags |= HAS_RARITY
+        if "minStage" in event:
+            flags |= HAS_MIN_STAGE
+        if "maxStage" in event:
+            flags |= HAS_MAX_STAGE
+
+        min_stage, min_flag = self._stage(event.get("minStage"), MIN_STAGE_SPELLED)
+        max_stage, max_flag = self._stage(event.get("maxStage"), MAX_STAGE_SPELLED)
+        flags |= min_flag | max_flag
+
+        owner = f"事件 {event.get('id')}"
+        choices = event.get("choices")
+        if not isinstance(choices, list):
+            raise ValueError(f"{owner} 缺少 choices 数组")
+        self.events += EVENT_RECORD.pack(
+            self._required(event, "id", owner),
+            self._required(event, "title", owner),
+            self._required(event, "desc", owner),
+            self._string(event.get("rarity")),
+            min_stage,
+            max_stage,
+            len(choices),
+            flags,
+            self.choice_count,
+        )
+        self.event_count += 1
+
+        for choice in choices:
+            effect = choice.get("effect")
+            if not isinstance(effect, dict):
+                raise ValueError(f"{owner} 的选项缺少 effect")
+            if choice.keys() - CHOICE_KEYS or effect.keys() - EFFECT_KEYS:
+                raise ValueError(f"{owner} 的选项含 pack 不支持的字段")
+            try:
+                type_code = EFFECT_CODES[effect.get("type")]
+            except KeyError:
+                raise ValueError(f"{owner} 含未知效果类型: {effect.get('type')!r}") from None
+
+            effect_flags = 0
+            value = duration = 0.0
+            if "value" in effect:
+                value_flags, value = self._number(effect["value"], HAS_VALUE, VALUE_IS_NULL, VALUE_IS_INT)
+                effect_flags |= value_flags
+            if "duration" in effect:
+                if effect["duration"] is None:
+                    raise ValueError(f"{owner} 的 duration 不能为 null")
+                duration_flags, duration = self._number(effect["duration"], HAS_DURATION, 0, DURATION_IS_INT)
+                effect_flags |= duration_flags
+
+            self.choices += CHOICE_RECORD.pack(
+                self._required(choice, "id", f"{owner} 的选项 {choice.get('id')}"),
+                self._required(choice, "text", f"{owner} 的选项 {choice.get('id')}"),
+                type_code,
+                effect_flags,
+                value,
+                duration,
+            )
+            self.choice_count += 1
+
+    def to_bytes(self):
+        blob = bytearray()
+        ends = bytearray()
+        for text in self.strings:  # dict 保持插入顺序 == 下标顺序
+            blob += text.encode("utf-8")
+            ends += struct.pack("<I", len(blob))
+        header = HEADER.pack(
+            MAGIC, VERSION, 0, len(self.strings), len(blob), self.event_count, self.choice_count
+        )
+        return b"".join([header, ends, blob, self.events, self.choices, self.stage_names])
+
+def encode_pack(events):
+    encoder = PackEncoder()
+    for event in events:
+        encoder.add(event)
+    return encoder.to_bytes()
+
+def write_pack(events, file_path):
+    data = encode_pack(events)
+    with open(file_path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+# ==========================================
+# 解码
+# ==========================================
+
+def _decode_number(flags, null_flag, int_flag, raw):
+    if flags & null_flag:
+        return None
+    return int(raw) if flags & int_flag else raw
+
+def _decode_stage(flags, spelled_flag, code, strings, stage_names):
+    if code == NULL_STAGE:
+        return None
+    return strings[next(stage_names)] if flags & spelled_flag else STAGES[code]
+
+def decode_pack(data):
+    """解码成与 JSON 相同结构的事件列表"""
+    view = memoryview(data)
+    magic, version, _, string_count, blob_size, event_count, choice_count = HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise ValueError("不是 PalmSky 事件包")
+    if version != VERSION:
+        raise ValueError(f"不支持的事件包版本: {version}")
+
+    offset = HEADER.size
+    ends = struct.unpack_from(f"<{string_count}I", view, offset)
+    offset += 4 * string_count
+    blob = bytes(view[offset:offset + blob_size])
+    offset += blob_size
+
+    strings = []
+    start = 0
+    for end in ends:
+        strings.append(blob[start:end].decode("utf-8"))
+        start = end
+
+    events_size = EVENT_RECORD.size * event_count
+    event_records = EVENT_RECORD.iter_unpack(view[offset:offset + events_size])
+    offset += events_size
+    choices_size = CHOICE_RECORD.size * choice_count
+    choice_records = list(CHOICE_RECORD.iter_unpack(view[offset:offset + choices_size]))
+    offset += choices_size
+    stage_names = iter(struct.unpack_from(f"<{(len(view) - offset) // 4}I", view, offset))
+
+    events = []
+    for event_id, title, desc, rarity, min_stage, max_stage, n_choices, flags, first_choice in event_records:
+        choices = []
+        for choice_id, text, type_code, effect_flags, value, duration in \
+                choice_records[first_choice:first_choice + n_choices]:
+            effect = {"type": EFFECT_TYPES[type_code]}
+            if effect_flags & HAS_VALUE:
+                effect["value"] = _decode_number(effect_flags, VALUE_IS_NULL, VALUE_IS_INT, value)
+            if effect_flags & HAS_DURATION:
+                effect["duration"] = _decode_number(effect_flags, 0, DURATION_IS_INT, duration)
+            choices.append({"id": strings[choice_id], "text": strings[text], "effect": effect})
+
+        event = {"id": strings[event_id], "title": strings[title], "desc": strings[desc]}
+        if flags & HAS_RARITY:
+            event["rarity"] = None if rarity == NULL_STRING else strings[rarity]
+        if flags & HAS_MIN_STAGE:
+            event["minStage"] = _decode_stage(flags, MIN_STAGE_SPELLED, min_stage, strings, stage_names)
+        if flags & HAS_MAX_STAGE:
+            event["maxStage"] = _decode_stage(flags, MAX_STAGE_SPELLED, max_stage, strings, stage_names)
+        event["choices"] = choices
+        events.append(event)
+    return events
+
+def read_pack(file_path):
+    with open(file_path, "rb") as f:
+        return decode_pack(f.read())
+
+# ==========================================
+# 命令行：转换 / 校验 / 基准测试
+# ==========================================
+
+def _best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def benchmark(json_path, repeat):
+    with open(json_path, "rb") as f:
+        raw_json = f.read()
+    events = json.loads(raw_json)
+    packed = encode_pack(events)
+    if decode_pack(packed) != events:
+        raise SystemExit("❌ 往返校验失败")
+
+    json_time = _best_of(lambda: json.loads(raw_json), repeat)
+    pack_time = _best_of(lambda: decode_pack(packed), repeat)
+
+    print(f"📊 {json_path}: {len(events)} 个事件")
+    print(f"   {'格式':<8}{'字节':>14}{'解码耗时':>14}")
+    print(f"   {'json':<8}{len(raw_json):>14,}{json_time * 1000:>12.2f}ms")
+    print(f"   {'pack':<8}{len(packed):>14,}{pack_time * 1000:>12.2f}ms")
+    print(f"   体积 {len(packed) / len(raw_json):.1%}，解码耗时 {pack_time / json_time:.1%}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="事件包编码 / 解码 / 基准测试")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    encode_cmd = sub.add_parser("encode", help="JSON -> pack")
+    encode_cmd.add_argument("json_path")
+    encode_cmd.add_argument("pack_path", nargs="?")
+
+    decode_cmd = sub.add_parser("decode", help="pack -> JSON (与 json.dump indent=2 格式一致)")
+    decode_cmd.add_argument("pack_path")
+    decode_cmd.add_argument("json_path")
+
+    bench_cmd = sub.add_parser("bench", help="与 JSON 对比体积和解码耗时")
+    bench_cmd.add_argument("json_path")
+    bench_cmd.add_argument("--repeat", type=int, default=5)
+
+    args = parser.parse_args(argv)
+    if args.command == "encode":
+        with open(args.json_path, encoding="utf-8") as f:
+            events = json.load(f)
+        pack_path = args.pack_path or os.path.splitext(args.json_path)[0] + ".pack"
+        size = write_pack(events, pack_path)
+        print(f"✅ {len(events)} 个事件 -> {pack_path} ({size:,} 字节)")
+    elif args.command == "decode":
+        events = read_pack(args.pack_path)
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(events, f, ensure_ascii=False, indent=2)
+        print(f"✅ {len(events)} 个事件 -> {args.json_path}")
+    else:
+        benchmark(args.json_path, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import argparse
+
+import numpy as np
+
+import generate_events12 as g
+
+# ==========================================
+# Swift 数值公式移植 (GameConstants / GameLevelManager / GameManager)
+# ==========================================
+# 与 PalmSky Watch App 里的实现逐项对应，供数值模拟工具共用。
+# 公式函数的 level / reincarnation 既可以是 int 也可以是 NumPy 数组，
+# 传数组时按元素计算 (模拟器里一次算完所有玩家)。
+
+# GameConstants
+BASE_GAIN = 10.0
+AUTO_GAIN_RATIO = 0.5
+STAGE_POWER = 1.6
+FLOOR_STEP_RATIO = 0.05
+BREAK_COST_BASE = 100.0
+BREAK_COST_FACTOR = 1.18
+BREAK_SUCCESS_LOWER = 0.6
+BREAK_SUCCESS_DECAY_PER_LEVEL = 0.0023
+EVENT_CHECK_INTERVAL_SECONDS = 10.0
+EVENT_PROB_BASE = 0.08
+EVENT_PROB_MAX = 0.10
+MAX_LEVEL = 144
+LEVELS_PER_STAGE = 9
+STAGE_COUNT = len(g.STAGES)
+
+# GameManager.attemptBreak / finalizeMiniGame
+PITY_FAILURES = 3              # 连续失败 3 次后下一次小层突破必定成功
+DEBUFF_MIN_LEVEL = 90          # 突破失败且无护身符时，90 级起附加「道心不稳」
+DEBUFF_MULTIPLIER = 0.7
+DEBUFF_SECONDS = 3600.0
+
+# GameManager.applyEventEffect
+GAMBLE_WIN_RATE = 0.5
+GAMBLE_WIN_FACTOR = 1.5        # gamble 赢：+ value * 1.5
+GAMBLE_LOSE_FACTOR = 0.5       # gamble 输：- value * 0.5
+GAMBLE_TAP_LOSE_BONUS = -0.5   # gamble_tap 输：点击收益减半
+GAMBLE_AUTO_LOSE_MULTIPLIER = 0.5  # gamble_auto 输：debuff 0.5
+
+# SkyConstants
+FREE_MAX_LEVEL = 10
+FREE_OFFLINE_LIMIT_SECONDS = 2 * 3600.0
+PRO_OFFLINE_LIMIT_SECONDS = 12 * 3600.0
+
+# GameManager.calculateOfflineGain / WatchHealthManager.sleepBonusMultiplier
+OFFLINE_MIN_SECONDS = 300.0    # 离线不足 5 分钟不结算
+OFFLINE_DISCOUNT = 0.8
+SLEEP_BONUS_TIERS = [(7.5, 1.25), (6.5, 1.15), (5.5, 1.08)]  # (昨夜睡眠小时下限, 倍率)
+
+def stage_of(level):
+    """(level - 1) / 9，0 ~ 15"""
+    return (level - 1) // LEVELS_PER_STAGE
+
+def floor_of(level):
+    """段位内的层数 1 ~ 9"""
+    return (level - 1) % LEVELS_PER_STAGE + 1
+
+def is_major(level):
+    """GameManager.isMajorBreakthrough：level % 9 == 0 走渡劫小游戏，没有保底"""
+    return level % LEVELS_PER_STAGE == 0
+
+def tap_gain(level, reincarnation=0):
+    """GameLevelManager.tapGain"""
+    stage_multiplier = np.power(STAGE_POWER, stage_of(level))
+    floor_multiplier = 1.0 + FLOOR_STEP_RATIO * (floor_of(level) - 1.0)
+    return BASE_GAIN * stage_multiplier * floor_multiplier * (1.0 + reincarnation * 0.2)
+
+def auto_gain(level, reincarnation=0):
+    """GameLevelManager.autoGain：每秒自动收益"""
+    return tap_gain(level, reincarnation) * AUTO_GAIN_RATIO
+
+def break_cost(level):
+    """GameLevelManager.breakCost"""
+    return BREAK_COST_BASE * np.power(BREAK_COST_FACTOR, level)
+
+def break_success(level):
+    """GameLevelManager.breakSuccess"""
+    return np.maximum(BREAK_SUCCESS_LOWER, 0.95 - level * BREAK_SUCCESS_DECAY_PER_LEVEL)
+
+def break_fail_penalty(level):
+    """GameLevelManager.breakFailPenalty：失败扣除的灵气比例，成功率越低惩罚越轻"""
+    raw_penalty = np.minimum(0.10 + level / MAX_LEVEL * 0.20, 0.35)
+    soften_factor = 1.0 - 0.3 * (1.0 - break_success(level))
+    return raw_penalty * soften_factor
+
+def event_probability(level, reincarnation=0):
+    """GameLevelManager.getEventProbability：每 10 秒一次检测的触发概率"""
+    prob = EVENT_PROB_BASE + (EVENT_PROB_MAX - EVENT_PROB_BASE) * np.sqrt(level / MAX_LEVEL)
+    prob = prob + stage_of(level) * 0.001
+    prob = prob + np.sqrt(reincarnation) * 0.005
+    return np.minimum(prob, 0.15)
+
+def sleep_bonus_multiplier(hours):
+    """WatchHealthManager.sleepBonusMultiplier：昨夜睡眠时长 -> 当天首次离线结算的倍率"""
+    multiplier = np.ones_like(np.asarray(hours, dtype=float))
+    for lower, bonus in reversed(SLEEP_BONUS_TIERS):
+        multiplier = np.where(np.asarray(hours) >= lower, bonus, multiplier)
+    return multiplier
+
+def offline_gain(level, seconds, limit_seconds, sleep_multiplier=1.0, reincarnation=0):
+    """
+    GameManager.calculateOfflineGain：返回 (到账灵气, 被上限截掉的灵气)。
+    不足 5 分钟两者都是 0；满级不再结算。截掉的部分按同样的折扣和睡眠倍率计。
+    """
+    settled = (seconds >= OFFLINE_MIN_SECONDS) & (level < MAX_LEVEL)
+    rate = np.where(settled, auto_gain(level, reincarnation) * OFFLINE_DISCOUNT * sleep_multiplier, 0.0)
+    effective = np.minimum(seconds, limit_seconds)
+    return rate * effective, rate * (seconds - effective)
+
+class LevelTables:
+    """
+    1 ~ 144 级的公式取值，按等级下标查表 (下标 0 不用)。
+    模拟器里玩家等级是整数数组，查表比每步重算 pow / sqrt 快。
+    """
+
+    def __init__(self, reincarnation=0):
+        self.reincarnation = reincarnation
+        levels = np.arange(MAX_LEVEL + 1)
+        levels[0] = 1
+        self.tap_gain = tap_gain(levels, reincarnation)
+        self.auto_gain = auto_gain(levels, reincarnation)
+        self.break_cost = break_cost(levels)
+        self.break_success = break_success(levels)
+        self.break_fail_penalty = break_fail_penalty(levels)
+        self.event_probability = event_probability(levels, reincarnation)
+        self.is_major = is_major(levels)
+        self.stage = stage_of(levels)
+
+def print_table(tables, step=LEVELS_PER_STAGE):
+    print(f"{'等级':<6}{'段位':<8}{'点击':>12}{'自动/秒':>12}{'突破消耗':>20}{'成功率':>8}{'失败惩罚':>10}{'事件率':>8}")
+    for level in range(1, MAX_LEVEL + 1):
+        if level != 1 and level % step and level != MAX_LEVEL:
+            continue
+        major = "*" if tables.is_major[level] else " "
+        print(f"{level:<5}{major}{g.STAGES[tables.stage[level]]:<8}{tables.tap_gain[level]:>12,.1f}"
+              f"{tables.auto_gain[level]:>12,.1f}{tables.break_cost[level]:>20,.0f}"
+              f"{tables.break_success[level]:>8.1%}{tables.break_fail_penalty[level]:>10.1%}"
+              f"{tables.event_probability[level]:>8.2%}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="打印 Swift 数值公式在各等级的取值 (* 为渡劫大境界)")
+    parser.add_argument("--reincarnation", type=int, default=0)
+    parser.add_argument("--step", type=int, default=LEVELS_PER_STAGE, help="每隔多少级打印一行，1 为全部")
+    args = parser.parse_args(argv)
+    print_table(LevelTables(args.reincarnation), args.step)
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,17 @@
+import argparse
 import json
 import random
-import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from lexicon_sampler import UniqueComboSampler, derive_key
+from qi_curve import QiRewardCurve
 
 # ==========================================
 # 1. 基础配置
 # ==========================================
 TOTAL_EVENTS = 2000
+DEFAULT_OUTPUT = "events_four_char.json"
 
 STAGES = [
     "筑基", "开光", "胎息", "辟谷",
@@ -184,82 +190,115 @@ EVENT_TEMPLATES = [
 # 5. 核心逻辑函数
 # ==========================================
 
-def get_title_and_action_a(stage_idx):
+def get_title_and_action_a(stage_idx, rng=random):
     """生成标题、描述主体、和选项A"""
     if stage_idx <= 3:
-        item = random.choice(DATA_LOW)
-        prefix = random.choice(PREFIX_LOW)
+        item = rng.choice(DATA_LOW)
+        prefix = rng.choice(PREFIX_LOW)
         title = f"{prefix}{item['sub']}"
         desc = f"偶遇{title}。"
-        act_a = random.choice(item['acts'])
+        act_a = rng.choice(item['acts'])
     elif stage_idx <= 9:
-        item = random.choice(DATA_MID)
-        prefix = random.choice(PREFIX_MID)
+        item = rng.choice(DATA_MID)
+        prefix = rng.choice(PREFIX_MID)
         title = f"{prefix}{item['sub']}"
         desc = f"发现{title}。"
-        act_a = random.choice(item['acts'])
+        act_a = rng.choice(item['acts'])
     else:
-        item = random.choice(DATA_HIGH)
-        prefix = random.choice(PREFIX_HIGH)
+        item = rng.choice(DATA_HIGH)
+        prefix = rng.choice(PREFIX_HIGH)
         title = f"{prefix}{item['sub']}"
         desc = f"触碰{title}。"
-        act_a = random.choice(item['acts'])
+        act_a = rng.choice(item['acts'])
     
     return title, desc, act_a
 
-def get_action_b_text(logic_type, stage_idx):
-    """根据 B 的逻辑选择正确的文案"""
-    
+def get_level_key(stage_idx):
+    """段位档次：low / mid / high"""
     if stage_idx <= 3:
-        level_key = "low"
+        return "low"
     elif stage_idx <= 9:
-        level_key = "mid"
+        return "mid"
     else:
-        level_key = "high"
-    
+        return "high"
+
+def get_action_b_pool(logic_type, level_key):
+    """B 逻辑对应的词库，没有专用词库时返回 None"""
     if logic_type == "nothing":
-        return random.choice(ACTION_B_LEAVE[level_key])
+        return ACTION_B_LEAVE[level_key]
         
     if logic_type in ["gain_auto_safe", "gain_tap_safe"]:
-        return random.choice(ACTION_B_SAFE[level_key])
+        return ACTION_B_SAFE[level_key]
         
     if logic_type == "gamble_qi":
-        return random.choice(ACTION_B_FIGHT[level_key])
+        return ACTION_B_FIGHT[level_key]
         
-    return "尝试一下"
+    return None
 
-def calculate_qi_gain(stage_idx):
-    """计算灵气收益"""
-    if stage_idx <= 3:
-        base = 120
-        growth = 1.6
-    elif stage_idx <= 9:
-        base = 500
-        growth = 1.9
-    else:
-        base = 8000
-        growth = 2.4
-    
-    val = base * math.pow(growth, stage_idx)
+def get_action_b_text(logic_type, stage_idx, rng=random):
+    """根据 B 的逻辑选择正确的文案"""
+    pool = get_action_b_pool(logic_type, get_level_key(stage_idx))
+    if pool is None:
+        return "尝试一下"
+    return rng.choice(pool)
+
+class UniqueStageText:
+    """
+    --unique 模式：按 (前缀 × 主语 × 选项A × 选项B) 不放回抽样，
+    同一档次的各段位交错使用同一个置换，互不重叠。
+    """
     
-    # 中期（分神 ~ 大乘 ~ 渡劫前）原先推进感偏弱，
-    # 这里补一段中期系数，让事件奖励不至于在 60~90 级明显失去存在感。
-    if 7 <= stage_idx <= 9:
-        mid_game_bonus = math.pow(2.2, stage_idx - 6)
-        val *= mid_game_bonus
+    TIER_STAGES = {"low": range(0, 4), "mid": range(4, 10), "high": range(10, 16)}
+    TIER_DATA = {
+        "low": (DATA_LOW, PREFIX_LOW, "偶遇{}。"),
+        "mid": (DATA_MID, PREFIX_MID, "发现{}。"),
+        "high": (DATA_HIGH, PREFIX_HIGH, "触碰{}。"),
+    }
     
-    # 大后期（天仙以后）突破成本增长很快，
-    # 这里额外补一层递增系数，保证奇遇直接给的灵气在高境界仍有体感，
-    # 但又不会高到喧宾夺主，目标大致维持在突破需求的 1% 左右。
-    if stage_idx >= 12:
-        late_game_bonus = math.pow(1.8, stage_idx - 12)
-        val *= late_game_bonus
-
-    final_val = int(val * random.uniform(0.8, 1.2))
+    def __init__(self, stage_idx, seed):
+        self.level_key = get_level_key(stage_idx)
+        self.seed = seed
+        tier_stages = self.TIER_STAGES[self.level_key]
+        self.stride = len(tier_stages)
+        self.phase = stage_idx - tier_stages.start
+        self.samplers = {}
     
-    if final_val > 10000:
-        return (final_val // 100) * 100
-    return (final_val // 10) * 10
+    def draw(self, logic_b):
+        """返回 title, desc, 选项A, 选项B"""
+        pool = get_action_b_pool(logic_b, self.level_key) or ["尝试一下"]
+        pool_key = tuple(pool)
+        sampler = self.samplers.get(pool_key)
+        if sampler is None:
+            data, prefixes, _ = self.TIER_DATA[self.level_key]
+            key = derive_key(self.seed, self.level_key, *pool)
+            sampler = UniqueComboSampler(data, prefixes, pool, key, self.stride, self.phase)
+            self.samplers[pool_key] = sampler
+        item, prefix, act_a, act_b = sampler.draw()
+        title = f"{prefix}{item['sub']}"
+        return title, self.TIER_DATA[self.level_key][2].format(title), act_a, act_b
+
+# 灵气奖励曲线：16 个段位的基准值在这里一次性算好，其他工具直接引用 QI_CURVE
+QI_CURVE = QiRewardCurve(
+    tiers=[
+        (3, 120, 1.6),
+        (9, 500, 1.9),
+        (15, 8000, 2.4),
+    ],
+    bonuses=[
+        # 中期（分神 ~ 大乘 ~ 渡劫前）原先推进感偏弱，
+        # 这里补一段中期系数，让事件奖励不至于在 60~90 级明显失去存在感。
+        (7, 9, 2.2, 6),
+        # 大后期（天仙以后）突破成本增长很快，
+        # 这里额外补一层递增系数，保证奇遇直接给的灵气在高境界仍有体感，
+        # 但又不会高到喧宾夺主，目标大致维持在突破需求的 1% 左右。
+        (12, 15, 1.8, 12),
+    ],
+    jitter=(0.8, 1.2),
+)
+
+def calculate_qi_gain(stage_idx, rng=random):
+    """计算灵气收益"""
+    return QI_CURVE.sample(stage_idx, rng)
 
 def build_effect(logic_type, qi_base, stage_idx):
     """构建效果"""
@@ -318,82 +357,361 @@ def get_weights_by_stage(stage_idx):
         # 因此将 item_reward 从原来的 25 大幅下调到 8。
         return [30, 32, 20, 8, 10]
 
+def get_count_by_stage(stage_idx):
+    """每个段位生成的事件数量 (默认合计 TOTAL_EVENTS)"""
+    if stage_idx <= 3:
+        return 50
+    elif stage_idx <= 7:
+        return 100
+    elif stage_idx <= 11:
+        return 150
+    else:
+        return 200
+
+STAGE_COUNTS = [get_count_by_stage(i) for i in range(16)]
+
+def scale_counts(total):
+    """按默认段位比例把总量分摊到 16 个段位 (用于压力测试大池子)"""
+    default_total = sum(STAGE_COUNTS)
+    counts = [total * c // default_total for c in STAGE_COUNTS]
+    # 余数按小数部分从大到小补齐，保证总量精确
+    order = sorted(range(16), key=lambda i: (-(total * STAGE_COUNTS[i] % default_total), i))
+    for i in order[:total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
 # ==========================================
 # 6. 主生成循环
 # ==========================================
 
-events = []
-global_id_counter = 1
-
-print("🔥 开始生成修仙事件 (四字短语版)...")
-print("📚 特性：古韵十足、四字短语、意蕴深远\n")
+def pick_template(stage_idx, rng=random, weights=None):
+    """按段位权重抽模板，返回 (A 逻辑, B 逻辑, 描述后缀)；weights 为空时用 get_weights_by_stage"""
+    weights = weights or get_weights_by_stage(stage_idx)
+    template = rng.choices(EVENT_TEMPLATES, weights=weights, k=1)[0]
+    
+    logic_a = template["choice_a_logic"]
+    logic_b = template["choice_b_logic"]
+    suffix = template["desc_suffix"]
+    
+    if template["type"] == "buff_gamble":
+        if rng.random() < 0.5:
+            logic_a = "gamble_buff_tap"
+            logic_b = "gain_tap_safe"
+            suffix = " 心血来潮！"
+    return logic_a, logic_b, suffix
 
-for stage_idx in range(16):
-    if stage_idx <= 3:
-        count = 50
-    elif stage_idx <= 7:
-        count = 100
-    elif stage_idx <= 11:
-        count = 150
-    else:
-        count = 200
-        
-    current_stage_name = STAGES[stage_idx]
+def event_fields(stage_idx, rng=random, unique_text=None):
+    """
+    一个事件除编号外的内容：(title, desc, A 文案, A 效果, B 文案, B 效果)。
+    传入 unique_text 时文案走不放回抽样。
+    各阶段 (模板 / 文案 / 灵气 / 效果) 都是独立函数，--profile 会分别计时。
+    """
+    logic_a, logic_b, suffix = pick_template(stage_idx, rng)
     
-    for _ in range(count):
-        weights = get_weights_by_stage(stage_idx)
-        template = random.choices(EVENT_TEMPLATES, weights=weights, k=1)[0]
-        
-        logic_a = template["choice_a_logic"]
-        logic_b = template["choice_b_logic"]
-        suffix = template["desc_suffix"]
-        
-        if template["type"] == "buff_gamble":
-            if random.random() < 0.5:
-                logic_a = "gamble_buff_tap"
-                logic_b = "gain_tap_safe"
-                suffix = " 心血来潮！"
-        
-        title, desc_base, btn_a_raw = get_title_and_action_a(stage_idx)
+    if unique_text is None:
+        title, desc_base, btn_a_raw = get_title_and_action_a(stage_idx, rng)
         full_desc = desc_base + suffix
-        qi_val = calculate_qi_gain(stage_idx)
-        
-        btn_b_raw = get_action_b_text(logic_b, stage_idx)
-        
-        effect_a = build_effect(logic_a, qi_val, stage_idx)
-        effect_b = build_effect(logic_b, qi_val, stage_idx)
-        
-        btn_a_final = polish_choice_text(btn_a_raw, logic_a)
-        btn_b_final = polish_choice_text(btn_b_raw, logic_b)
+        qi_val = calculate_qi_gain(stage_idx, rng)
         
-        event = {
-            "id": f"evt_4char_{global_id_counter:05d}",
-            "title": title,
-            "desc": full_desc,
-            "rarity": "epic" if stage_idx >= 10 else ("rare" if stage_idx >= 5 else "common"),
-            "minStage":  STAGES[stage_idx],
-            "maxStage": STAGES[min(stage_idx + 2, 15)],
-            "choices": [
-                { "id": "a", "text": btn_a_final, "effect": effect_a },
-                { "id": "b", "text": btn_b_final, "effect": effect_b }
-            ]
-        }
-        
-        events.append(event)
-        global_id_counter += 1
+        btn_b_raw = get_action_b_text(logic_b, stage_idx, rng)
+    else:
+        title, desc_base, btn_a_raw, btn_b_raw = unique_text.draw(logic_b)
+        full_desc = desc_base + suffix
+        qi_val = calculate_qi_gain(stage_idx, rng)
+    
+    effect_a = build_effect(logic_a, qi_val, stage_idx)
+    effect_b = build_effect(logic_b, qi_val, stage_idx)
+    
+    btn_a_final = polish_choice_text(btn_a_raw, logic_a)
+    btn_b_final = polish_choice_text(btn_b_raw, logic_b)
+    
+    return title, full_desc, btn_a_final, effect_a, btn_b_final, effect_b
+
+def event_id(event_number):
+    return f"evt_4char_{event_number:05d}"
+
+def stage_rarity(stage_idx):
+    return "epic" if stage_idx >= 10 else ("rare" if stage_idx >= 5 else "common")
+
+def build_event(stage_idx, event_number, rng=random, unique_text=None):
+    """生成单个事件 dict"""
+    title, full_desc, btn_a_final, effect_a, btn_b_final, effect_b = event_fields(stage_idx, rng, unique_text)
+    
+    return {
+        "id": event_id(event_number),
+        "title": title,
+        "desc": full_desc,
+        "rarity": stage_rarity(stage_idx),
+        "minStage":  STAGES[stage_idx],
+        "maxStage": STAGES[min(stage_idx + 2, 15)],
+        "choices": [
+            { "id": "a", "text": btn_a_final, "effect": effect_a },
+            { "id": "b", "text": btn_b_final, "effect": effect_b }
+        ]
+    }
+
+def stage_rng(seed, stage_idx):
+    """每个段位独立的随机流：只由 seed 和 stage_idx 决定，与其他段位、进程数无关"""
+    return random.Random(f"{seed}:{stage_idx}")
+
+def generate_stage(stage_idx, count, seed, start_number=1, unique=False):
+    """生成单个段位的事件分片，编号从 start_number 开始连续"""
+    rng = stage_rng(seed, stage_idx)
+    unique_text = UniqueStageText(stage_idx, seed) if unique else None
+    for offset in range(count):
+        yield build_event(stage_idx, start_number + offset, rng, unique_text)
+
+def stage_tasks(stages, counts, seed, unique=False):
+    """把段位列表拆成 (stage_idx, count, seed, start_number, unique) 任务，编号按段位顺序连续"""
+    tasks = []
+    start_number = 1
+    for stage_idx in stages:
+        tasks.append((stage_idx, counts[stage_idx], seed, start_number, unique))
+        start_number += counts[stage_idx]
+    return tasks
+
+def generate(stages=range(16), counts=STAGE_COUNTS, seed=None, unique=False):
+    """
+    惰性生成事件：逐个 yield，不在内存里攒整个列表。
+    counts 按 stage_idx 索引；同一个 seed 得到同样的事件序列。
+    unique=True 时每个档次的文案组合不放回抽样，不会重复。
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
     
-    print(" ✓")
-
-file_path = "events_four_char.json"
-with open(file_path, 'w', encoding='utf-8') as f:
-    json.dump(events, f, ensure_ascii=False, indent=2)
-
-print(f"\n✅ [四字短语版] 生成完毕！")
-print(f"📊 总计生成 {len(events)} 个修仙事件")
-print(f"📁 已保存至:  {file_path}")
-print(f"\n🎯 核心特点：")
-print(f"   ✨ 所有动作均为四字短语或对仗格式")
-print(f"   ✨ 古韵十足，符合修仙小说气质")
-print(f"   ✨ B选项有14种选择，全为四字短语")
-print(f"   ✨ 文案简洁有力，朗朗上口")
-print(f"   ✨ 段位差异明显，层次递进感强")
+    for task in stage_tasks(stages, counts, seed, unique):
+        yield from generate_stage(*task)
+
+# ==========================================
+# 7. 流式写入
+# ==========================================
+
+def encode_event(event):
+    """编码单个事件，缩进与 json.dump(events, indent=2) 中的数组元素一致"""
+    return json.dumps(event, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+
+def write_json_chunks(chunks, file_path):
+    """
+    写入 JSON 数组。每个 chunk 是一个或多个已编码事件 (以 ",\\n  " 相连)，
+    空 chunk 跳过，返回写入的 chunk 数。
+    """
+    count = 0
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write("[")
+        for chunk in chunks:
+            if not chunk:
+                continue
+            f.write(",\n  " if count else "\n  ")
+            f.write(chunk)
+            count += 1
+        f.write("\n]" if count else "]")
+    return count
+
+def write_events_stream(events, file_path):
+    """边生成边写入，输出与 json.dump(..., indent=2) 字节一致，返回写入数量"""
+    return write_json_chunks((encode_event(event) for event in events), file_path)
+
+def encode_stage_shard(task):
+    """在子进程里生成并编码一个段位分片"""
+    return ",\n  ".join(encode_event(event) for event in generate_stage(*task))
+
+def write_events_parallel(stages, counts, seed, file_path, jobs, unique=False):
+    """
+    多进程按段位分片生成，再按段位顺序拼接。
+    每个段位有独立随机流，因此输出与单进程 generate() 字节一致。
+    """
+    tasks = stage_tasks(stages, counts, seed, unique)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        write_json_chunks(pool.map(encode_stage_shard, tasks), file_path)
+    return sum(task[1] for task in tasks)
+
+# 输出格式：pretty 为默认的 indent=2 数组，其余格式见各自模块
+OUTPUT_FORMATS = ["pretty", "minified", "interned", "zlib", "zlib-dict"]
+
+def write_output(events, file_path, fmt="pretty"):
+    """按格式写出事件，返回写入数量"""
+    if fmt == "interned":
+        from interned_json import write_interned
+        return write_interned(events, file_path)
+    if fmt == "minified":
+        from compressed_output import write_minified
+        return write_minified(events, file_path)
+    if fmt in ("zlib", "zlib-dict"):
+        from compressed_output import write_zlib
+        return write_zlib(events, file_path, use_zdict=fmt == "zlib-dict")
+    return write_events_stream(events, file_path)
+
+def read_output(file_path, fmt="pretty"):
+    """读回 write_output 写出的文件，得到旧版事件数组"""
+    if fmt == "interned":
+        from interned_json import load_interned
+        return load_interned(file_path)
+    if fmt in ("zlib", "zlib-dict"):
+        from compressed_output import read_zlib
+        return read_zlib(file_path, use_zdict=fmt == "zlib-dict")
+    with open(file_path, encoding='utf-8') as f:
+        return json.load(f)
+
+# pretty / minified 是普通 JSON 数组，可以用 validate_events.EventStream 逐个读回
+STREAMING_FORMATS = ("pretty", "minified")
+
+def iter_output(file_path, fmt="pretty"):
+    """逐个读回 write_output 写出的事件；pretty / minified 内存与池子大小无关，其余格式整体解码"""
+    if fmt not in STREAMING_FORMATS:
+        yield from read_output(file_path, fmt)
+        return
+    from validate_events import EventStream
+    with open(file_path, "rb") as handle:
+        for _, event in EventStream(handle):
+            yield event
+
+def tee_events(events, sinks):
+    """事件原样往下游产出，同时交给每个 sink.add (边生成边写分片 / 索引)"""
+    for event in events:
+        for sink in sinks:
+            sink.add(event)
+        yield event
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成修仙事件池 (四字短语版)")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="输出文件路径")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子，固定后输出可复现")
+    parser.add_argument("--total", type=int, default=None, help="按默认段位比例缩放事件总量 (压力测试)")
+    parser.add_argument("--jobs", type=int, default=1, help="并行进程数，按段位分片生成")
+    parser.add_argument("--engine", choices=["python", "numpy", "slots"], default="python",
+                        help="numpy: 按段位批量抽样 (需要 NumPy，分布一致但随机流不同；只有抽样快几十倍，"
+                             "pretty 格式直接从数组拼文本约快 8 倍，其他格式要先物化 dict，加速有限)；"
+                             "slots: __slots__ 事件模型 + 直接编码 (输出一致，见 event_model.py)")
+    parser.add_argument("--unique", action="store_true", help="文案组合不放回抽样，池子里不出现重复组合")
+    parser.add_argument("--pack", metavar="PATH", default=None, help="同时输出二进制事件包 (见 event_pack.py)")
+    parser.add_argument("--shards", metavar="DIR", default=None,
+                        help="同时按段位输出分片 + manifest (见 stage_shards.py)")
+    parser.add_argument("--index", metavar="PATH", nargs="?", const="", default=None,
+                        help="同时输出段位可选事件索引 (默认 <输出>.index.json，见 stage_index.py)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="pretty", help="输出格式")
+    parser.add_argument("--cache", metavar="DIR", nargs="?", const=".event_cache", default=None,
+                        help="按段位缓存分片，只重算输入变化的段位；不给 --seed 时沿用上次的种子 (见 stage_cache.py)")
+    parser.add_argument("--profile", action="store_true", help="分阶段计时并打印耗时分解 (见 phase_profiler.py)")
+    parser.add_argument("--profile-out", metavar="PATH", default=None, help="同时用 cProfile 采样，pstats 写到 PATH")
+    parser.add_argument("--validate", action="store_true",
+                        help="写完后按 Swift 端的解码规则校验输出 (见 validate_events.py)")
+    args = parser.parse_args(argv)
+    if args.jobs > 1 and args.format != "pretty":
+        parser.error("--jobs 目前只支持 pretty 格式")
+    if args.cache and (args.format != "pretty" or args.engine != "python"):
+        parser.error("--cache 目前只支持 python 引擎的 pretty 格式")
+    if (args.profile or args.profile_out) and (args.jobs > 1 or args.engine != "python"):
+        parser.error("--profile 只支持单进程 python 引擎")
+    if args.engine == "numpy" and args.jobs > 1:
+        parser.error("--engine numpy 已按段位批量抽样，不需要 --jobs")
+    if args.engine == "slots" and (args.jobs > 1 or args.format != "pretty"):
+        parser.error("--engine slots 目前只支持单进程 pretty 格式")
+    if args.validate and args.format not in ("pretty", "minified"):
+        parser.error("--validate 只支持 pretty / minified 格式")
+    if args.engine == "numpy" and args.unique:
+        parser.error("--unique 目前只支持 python 引擎")
+    
+    counts = scale_counts(args.total) if args.total is not None else STAGE_COUNTS
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    if args.cache:
+        # 种子是段位指纹的一部分，不给 --seed 时沿用上次的，否则缓存永远不会命中
+        from stage_cache import load_seed, save_seed
+        if args.seed is None:
+            seed = load_seed(args.cache, seed)
+        save_seed(args.cache, seed)
+    
+    print("🔥 开始生成修仙事件 (四字短语版)...")
+    print("📚 特性：古韵十足、四字短语、意蕴深远")
+    print(f"🎲 随机种子: {seed}\n")
+    
+    file_path = args.output
+    profiler = None
+    if args.profile or args.profile_out:
+        from phase_profiler import GenerationProfiler
+        module = sys.modules[__name__]
+        if args.cache:
+            # stage_cache 走的是 import 进来的 generate_events12，不是直接运行的 __main__
+            import stage_cache
+            module = stage_cache.g
+        profiler = GenerationProfiler(module, phases=args.profile, pstats_path=args.profile_out)
+        profiler.start()
+    # 不能流式读回的格式，分片 / 索引在生成时顺带写出，避免写完再整体解码
+    sinks = {}
+    if args.shards and args.format not in STREAMING_FORMATS:
+        from stage_shards import ShardSet
+        sinks["shards"] = ShardSet(args.shards)
+    if args.index is not None and args.format not in STREAMING_FORMATS:
+        from stage_index import IndexBuilder
+        sinks["index"] = IndexBuilder()
+    try:
+        if args.cache:
+            from stage_cache import write_events_cached
+            total, rebuilt = write_events_cached(
+                range(16), counts, seed, file_path, args.cache, args.jobs, args.unique
+            )
+            print(f"♻️  重算段位: {', '.join(STAGES[i] for i in rebuilt) if rebuilt else '无 (全部命中缓存)'}")
+        elif args.jobs > 1:
+            total = write_events_parallel(range(16), counts, seed, file_path, args.jobs, args.unique)
+        elif args.engine == "slots":
+            import event_model
+            events = event_model.generate(counts=counts, seed=seed, unique=args.unique)
+            total = event_model.write_events(events, file_path)
+        elif args.engine == "numpy":
+            if args.format == "pretty":
+                from event_batch_engine import write_batched
+                total = write_batched(file_path, counts=counts, seed=seed)
+            else:
+                from event_batch_engine import generate_batched
+                events = generate_batched(counts=counts, seed=seed)
+                total = write_output(tee_events(events, sinks.values()), file_path, args.format)
+        else:
+            events = generate(counts=counts, seed=seed, unique=args.unique)
+            total = write_output(tee_events(events, sinks.values()), file_path, args.format)
+    except LookupError as error:
+        parser.exit(1, f"❌ {error}\n")
+    if profiler:
+        profiler.stop(total)
+    
+    if args.validate:
+        from validate_events import validate_file
+        checked, problems = validate_file(file_path, max_errors=20, jobs=args.jobs)
+        for offset, event_id, message in problems:
+            print(f"   字节 {offset} [{event_id}]: {message}" if offset is not None else f"   {message}")
+        if problems:
+            parser.exit(1, f"❌ 校验失败: {file_path}\n")
+        print(f"🔍 校验通过: {checked} 个事件")
+    
+    if args.pack:
+        from event_pack import write_pack
+        pack_size = write_pack(read_output(file_path, args.format), args.pack)
+        print(f"📦 二进制事件包: {args.pack} ({pack_size:,} 字节)")
+    
+    if args.shards:
+        if "shards" in sinks:
+            manifest = sinks["shards"].close()
+        else:
+            from stage_shards import write_shards
+            manifest = write_shards(iter_output(file_path, args.format), args.shards)
+        print(f"🗂️  段位分片: {args.shards} ({len(manifest['shards'])} 个分片)")
+    
+    if args.index is not None:
+        from stage_index import index_path_for, save_index, write_index
+        index_path = args.index or index_path_for(file_path)
+        if "index" in sinks:
+            save_index(sinks["index"].index(), index_path)
+        else:
+            write_index(iter_output(file_path, args.format), index_path)
+        print(f"🧭 段位索引: {index_path}")
+    
+    print(f"\n✅ [四字短语版] 生成完毕！")
+    print(f"📊 总计生成 {total} 个修仙事件")
+    print(f"📁 已保存至:  {file_path}")
+    print(f"\n🎯 核心特点：")
+    print(f"   ✨ 所有动作均为四字短语或对仗格式")
+    print(f"   ✨ 古韵十足，符合修仙小说气质")
+    print(f"   ✨ B选项有14种选择，全为四字短语")
+    print(f"   ✨ 文案简洁有力，朗朗上口")
+    print(f"   ✨ 段位差异明显，层次递进感强")
+
+if __name__ == "__main__":
+    main()
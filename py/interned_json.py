@@ -0,0 +1,171 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import generate_events12 as g
+
+# ==========================================
+# 字符串驻留 JSON (--format interned)
+# ==========================================
+# {"format": "palmsky-interned", "version": 1, "events": [...], "strings": [...]}
+#
+# 每个事件是一行定长数组，字符串字段都换成 strings 里的下标：
+#   [id, title, desc, rarity, minStage, maxStage, [choice, ...]]
+#   choice = [id, text, [type, value?, duration?]]
+# 可选字段：null 表示值为 null，ABSENT (-1) 表示 JSON 里没有这个字段。
+# effect 数组末尾缺省的 value / duration 表示字段不存在。
+# strings 放在最后，这样编码时可以边生成边写，不用先收集全部字符串。
+
+FORMAT_NAME = "palmsky-interned"
+VERSION = 1
+ABSENT = -1
+
+OPTIONAL_EVENT_KEYS = ["rarity", "minStage", "maxStage"]
+
+class StringTable:
+    def __init__(self):
+        self.index = {}
+
+    def __call__(self, text):
+        if text is None:
+            return None
+        idx = self.index.get(text)
+        if idx is None:
+            idx = self.index[text] = len(self.index)
+        return idx
+
+    def strings(self):
+        return list(self.index)
+
+def _effect_row(effect, intern):
+    row = [intern(effect["type"])]
+    if "value" in effect:
+        row.append(effect["value"])
+    if "duration" in effect:
+        if "value" not in effect:
+            raise ValueError("interned 格式不支持只有 duration 没有 value 的效果")
+        row.append(effect["duration"])
+    return row
+
+def event_row(event, intern):
+    """事件 dict -> 驻留后的定长数组"""
+    row = [intern(event["id"]), intern(event["title"]), intern(event["desc"])]
+    for key in OPTIONAL_EVENT_KEYS:
+        row.append(intern(event[key]) if key in event else ABSENT)
+    row.append([
+        [intern(choice["id"]), intern(choice["text"]), _effect_row(choice["effect"], intern)]
+        for choice in event["choices"]
+    ])
+    return row
+
+def write_interned(events, file_path):
+    """流式写入 interned 格式，返回写入的事件数"""
+    intern = StringTable()
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    count = 0
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(f'{{"format":"{FORMAT_NAME}","version":{VERSION},"events":[')
+        for event in events:
+            f.write(",\n" if count else "\n")
+            f.write(dumps(event_row(event, intern)))
+            count += 1
+        f.write('\n],"strings":')
+        f.write(dumps(intern.strings()))
+        f.write("}")
+    return count
+
+def expand_interned(doc):
+    """参考展开器：interned 文档 -> 旧版事件数组"""
+    if doc.get("format") != FORMAT_NAME:
+        raise ValueError("不是 interned 格式的事件池")
+    if doc.get("version") != VERSION:
+        raise ValueError(f"不支持的 interned 版本: {doc.get('version')}")
+    strings = doc["strings"]
+
+    def text(idx):
+        return None if idx is None else strings[idx]
+
+    events = []
+    for event_id, title, desc, rarity, min_stage, max_stage, choices in doc["events"]:
+        event = {"id": strings[event_id], "title": strings[title], "desc": strings[desc]}
+        for key, idx in zip(OPTIONAL_EVENT_KEYS, (rarity, min_stage, max_stage)):
+            if idx != ABSENT:
+                event[key] = text(idx)
+        expanded_choices = []
+        for choice_id, choice_text, effect_row in choices:
+            effect = {"type": strings[effect_row[0]]}
+            if len(effect_row) > 1:
+                effect["value"] = effect_row[1]
+            if len(effect_row) > 2:
+                effect["duration"] = effect_row[2]
+            expanded_choices.append({"id": strings[choice_id], "text": strings[choice_text], "effect": effect})
+        event["choices"] = expanded_choices
+        events.append(event)
+    return events
+
+def load_interned(file_path):
+    with open(file_path, encoding="utf-8") as f:
+        return expand_interned(json.load(f))
+
+# ==========================================
+# 基准测试
+# ==========================================
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def benchmark(sizes, seed):
+    print(f"{'事件数':>10}{'legacy 字节':>16}{'interned 字节':>16}{'节省':>8}"
+          f"{'legacy 解析':>14}{'interned 解析':>16}{'+展开':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.json")
+        interned_path = os.path.join(tmp, "interned.json")
+        for total in sizes:
+            counts = g.scale_counts(total)
+            g.write_events_stream(g.generate(counts=counts, seed=seed), legacy_path)
+            write_interned(g.generate(counts=counts, seed=seed), interned_path)
+            legacy_size = os.path.getsize(legacy_path)
+            interned_size = os.path.getsize(interned_path)
+
+            with open(legacy_path, encoding="utf-8") as f:
+                legacy_text = f.read()
+            legacy, legacy_time = _timed(lambda: json.loads(legacy_text))
+            del legacy_text
+            with open(interned_path, encoding="utf-8") as f:
+                interned_text = f.read()
+            doc, parse_time = _timed(lambda: json.loads(interned_text))
+            del interned_text
+            expanded, expand_time = _timed(lambda: expand_interned(doc))
+            if expanded != legacy:
+                raise SystemExit("❌ 展开结果与 legacy 不一致")
+            del legacy, doc, expanded
+
+            print(f"{total:>10,}{legacy_size:>16,}{interned_size:>16,}{1 - interned_size / legacy_size:>8.1%}"
+                  f"{legacy_time:>13.3f}s{parse_time:>15.3f}s{parse_time + expand_time:>11.3f}s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="interned 事件池：展开 / 基准测试")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    expand_cmd = sub.add_parser("expand", help="interned -> 旧版 JSON 数组")
+    expand_cmd.add_argument("interned_path")
+    expand_cmd.add_argument("json_path")
+
+    bench_cmd = sub.add_parser("bench", help="对比 legacy / interned 的体积与解析耗时")
+    bench_cmd.add_argument("--sizes", default="2000,100000,1000000", help="逗号分隔的事件数")
+    bench_cmd.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args(argv)
+    if args.command == "expand":
+        events = load_interned(args.interned_path)
+        g.write_events_stream(events, args.json_path)
+        print(f"✅ {len(events)} 个事件 -> {args.json_path}")
+    else:
+        benchmark([int(size) for size in args.sizes.split(",")], args.seed)
+
+if __name__ == "__main__":
+    main()
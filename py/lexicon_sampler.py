@@ -0,0 +1,123 @@
+import argparse
+import bisect
+import hashlib
+
+# ==========================================
+# 词库组合去重抽样
+# ==========================================
+# 把一个段位档次的 (前缀 × 主语 × 选项A × 选项B) 看成一个整数区间 [0, N)，
+# 用带密钥的 Feistel 置换把第 k 次抽样映射成区间里的一个位置，再按混合进制解码成四元组。
+# 置换是双射，所以同一个位置只会出现一次 —— 不放回抽样，但不需要把乘积空间展开成列表。
+
+MASK64 = (1 << 64) - 1
+
+def _mix64(x):
+    """splitmix64 终混函数"""
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+def derive_key(*parts):
+    """由任意字符串/整数派生 64 位密钥 (跨进程稳定)"""
+    digest = hashlib.sha256(":".join(str(p) for p in parts).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little")
+
+class FeistelPermutation:
+    """[0, n) 上的伪随机双射：平衡 Feistel 网络 + cycle walking，O(1) 内存"""
+
+    def __init__(self, n, key, rounds=4):
+        if n <= 0:
+            raise ValueError("置换区间不能为空")
+        self.n = n
+        bits = max(2, (n - 1).bit_length())
+        self.half_bits = (bits + 1) // 2
+        self.half_mask = (1 << self.half_bits) - 1
+        self.round_keys = [_mix64((key + i * 0x9E3779B97F4A7C15) & MASK64) for i in range(rounds)]
+
+    def _encrypt(self, x):
+        left = x >> self.half_bits
+        right = x & self.half_mask
+        for round_key in self.round_keys:
+            left, right = right, left ^ (_mix64(round_key ^ right) & self.half_mask)
+        return (left << self.half_bits) | right
+
+    def __call__(self, index):
+        # 定义域是 2 的偶数次幂，比 n 大不到 4 倍；落在 n 之外就继续加密直到回到区间内
+        x = self._encrypt(index)
+        while x >= self.n:
+            x = self._encrypt(x)
+        return x
+
+def repeats_word(prefix, subject, act_a, act_b):
+    """前缀与主语互相包含 (如「混沌」+「混沌之气」)，或 A/B 两个选项同词，都算重复"""
+    core = prefix[:-1] if prefix.endswith("的") else prefix
+    if core in subject or subject in core:
+        return True
+    return act_a == act_b
+
+class UniqueComboSampler:
+    """
+    一个 B 选项词库上的不放回四元组抽样。
+
+    data:     [{"sub": 主语, "acts": [选项A, ...]}, ...]
+    prefixes: 前缀列表
+    b_texts:  选项 B 词库
+    stride / phase: 第 k 次抽样取置换中的第 phase + k * stride 个位置。
+                    同一档次的各段位用相同密钥、不同 phase，彼此天然不重叠，
+                    因此每个段位可以独立 (并行) 抽样。
+    """
+
+    def __init__(self, data, prefixes, b_texts, key, stride=1, phase=0):
+        self.data = data
+        self.prefixes = prefixes
+        self.b_texts = b_texts
+        # (主语, 选项A) 对的前缀和，用来把对下标定位到具体主语
+        self.pair_offsets = []
+        total_pairs = 0
+        for item in data:
+            self.pair_offsets.append(total_pairs)
+            total_pairs += len(item["acts"])
+        self.size = total_pairs * len(prefixes) * len(b_texts)
+        self.permutation = FeistelPermutation(self.size, key)
+        self.stride = stride
+        self.position = phase
+
+    def decode(self, index):
+        """混合进制解码：index -> (item, prefix, act_a, act_b)"""
+        index, b_idx = divmod(index, len(self.b_texts))
+        pair_idx, prefix_idx = divmod(index, len(self.prefixes))
+        item_idx = bisect.bisect_right(self.pair_offsets, pair_idx) - 1
+        item = self.data[item_idx]
+        act_a = item["acts"][pair_idx - self.pair_offsets[item_idx]]
+        return item, self.prefixes[prefix_idx], act_a, self.b_texts[b_idx]
+
+    def draw(self):
+        """取下一个不重复、且不含重复词的四元组；空间耗尽时抛出 LookupError"""
+        while self.position < self.size:
+            index = self.permutation(self.position)
+            self.position += self.stride
+            item, prefix, act_a, act_b = self.decode(index)
+            if not repeats_word(prefix, item["sub"], act_a, act_b):
+                return item, prefix, act_a, act_b
+        raise LookupError(f"词库组合已用尽 (共 {self.size} 种)，请扩充词库或减少事件数量")
+
+def main(argv=None):
+    import generate_events12 as g
+
+    parser = argparse.ArgumentParser(description="统计各段位档次的词库组合空间")
+    parser.parse_args(argv)
+    for level_key, data, prefixes in [
+        ("low", g.DATA_LOW, g.PREFIX_LOW),
+        ("mid", g.DATA_MID, g.PREFIX_MID),
+        ("high", g.DATA_HIGH, g.PREFIX_HIGH),
+    ]:
+        for name, pool in [("离开", g.ACTION_B_LEAVE), ("稳健", g.ACTION_B_SAFE), ("反抗", g.ACTION_B_FIGHT)]:
+            sampler = UniqueComboSampler(data, prefixes, pool[level_key], key=0)
+            valid = sum(
+                not repeats_word(prefix, item["sub"], act_a, act_b)
+                for item in data for prefix in prefixes for act_a in item["acts"] for act_b in pool[level_key]
+            )
+            print(f"{level_key:<5}{name}  组合 {sampler.size:>6}  可用 {valid:>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+import argparse
+import itertools
+import json
+import time
+
+import numpy as np
+
+import game_formulas as f
+
+# ==========================================
+# 离线收益人群模型 (calculateOfflineGain)
+# ==========================================
+# 输入是「玩家日」：某个玩家某一天的全部离线间隔 (按时间顺序)、当天等级、是否 Pro、昨夜睡眠时长。
+# 每个间隔按 calculateOfflineGain 结算：不足 5 分钟或已满级不算；超过上限 (免费 2h / Pro 12h) 的部分截掉；
+# autoGain(当前等级) * 有效秒数 * 0.8；当天第一次有效结算再乘睡眠倍率 (每天只吃一次)。
+#
+# 所有间隔摊平成一维数组，按 player_day 下标用 np.bincount 汇总回每个玩家日，
+# 几百万个玩家日分批生成 / 读取，同一批间隔可以一次评估多组上限 (定价 what-if)。
+# 灵气统一换算成「当天等级的 breakCost」单位，跨等级才能比较和求分位数。
+
+HOUR = 3600.0
+PERCENTILES = (50, 90, 99)
+
+class GapBatch:
+    """
+    一批玩家日：
+      day   (间隔数,)   间隔所属玩家日的下标 (0 ~ days - 1，非递减)
+      gap   (间隔数,)   离线秒数
+      level / pro / sleep_hours   (玩家日数,)
+    """
+
+    def __init__(self, day, gap, level, pro, sleep_hours):
+        self.day = np.asarray(day, dtype=np.int64)
+        self.gap = np.asarray(gap, dtype=float)
+        self.level = np.asarray(level, dtype=np.int64)
+        self.pro = np.asarray(pro, dtype=bool)
+        self.sleep_hours = np.asarray(sleep_hours, dtype=float)
+
+    @property
+    def days(self):
+        return len(self.level)
+
+def synthetic_batches(players, days, pro_share=0.2, days_to_max=90.0, checks_per_day=6.0,
+                      sleep_share=0.6, seed=0, batch_days=500000):
+    """
+    合成数据：每个玩家日一次夜间离线 (中位 8h) + Poisson(checks_per_day) 次白天离线 (中位 1.5h)。
+    Pro 玩家等级随天数线性涨到满级 (每人速度乘一个对数正态系数)，免费玩家卡在 FREE_MAX_LEVEL。
+    sleep_share 的玩家授权了睡眠数据，昨夜睡眠 ~ N(7h, 1h)，其余没有睡眠加成。
+    """
+    rng = np.random.default_rng(seed)
+    per_batch = max(1, batch_days // days)
+    for first in range(0, players, per_batch):
+        count = min(per_batch, players - first)
+        pro = rng.random(count) < pro_share
+        speed = days_to_max * rng.lognormal(0.0, 0.3, count)
+        authorized = rng.random(count) < sleep_share
+
+        calendar = np.arange(days)
+        level = 1 + np.floor((f.MAX_LEVEL - 1) * np.minimum(1.0, (calendar + 1) / speed[:, None]))
+        level = np.where(pro[:, None], level, np.minimum(level, f.FREE_MAX_LEVEL)).astype(np.int64)
+        sleep_hours = np.where(authorized[:, None], rng.normal(7.0, 1.0, (count, days)), 0.0)
+
+        day_count = count * days
+        checks = rng.poisson(checks_per_day, day_count)
+        day = np.repeat(np.arange(day_count), checks + 1)
+        starts = np.cumsum(checks + 1) - (checks + 1)
+        gap = rng.lognormal(np.log(1.5 * HOUR), 0.8, len(day))
+        gap[starts] = rng.lognormal(np.log(8.0 * HOUR), 0.25, day_count)
+        yield GapBatch(day, gap, level.ravel(), np.repeat(pro, days), sleep_hours.ravel())
+
+def load_gaps(path):
+    """
+    记录数据：CSV，表头至少有 player_day,gap_seconds，可选 level,pro,sleep_hours。
+    每行一个离线间隔，同一 player_day 的行相邻并按时间排序；玩家日属性取该日第一行。
+    """
+    table = np.genfromtxt(path, delimiter=",", names=True)
+    names = table.dtype.names
+    for column in ("player_day", "gap_seconds"):
+        if column not in names:
+            raise ValueError(f"{path} 缺少列 {column}")
+    _, first, day = np.unique(table["player_day"], return_index=True, return_inverse=True)
+    if np.any(np.diff(table["player_day"]) < 0):
+        raise ValueError(f"{path} 需要按 player_day 排序")
+
+    def column(name, default):
+        return table[name][first] if name in names else np.full(len(first), default)
+
+    return GapBatch(day, table["gap_seconds"], column("level", f.FREE_MAX_LEVEL),
+                    column("pro", 0) > 0, column("sleep_hours", 0.0))
+
+def evaluate(batch, free_limit, pro_limit, reincarnation=0):
+    """
+    按一组上限结算这批玩家日，返回每个玩家日的字典：
+    qi / lost (以 breakCost 为单位)、结算次数、被截断次数、有效 / 原始离线秒数。
+    """
+    pro = batch.pro[batch.day]
+    limit = np.where(pro, pro_limit, free_limit)
+    level = batch.level[batch.day]
+    # 与 offline_gain 一致：满级直接 return，不算一次结算
+    settled = (batch.gap >= f.OFFLINE_MIN_SECONDS) & (level < f.MAX_LEVEL)
+
+    # 当天第一次有效结算吃睡眠倍率
+    first = np.zeros(len(batch.gap), dtype=bool)
+    settled_index = np.flatnonzero(settled)
+    settled_day = batch.day[settled_index]
+    first[settled_index[np.r_[True, settled_day[1:] != settled_day[:-1]]]] = True
+    multiplier = np.where(first, f.sleep_bonus_multiplier(batch.sleep_hours)[batch.day], 1.0)
+
+    qi, lost = f.offline_gain(level, batch.gap, limit, multiplier, reincarnation)
+    cost = f.break_cost(batch.level)
+    effective = np.where(settled, np.minimum(batch.gap, limit), 0.0)
+
+    def per_day(values):
+        return np.bincount(batch.day, weights=values, minlength=batch.days)
+
+    return {
+        "qi": per_day(qi) / cost,
+        "lost": per_day(lost) / cost,
+        "settlements": per_day(settled),
+        "capped": per_day(settled & (batch.gap > limit)),
+        "effective_seconds": per_day(effective),
+        "raw_seconds": per_day(np.where(settled, batch.gap, 0.0)),
+    }
+
+class CohortTotals:
+    """一个 (上限组合, 人群) 的累计值；每个玩家日的 qi 留着算分位数"""
+
+    def __init__(self):
+        self.days = 0
+        self.sums = {}
+        self.qi_parts = []
+
+    def add(self, result, mask):
+        self.days += int(mask.sum())
+        for key, values in result.items():
+            self.sums[key] = self.sums.get(key, 0.0) + float(values[mask].sum())
+        self.qi_parts.append(result["qi"][mask])
+
+    def row(self):
+        sums = self.sums
+        qi = np.concatenate(self.qi_parts) if self.qi_parts else np.zeros(0)
+        days = max(self.days, 1)
+        settlements = max(sums.get("settlements", 0.0), 1.0)
+        earned = sums.get("qi", 0.0) + sums.get("lost", 0.0)
+        row = {
+            "player_days": self.days,
+            "settlements_per_day": sums.get("settlements", 0.0) / days,
+            "capped_share": sums.get("capped", 0.0) / settlements,
+            "effective_hours_per_day": sums.get("effective_seconds", 0.0) / days / HOUR,
+            "raw_hours_per_day": sums.get("raw_seconds", 0.0) / days / HOUR,
+            "qi_per_day": sums.get("qi", 0.0) / days,
+            "lost_per_day": sums.get("lost", 0.0) / days,
+            "lost_share": sums.get("lost", 0.0) / earned if earned else 0.0,
+        }
+        for q, value in zip(PERCENTILES, np.percentile(qi, PERCENTILES) if len(qi) else [0.0] * len(PERCENTILES)):
+            row[f"qi_p{q}"] = float(value)
+        return row
+
+def run(batches, scenarios, reincarnation=0):
+    """
+    scenarios: [(免费上限秒, Pro 上限秒), ...]。
+    返回 {(free_limit, pro_limit): {"free": row, "pro": row}} 和处理的玩家日数。
+    """
+    totals = {scenario: {"free": CohortTotals(), "pro": CohortTotals()} for scenario in scenarios}
+    days = 0
+    for batch in batches:
+        days += batch.days
+        for scenario in scenarios:
+            result = evaluate(batch, *scenario, reincarnation)
+            totals[scenario]["pro"].add(result, batch.pro)
+            totals[scenario]["free"].add(result, ~batch.pro)
+    rows = {
+        scenario: {cohort: total.row() for cohort, total in cohorts.items()}
+        for scenario, cohorts in totals.items()
+    }
+    return rows, days
+
+def print_rows(rows, days, seconds):
+    print(f"📊 {days:,} 个玩家日，{len(rows)} 组上限，耗时 {seconds:.2f}s (灵气以当天 breakCost 为单位)")
+    print(f"{'免费/Pro上限':<12}{'人群':<6}{'玩家日':>12}{'结算/天':>9}{'截断率':>8}{'有效h/天':>10}{'原始h/天':>10}"
+          f"{'灵气/天':>10}{'截掉/天':>10}{'截掉占比':>9}" + "".join(f"{'p' + str(q):>9}" for q in PERCENTILES))
+    for (free_limit, pro_limit), cohorts in rows.items():
+        label = f"{free_limit / HOUR:g}h/{pro_limit / HOUR:g}h"
+        for cohort, row in cohorts.items():
+            if not row["player_days"]:
+                continue
+            print(f"{label:<14}{cohort:<6}{row['player_days']:>12,}{row['settlements_per_day']:>9.2f}"
+                  f"{row['capped_share']:>8.1%}{row['effective_hours_per_day']:>10.2f}{row['raw_hours_per_day']:>10.2f}"
+                  f"{row['qi_per_day']:>10.3f}{row['lost_per_day']:>10.3f}{row['lost_share']:>9.1%}"
+                  + "".join(f"{row['qi_p' + str(q)]:>9.3f}" for q in PERCENTILES))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="免费 / Pro 离线上限对离线收益的影响 (按玩家日批量结算)")
+    parser.add_argument("--gaps", help="记录数据 CSV (player_day,gap_seconds[,level,pro,sleep_hours])；不给则合成")
+    parser.add_argument("--players", type=int, default=20000)
+    parser.add_argument("--days", type=int, default=90, help="每个玩家模拟的天数")
+    parser.add_argument("--pro-share", type=float, default=0.2)
+    parser.add_argument("--days-to-max", type=float, default=90.0, help="Pro 玩家线性升到满级的中位天数")
+    parser.add_argument("--checks-per-day", type=float, default=6.0, help="白天离线次数的均值")
+    parser.add_argument("--sleep-share", type=float, default=0.6, help="授权了睡眠数据的玩家比例")
+    parser.add_argument("--batch-days", type=int, default=500000, help="每批处理的玩家日数")
+    parser.add_argument("--free-limit", type=float, nargs="+", default=[f.FREE_OFFLINE_LIMIT_SECONDS / HOUR],
+                        help="免费离线上限 (小时)，可给多个做对比")
+    parser.add_argument("--pro-limit", type=float, nargs="+", default=[f.PRO_OFFLINE_LIMIT_SECONDS / HOUR],
+                        help="Pro 离线上限 (小时)，可给多个做对比")
+    parser.add_argument("--reincarnation", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_output", help="把结果写到该文件")
+    args = parser.parse_args(argv)
+
+    scenarios = [(free * HOUR, pro * HOUR) for free, pro in itertools.product(args.free_limit, args.pro_limit)]
+    if args.gaps:
+        batches = [load_gaps(args.gaps)]
+    else:
+        batches = synthetic_batches(args.players, args.days, args.pro_share, args.days_to_max,
+                                    args.checks_per_day, args.sleep_share, args.seed, args.batch_days)
+    start = time.perf_counter()
+    rows, days = run(batches, scenarios, args.reincarnation)
+    print_rows(rows, days, time.perf_counter() - start)
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as file:
+            json.dump([
+                {"free_limit_hours": free / HOUR, "pro_limit_hours": pro / HOUR, "cohorts": cohorts}
+                for (free, pro), cohorts in rows.items()
+            ], file, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
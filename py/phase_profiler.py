@@ -0,0 +1,115 @@
+import cProfile
+import functools
+import pstats
+import time
+from collections import defaultdict
+
+# ==========================================
+# 生成流程分阶段计时 (--profile)
+# ==========================================
+# 计时期间把 generate_events12 里各阶段的函数换成计时包装，结束后换回原函数，
+# 不开 --profile 时生成路径上没有任何额外开销。
+# 生成是惰性的、与写文件交错进行，所以「序列化」= 总耗时 - build_event 总耗时；
+# 「组装」= build_event 扣掉各子阶段后的剩余部分 (拼 id / rarity / dict 等)。
+
+# (阶段, [属性路径, ...])，路径相对于生成模块
+PHASES = [
+    ("模板选择", ["pick_template"]),
+    ("文案拼装", ["get_title_and_action_a", "get_action_b_text", "UniqueStageText.draw"]),
+    ("灵气计算", ["calculate_qi_gain"]),
+    ("效果构建", ["build_effect", "polish_choice_text"]),
+]
+EVENT_PHASE = "build_event"
+
+def _resolve(module, path):
+    """'UniqueStageText.draw' -> (UniqueStageText, 'draw')"""
+    owner = module
+    *parents, name = path.split(".")
+    for parent in parents:
+        owner = getattr(owner, parent)
+    return owner, name
+
+class PhaseTimer:
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+
+    def wrap(self, phase, func):
+        seconds = self.seconds
+        calls = self.calls
+        counter = time.perf_counter
+
+        # wraps 留下 __wrapped__：stage_cache 用 inspect.getsource 算代码指纹，要拿到原函数的源码
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                seconds[phase] += counter() - start
+                calls[phase] += 1
+        return timed
+
+class GenerationProfiler:
+    """
+    start() / stop(events) 包住一次完整生成 + 写出。
+    module 是实际在跑的生成模块 (直接运行脚本时是 __main__，不是 import 进来的那份)。
+    phases=True 打印阶段耗时分解；pstats_path 不为空时同时跑 cProfile 并保存。
+    """
+
+    def __init__(self, module, phases=True, pstats_path=None):
+        self.module = module
+        self.phases = phases
+        self.pstats_path = pstats_path
+        self.timer = PhaseTimer()
+        self.originals = []
+        self.cprofile = None
+        self.started = 0.0
+
+    def _patch(self):
+        targets = [(phase, path) for phase, paths in PHASES for path in paths]
+        targets.append((EVENT_PHASE, "build_event"))
+        for phase, path in targets:
+            owner, name = _resolve(self.module, path)
+            original = getattr(owner, name)
+            self.originals.append((owner, name, original))
+            setattr(owner, name, self.timer.wrap(phase, original))
+
+    def _restore(self):
+        for owner, name, original in reversed(self.originals):
+            setattr(owner, name, original)
+        self.originals = []
+
+    def start(self):
+        if self.phases:
+            self._patch()
+        if self.pstats_path:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        self.started = time.perf_counter()
+
+    def stop(self, events):
+        wall = time.perf_counter() - self.started
+        if self.cprofile:
+            self.cprofile.disable()
+        self._restore()
+        if self.phases:
+            print_breakdown(self.timer, wall, events)
+        if self.cprofile:
+            self.cprofile.dump_stats(self.pstats_path)
+            print(f"\n🧪 cProfile 已保存: {self.pstats_path} (累计耗时前 15 项)")
+            pstats.Stats(self.pstats_path).sort_stats("cumulative").print_stats(15)
+
+def print_breakdown(timer, wall, events):
+    sub_phases = [phase for phase, _ in PHASES]
+    event_seconds = timer.seconds[EVENT_PHASE]
+    rows = [(phase, timer.seconds[phase], timer.calls[phase]) for phase in sub_phases]
+    rows.append(("组装事件", event_seconds - sum(timer.seconds[p] for p in sub_phases), timer.calls[EVENT_PHASE]))
+    rows.append(("序列化写出", wall - event_seconds, None))
+
+    print(f"\n⏱️  分阶段耗时 ({events:,} 个事件，总计 {wall:.3f}s，含计时包装开销)")
+    print(f"   {'阶段':<10}{'耗时':>10}{'占比':>8}{'调用次数':>12}{'每事件':>12}")
+    for phase, seconds, calls in rows:
+        calls_text = f"{calls:,}" if calls is not None else "-"
+        per_event = seconds / events * 1e6 if events else 0.0
+        print(f"   {phase:<10}{seconds:>9.3f}s{seconds / wall:>8.1%}{calls_text:>12}{per_event:>10.2f}µs")
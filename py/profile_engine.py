@@ -0,0 +1,231 @@
+import argparse
+import ast
+import copy
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import generate_events12 as g
+from qi_curve import QiRewardCurve
+
+# ==========================================
+# 多版本生成引擎
+# ==========================================
+# generate_events.py ~ generate_events12.py 是同一个生成器的 12 个历史版本。
+# 这里给每个版本一个 profile，在同一个进程里重建全部版本的事件池：
+#   - 每个脚本只 ast 解析一次，去掉 import / 写文件 / 打印，
+#     定义部分和生成循环分别编译，生成时在独立命名空间里执行；
+#   - 命名空间里的 random 换成该 profile 自己的 random.Random(seed)，互不干扰；
+#   - calculate_qi_gain 换成共享的 QiRewardCurve 查表 (v3 ~ v11 共用同一张表)，
+#     随机数消耗与原函数一致。
+# 同一个 seed 下，v01 ~ v11 的输出与「random.seed(seed) 后运行原脚本」逐字节一致，
+# v12 与 generate_events12.py --seed 一致。
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUT_DIR = "build"
+
+TIERED = [(3, 120, 1.6), (9, 500, 1.9), (15, 8000, 2.4)]
+
+# v1：单一 1.8 指数，始终按 10 取整
+CURVE_V1 = QiRewardCurve(tiers=[(15, 100, 1.8)], jitter=(0.8, 1.2), coarse_threshold=None)
+# v2：分段指数，±25% 抖动
+CURVE_V2 = QiRewardCurve(tiers=TIERED, jitter=(0.75, 1.25))
+# v3 ~ v11：分段指数，±20% 抖动
+CURVE_TIERED = QiRewardCurve(tiers=TIERED, jitter=(0.8, 1.2))
+
+# 生成循环的两种写法
+FLAT = "flat"        # for i in range(TOTAL_EVENTS)，每个事件随机抽段位
+PYRAMID = "pyramid"  # for stage_idx in range(16)，每个段位固定 count 个
+STAGED = "staged"    # generate_events12 的 generate()，按段位独立随机流
+
+class Profile:
+    """一个历史版本：脚本、循环写法、奖励曲线，以及它当年写出的 events*.json"""
+
+    def __init__(self, name, script, kind, qi_curve, legacy_output=None, note=""):
+        self.name = name
+        self.script = script
+        self.kind = kind
+        self.qi_curve = qi_curve
+        self.legacy_output = legacy_output
+        self.note = note
+
+    def with_curve(self, name, qi_curve):
+        return Profile(name, self.script, self.kind, qi_curve, self.legacy_output, f"基于 {self.name}")
+
+PROFILES = {
+    profile.name: profile
+    for profile in [
+        Profile("v01", "generate_events.py", FLAT, CURVE_V1, "events1.json", "初版 evt_gen"),
+        Profile("v02", "generate_events2.py", FLAT, CURVE_V2, "events2.json", "分段数值 evt_auto"),
+        Profile("v03", "generate_events3.py", FLAT, CURVE_TIERED, "events3.json", "Watch 优化 evt_watch"),
+        Profile("v04", "generate_events4.py", FLAT, CURVE_TIERED, "events4.json", "主语动作绑定 evt_logic"),
+        Profile("v05", "generate_events5.py", FLAT, CURVE_TIERED, "events5.json", "护身符 evt_full"),
+        Profile("v06", "generate_events6.py", FLAT, CURVE_TIERED, "events6.json", "段位权重 evt_bal"),
+        Profile("v07", "generate_events7.py", FLAT, CURVE_TIERED, None, "1000 事件 evt_1k"),
+        Profile("v08", "generate_events8.py", PYRAMID, CURVE_TIERED, None, "金字塔数量 evt_pyramid"),
+        Profile("v09", "generate_events9.py", PYRAMID, CURVE_TIERED, "events8.json", "赌点击 evt_tap_fix"),
+        Profile("v10", "generate_events10.py", PYRAMID, CURVE_TIERED, None, "心血来潮 evt_v2"),
+        Profile("v11", "generate_events11.py", PYRAMID, CURVE_TIERED, "events9.json", "B 选项词库 evt_smart"),
+        Profile("v12", "generate_events12.py", STAGED, g.QI_CURVE, "events10.json", "四字短语 evt_4char"),
+    ]
+}
+
+def load_profile_file(path):
+    """
+    读取派生 profile：{"name": ..., "base": "v12", "qi_curve": QiRewardCurve.to_dict()}
+    (qi_tuner.py 输出的就是这种文件)
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    base = PROFILES.get(data.get("base"))
+    if base is None:
+        raise ValueError(f"{path}: 未知的 base profile {data.get('base')!r}")
+    curve = QiRewardCurve.from_dict(data["qi_curve"]) if "qi_curve" in data else base.qi_curve
+    return base.with_curve(data.get("name") or os.path.splitext(os.path.basename(path))[0], curve)
+
+# ==========================================
+# 脚本解析 (每个脚本只解析一次)
+# ==========================================
+
+class ScaleCounts(ast.NodeTransformer):
+    """金字塔版本：把循环里的 count = <常量> 换成 count = __counts__[stage_idx]"""
+
+    def visit_Assign(self, node):
+        if (len(node.targets) == 1 and isinstance(node.targets[0], ast.Name)
+                and node.targets[0].id == "count" and isinstance(node.value, ast.Constant)):
+            node.value = ast.parse("__counts__[stage_idx]", mode="eval").body
+        return node
+
+def _is_output_statement(node):
+    """写文件与打印：with open(...) / file_path = ... / print(...)"""
+    if isinstance(node, ast.With):
+        return True
+    if isinstance(node, ast.Expr):
+        return True
+    if isinstance(node, ast.Assign):
+        return any(isinstance(t, ast.Name) and t.id == "file_path" for t in node.targets)
+    return False
+
+def _is_events_init(node):
+    return (isinstance(node, ast.Assign) and len(node.targets) == 1
+            and isinstance(node.targets[0], ast.Name) and node.targets[0].id == "events")
+
+class CompiledScript:
+    """一个历史脚本拆成「定义」和「生成循环」两段代码对象"""
+
+    def __init__(self, path):
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+        body = [node for node in tree.body if not isinstance(node, (ast.Import, ast.ImportFrom))]
+        split = next(i for i, node in enumerate(body) if _is_events_init(node))
+        loop = [node for node in body[split:] if not _is_output_statement(node)]
+        self.path = path
+        self.definitions = self._compile(body[:split])
+        self.loop = self._compile(loop)
+        self.scaled_loop = self._compile([ScaleCounts().visit(node) for node in copy.deepcopy(loop)])
+
+    def _compile(self, nodes):
+        module = ast.fix_missing_locations(ast.Module(body=nodes, type_ignores=[]))
+        return compile(module, self.path, "exec")
+
+_SCRIPTS = {}
+
+def compiled_script(script):
+    if script not in _SCRIPTS:
+        _SCRIPTS[script] = CompiledScript(os.path.join(SCRIPT_DIR, script))
+    return _SCRIPTS[script]
+
+def _quiet(*args, **kwargs):
+    pass
+
+# ==========================================
+# 生成 / 输出
+# ==========================================
+
+def generate_profile(profile, seed, total=None):
+    """返回该版本的事件列表；total 为 None 时使用脚本原本的数量"""
+    if profile.kind == STAGED:
+        counts = g.scale_counts(total) if total is not None else g.STAGE_COUNTS
+        if profile.qi_curve is g.QI_CURVE:
+            return list(g.generate(counts=counts, seed=seed))
+        # 派生曲线：在独立命名空间里重新执行一份 generate_events12，只替换 QI_CURVE
+        namespace = {"__name__": f"profile_{profile.name}"}
+        with open(os.path.join(SCRIPT_DIR, profile.script), encoding="utf-8") as f:
+            exec(compile(f.read(), profile.script, "exec"), namespace)
+        namespace["QI_CURVE"] = profile.qi_curve
+        return list(namespace["generate"](counts=counts, seed=seed))
+
+    script = compiled_script(profile.script)
+    rng = random.Random(seed)
+    namespace = {"__name__": f"profile_{profile.name}", "json": json, "math": math,
+                 "random": rng, "print": _quiet}
+    exec(script.definitions, namespace)
+    curve = profile.qi_curve
+    namespace["calculate_qi_gain"] = lambda stage_idx: curve.sample(stage_idx, rng)
+    loop = script.loop
+    if total is not None:
+        if profile.kind == FLAT:
+            namespace["TOTAL_EVENTS"] = total
+        else:
+            namespace["__counts__"] = g.scale_counts(total)
+            loop = script.scaled_loop
+    exec(loop, namespace)
+    return namespace["events"]
+
+def build_profile(task):
+    """生成并写出一个版本，返回 (名称, 事件数, 字节数, 耗时)"""
+    profile, seed, total, out_dir = task
+    start = time.perf_counter()
+    events = generate_profile(profile, seed, total)
+    path = os.path.join(out_dir, f"events_{profile.name}.json")
+    g.write_events_stream(events, path)
+    return profile.name, len(events), os.path.getsize(path), time.perf_counter() - start
+
+def build_all(profiles, seed, total=None, out_dir=DEFAULT_OUT_DIR, jobs=1):
+    """jobs > 1 时各版本在进程池里并行生成、并行写出"""
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = [(profile, seed, total, out_dir) for profile in profiles]
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            yield from pool.map(build_profile, tasks)
+    else:
+        for task in tasks:
+            yield build_profile(task)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="一次重建全部历史版本的事件池")
+    parser.add_argument("profiles", nargs="*", help=f"要生成的版本 (默认全部: {', '.join(PROFILES)})")
+    parser.add_argument("--profile-file", action="append", default=[], metavar="PATH",
+                        help="额外的派生 profile (JSON，可重复)")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--total", type=int, default=None, help="覆盖每个版本的事件总量")
+    parser.add_argument("--out-dir", default=DEFAULT_OUT_DIR, help="输出目录")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="并行进程数")
+    parser.add_argument("--list", action="store_true", help="只列出可用版本")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for profile in PROFILES.values():
+            legacy = profile.legacy_output or "-"
+            print(f"{profile.name}  {profile.script:<22}{profile.kind:<9}{legacy:<15}{profile.note}")
+        return
+
+    unknown = [name for name in args.profiles if name not in PROFILES]
+    if unknown:
+        parser.error(f"未知版本: {', '.join(unknown)}")
+    profiles = [PROFILES[name] for name in args.profiles or PROFILES]
+    try:
+        profiles += [load_profile_file(path) for path in args.profile_file]
+    except (OSError, ValueError, KeyError) as error:
+        parser.error(str(error))
+
+    start = time.perf_counter()
+    for name, count, size, seconds in build_all(profiles, args.seed, args.total, args.out_dir, args.jobs):
+        print(f"✅ {name}: {count:>8,} 个事件  {size:>12,} 字节  {seconds:6.2f}s")
+    print(f"📁 {len(profiles)} 个版本 -> {args.out_dir}/  总耗时 {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,649 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+import game_formulas as f
+import generate_events12 as g
+import stage_index as si
+
+# ==========================================
+# 玩家成长蒙特卡洛模拟 (NumPy 批量)
+# ==========================================
+# N 个模拟玩家用同一组数组并行推进，状态与 GameManager.player 对应：
+# 灵气、等级、连续失败次数 (保底)、护身符、Debuff。
+#
+# 一个玩家打到 144 级要经历约 3 万次事件，逐个事件模拟 10 万玩家要 30 亿次抽取，
+# 所以默认按「步」推进，每一步是整数个 10 秒检测：
+#   - 这段时间的触发次数 ~ Binomial(检测次数, getEventProbability)；
+#   - 单次事件的收益均值 / 方差来自真实 events.json 在该段位 (以及护身符拦截后) 的候选池，
+#     触发 n 次的总和取正态近似；临时 Buff 折算成 倍率 * 时长 的额外收益秒数，
+#     gamble_tap / gamble_auto 输了分别折算成点击减半、全部收益减半的时长；
+#   - 每一轮走预计够突破时长的一半 (至少整级的 1/8)，步末灵气超过突破消耗时，
+#     按线性插值退回到越线时刻再突破。
+# 突破按 attemptBreak / finalizeMiniGame 逐次精确结算 (保底、护身符、失败惩罚、道心不稳 Debuff)。
+# --exact 改为逐个事件模拟：每个玩家推进到下一个时刻 (够突破 / 事件触发 / Buff 到期)，
+# 真的从候选池里抽事件、选选项、按 applyEventEffect 结算，用于小规模核对步进模型
+# (仓库自带的 events.json 上，两者各段位到达时刻的中位数相差在 1% 以内，满级 64.8d vs 64.6d；
+#  前几个段位的 p10 差得多一些，开光 2.7m vs 2.5m，约 8%)。
+#
+# 与游戏的约定：
+#   - 玩家一直在线，自动修炼开启，按固定点击频率点击 (--taps)；不计离线收益；
+#   - 一够突破消耗就立即突破；大境界 (level % 9 == 0) 的渡劫小游戏按 --tribulation-win 判定，
+#     没有保底，也不改连续失败计数；
+#   - 事件按 EventPool.randomEvent 的段位窗口与护身符 >= 20 拦截 grant_item 抽取，
+#     选项默认等概率选择 (界面上选项是打乱的)；
+#   - 已付费，不受 FREE_MAX_LEVEL 限制。
+
+NOTHING, GAIN_QI, LOSE_QI, GAIN_TAP_TEMP, GAIN_AUTO_TEMP, GRANT_ITEM, GAMBLE_TAP, GAMBLE_AUTO, GAMBLE = range(9)
+EFFECT_CODES = {
+    "nothing": NOTHING,
+    "gain_qi": GAIN_QI,
+    "lose_qi": LOSE_QI,
+    "gain_tap_ratio_temp": GAIN_TAP_TEMP,
+    "gain_auto_temp": GAIN_AUTO_TEMP,
+    "grant_item": GRANT_ITEM,
+    "gamble_tap": GAMBLE_TAP,
+    "gamble_auto": GAMBLE_AUTO,
+    "gamble": GAMBLE,
+}
+TIMED_EFFECTS = (GAIN_TAP_TEMP, GAIN_AUTO_TEMP, GAMBLE_TAP, GAMBLE_AUTO)
+VALUE_EFFECTS = (GAIN_QI, LOSE_QI, GAMBLE)
+CHOICE_POLICIES = ("random", "first", "best")
+# 每一步走「预计够突破时长」的一半，但不少于整级预计时长的 1/8：
+# 步子越大越快，但越线那一步的插值误差越大
+STEP_SHARE = 0.5
+MIN_STEP_SHARE = 0.125
+BINOMIAL_NORMAL_VAR = 25.0
+DAY = 86400.0
+
+# ==========================================
+# 事件池 -> 效果数组
+# ==========================================
+
+class EventTable:
+    """
+    把 events.json 摊平成按选项存的效果数组，并算好每个段位的候选事件下标：
+      choice_start[e] / choice_count[e]   第 e 个事件的选项在效果数组里的区间
+      effect_type / effect_value / effect_duration   缺失的 value / duration 为 NaN
+      stage_positions[s] / capped_positions[s]        段位 s 的候选事件 (后者为护身符拦截后)
+    weighted=True 时按 rarity 权重抽 (stage_index.RARITY_WEIGHTS)，否则与 Swift 一样均匀抽。
+    """
+
+    def __init__(self, events, weighted=False, rarity_weights=si.RARITY_WEIGHTS):
+        counts = [len(event["choices"]) for event in events]
+        self.choice_count = np.array(counts, dtype=np.int64)
+        self.choice_start = np.concatenate(([0], np.cumsum(self.choice_count)[:-1])).astype(np.int64)
+        effects = [choice["effect"] for event in events for choice in event["choices"]]
+        self.effect_type = np.array([EFFECT_CODES.get(e["type"], NOTHING) for e in effects], dtype=np.int8)
+        self.effect_value = np.array([_number(e.get("value")) for e in effects])
+        self.effect_duration = np.array([_number(e.get("duration")) for e in effects])
+
+        windows = np.array([si.resolve_window(event) for event in events], dtype=np.int64).reshape(-1, 2)
+        fallback = np.flatnonzero([si.is_fallback(event) for event in events])
+        grant = np.array([si.contains_grant_item(event) for event in events], dtype=bool)
+        weights = np.array([si.event_weight(event, rarity_weights)[1] for event in events])
+
+        self.stage_positions = []
+        self.capped_positions = []
+        self.stage_weights = []
+        self.capped_weights = []
+        for stage in range(f.STAGE_COUNT):
+            positions = np.flatnonzero((windows[:, 0] <= stage) & (stage <= windows[:, 1]))
+            if not len(positions):
+                positions = fallback
+            capped = positions[~grant[positions]]
+            if not len(capped):
+                capped = positions
+            self.stage_positions.append(positions)
+            self.capped_positions.append(capped)
+            self.stage_weights.append(_usable(weights[positions]) if weighted else None)
+            self.capped_weights.append(_usable(weights[capped]) if weighted else None)
+        self._cumweights = {}
+
+    def candidates(self, stage, capped):
+        """(候选事件下标, 权重或 None)"""
+        if capped:
+            return self.capped_positions[stage], self.capped_weights[stage]
+        return self.stage_positions[stage], self.stage_weights[stage]
+
+    def draw(self, stage, capped, rng):
+        """stage / capped 为等长数组，返回事件下标 (-1 表示该段位没有事件)"""
+        result = np.full(len(stage), -1, dtype=np.int64)
+        keys = stage * 2 + capped
+        for key in np.unique(keys):
+            rows = np.flatnonzero(keys == key)
+            positions, weights = self.candidates(*divmod(int(key), 2))
+            if not len(positions):
+                continue
+            if weights is None:
+                picks = (rng.random(len(rows)) * len(positions)).astype(np.int64)
+            else:
+                cumweights = self._cumweights.get(key)
+                if cumweights is None:
+                    cumweights = self._cumweights[key] = np.cumsum(weights)
+                picks = np.searchsorted(cumweights, rng.random(len(rows)) * cumweights[-1], side="right")
+            result[rows] = positions[np.minimum(picks, len(positions) - 1)]
+        return result
+
+    def effective_type(self):
+        """applyEventEffect 里缺 value (或 duration) 时直接 return，按 nothing 计"""
+        kind = self.effect_type.copy()
+        missing_value = np.isnan(self.effect_value)
+        missing_duration = np.isnan(self.effect_duration)
+        kind[np.isin(kind, VALUE_EFFECTS) & missing_value] = NOTHING
+        kind[np.isin(kind, TIMED_EFFECTS) & (missing_value | missing_duration)] = NOTHING
+        return kind
+
+def _number(value):
+    return float("nan") if value is None else float(value)
+
+def _usable(weights):
+    """权重全为 0 时退回均匀抽取 (与 stage_index 一致)"""
+    return weights if len(weights) and weights.sum() > 0 else None
+
+def expected_choice_qi(table):
+    """每个选项的即时灵气期望 (gain / lose / gamble)"""
+    kind = table.effective_type()
+    value = np.nan_to_num(table.effect_value)
+    qi = np.zeros(len(value))
+    qi[kind == GAIN_QI] = value[kind == GAIN_QI]
+    qi[kind == LOSE_QI] = -value[kind == LOSE_QI]
+    gamble = kind == GAMBLE
+    qi[gamble] = value[gamble] * (f.GAMBLE_WIN_RATE * f.GAMBLE_WIN_FACTOR
+                                  - (1 - f.GAMBLE_WIN_RATE) * f.GAMBLE_LOSE_FACTOR)
+    return qi
+
+def best_choices(table):
+    """每个事件即时灵气期望最高的选项 (相同时取前一个)"""
+    qi = expected_choice_qi(table)
+    best = np.zeros(len(table.choice_count), dtype=np.int64)
+    for offset in range(1, int(table.choice_count.max(initial=1))):
+        has = table.choice_count > offset
+        index = table.choice_start + np.minimum(offset, np.maximum(table.choice_count - 1, 0))
+        better = has & (qi[index] > qi[table.choice_start + best])
+        best[better] = offset
+    return best
+
+def choose(table, events, choice_policy, best, rng):
+    """selectEventChoice：返回选项在效果数组里的下标"""
+    if choice_policy == "first":
+        choice = np.zeros(len(events), dtype=np.int64)
+    elif choice_policy == "best":
+        choice = best[events]
+    else:
+        choice = (rng.random(len(events)) * table.choice_count[events]).astype(np.int64)
+    return table.choice_start[events] + choice
+
+class EventMix:
+    """
+    步进模型用：每个 (段位, 是否护身符拦截) 一行，记录「触发一次事件」带来的各项收益的均值 / 方差。
+    每个选项按 gamble 的输赢拆成两个各占一半的结果 (非博弈选项两半相同)，各结果折算成：
+      qi     即时灵气 (gain_qi / -lose_qi / gamble 赢 value * 1.5、输 -value * 0.5)
+      tap    点击 Buff 的 倍率 * 时长 (gamble_tap 输为 -0.5 * 时长)
+      auto   自动 Buff 的 倍率 * 时长
+      halved gamble_auto 输掉后全部收益减半的时长
+      jump   正向跳跃的灵气 (gain_qi、赢了的 gamble)
+    grant 是拿到护身符的概率；overshoot 是事件跳跃越过突破线时平均多出的灵气
+    (更新过程的 E[J^2] / 2E[J])，步进模型退回越线时刻时用它补上，否则每级都会少算一截。
+    行号 key = stage * 2 + capped，与 EventTable.draw 一致。
+    """
+
+    QUANTITIES = ("qi", "tap", "auto", "halved", "jump")
+    QI, TAP, AUTO, HALVED, JUMP = range(5)
+
+    def __init__(self, table, choice_policy="random"):
+        best = best_choices(table) if choice_policy == "best" else None
+        outcomes = _outcomes(table)
+        keys = f.STAGE_COUNT * 2
+        self.mean = np.zeros((len(self.QUANTITIES), keys))
+        self.var = np.zeros((len(self.QUANTITIES), keys))
+        self.grant = np.zeros(keys)
+        self.overshoot = np.zeros(keys)
+        self.empty = np.zeros(keys, dtype=bool)
+        grant = table.effective_type() == GRANT_ITEM
+        for key in range(keys):
+            positions, weights = table.candidates(*divmod(key, 2))
+            if not len(positions):
+                self.empty[key] = True
+                continue
+            # 没有选项的事件什么都不发生，它的份额不进任何选项
+            index, share = _choice_shares(table, positions, weights, choice_policy, best)
+            self.grant[key] = share @ grant[index]
+            for row, name in enumerate(self.QUANTITIES):
+                win, lose = outcomes[name]
+                mean = share @ (win[index] + lose[index]) / 2
+                square = share @ (win[index] ** 2 + lose[index] ** 2) / 2
+                self.mean[row, key] = mean
+                self.var[row, key] = max(square - mean ** 2, 0.0)
+            jump = self.mean[self.JUMP, key]
+            if jump > 0:
+                self.overshoot[key] = (self.var[self.JUMP, key] + jump ** 2) / (2 * jump)
+
+    def totals(self, keys, counts, capped_counts, rng):
+        """
+        counts 次未拦截 + capped_counts 次拦截后事件的各项收益之和，形状 (5, 玩家数)；
+        前 4 项加正态噪声，jump 只取期望 (只用来估计越线超出量)。
+        """
+        capped_keys = keys | 1
+        mean = counts * self.mean[:, keys] + capped_counts * self.mean[:, capped_keys]
+        var = counts * self.var[:self.JUMP, keys] + capped_counts * self.var[:self.JUMP, capped_keys]
+        mean[:self.JUMP] += rng.standard_normal(var.shape, dtype=np.float32) * np.sqrt(var)
+        return mean
+
+def _outcomes(table):
+    """每个选项 gamble 赢 / 输两种结果下的各项收益：{name: (win, lose)}"""
+    kind = table.effective_type()
+    value = np.nan_to_num(table.effect_value)
+    duration = np.nan_to_num(table.effect_duration)
+    zero = np.zeros(len(kind))
+
+    def pick(code, amount):
+        return np.where(kind == code, amount, 0.0)
+
+    qi = pick(GAIN_QI, value) - pick(LOSE_QI, value)
+    return {
+        "qi": (qi + pick(GAMBLE, value * f.GAMBLE_WIN_FACTOR), qi - pick(GAMBLE, value * f.GAMBLE_LOSE_FACTOR)),
+        "tap": (pick(GAIN_TAP_TEMP, value * duration) + pick(GAMBLE_TAP, value * duration),
+                pick(GAIN_TAP_TEMP, value * duration) + pick(GAMBLE_TAP, f.GAMBLE_TAP_LOSE_BONUS * duration)),
+        "auto": (pick(GAIN_AUTO_TEMP, value * duration) + pick(GAMBLE_AUTO, value * duration),
+                 pick(GAIN_AUTO_TEMP, value * duration)),
+        "halved": (zero, pick(GAMBLE_AUTO, duration)),
+        "jump": (pick(GAIN_QI, value) + pick(GAMBLE, value * f.GAMBLE_WIN_FACTOR), pick(GAIN_QI, value)),
+    }
+
+def _choice_shares(table, positions, weights, choice_policy, best):
+    """候选事件 -> (选项下标, 每个选项被选中的概率)；没有选项的事件不占任何选项"""
+    share = np.ones(len(positions)) if weights is None else weights.astype(float)
+    share = share / share.sum()
+    counts = table.choice_count[positions]
+    if choice_policy == "random":
+        repeats = counts
+        offsets = np.arange(repeats.sum()) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        index = np.repeat(table.choice_start[positions], repeats) + offsets
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return index, np.repeat(share / counts, repeats)
+    has = counts > 0
+    offsets = np.zeros(len(positions), dtype=np.int64) if choice_policy == "first" else best[positions]
+    return (table.choice_start[positions] + offsets)[has], share[has]
+
+# ==========================================
+# 玩家状态与突破
+# ==========================================
+
+class Players:
+    """N 个玩家的状态数组；时间单位为秒"""
+
+    def __init__(self, count, charms=0):
+        self.id = np.arange(count)
+        self.time = np.zeros(count)
+        self.level = np.ones(count, dtype=np.int64)
+        self.qi = np.zeros(count)
+        self.failures = np.zeros(count, dtype=np.int64)
+        self.charms = np.full(count, charms, dtype=np.int64)
+        self.tap_bonus = np.zeros(count)
+        self.tap_expire = np.zeros(count)
+        self.auto_bonus = np.zeros(count)
+        self.auto_expire = np.zeros(count)
+        self.debuff = np.ones(count)
+        self.debuff_expire = np.zeros(count)
+        self.next_event = np.zeros(count)
+
+    def take(self, keep):
+        for name, value in vars(self).items():
+            setattr(self, name, value[keep])
+
+class SimulationResult:
+    """
+    stage_times[p, s]: 玩家 p 首次进入段位 s (等级 9s+1) 的时刻，未到达为 NaN；
+    finish_times[p]:   到达 144 级的时刻；
+    stage_seconds / stage_charms_granted / stage_charms_used[s]: 所有玩家在段位 s 的在线时长与护身符进出。
+    """
+
+    def __init__(self, count):
+        self.stage_times = np.full((count, f.STAGE_COUNT), np.nan)
+        self.stage_times[:, 0] = 0.0
+        self.finish_times = np.full(count, np.nan)
+        self.stats = {"rounds": 0, "events": 0, "breaks": 0, "failures": 0, "pity": 0,
+                      "tribulations": 0, "charms_used": 0, "charms_granted": 0}
+        self.stage_seconds = np.zeros(f.STAGE_COUNT)
+        self.stage_charms_granted = np.zeros(f.STAGE_COUNT, dtype=np.int64)
+        self.stage_charms_used = np.zeros(f.STAGE_COUNT, dtype=np.int64)
+
+    def add_stage(self, name, stage, values=None):
+        """按段位累加 (values 为每个玩家的量，为空时按人数计)"""
+        total = getattr(self, name)
+        total += np.bincount(stage, weights=values, minlength=f.STAGE_COUNT).astype(total.dtype)
+
+def next_event_time(now, prob, rng):
+    """从 now 之后的下一次检测开始，按几何分布抽出下一次触发事件的检测时刻"""
+    checks = rng.geometric(prob)
+    return (np.floor(now / f.EVENT_CHECK_INTERVAL_SECONDS) + checks) * f.EVENT_CHECK_INTERVAL_SECONDS
+
+def attempt_breaks(p, rows, tables, tribulation_win, rng, result):
+    """attemptBreak (小层) / finalizeMiniGame (大境界) 的批量结算"""
+    level = p.level[rows]
+    major = tables.is_major[level]
+    pity = ~major & (p.failures[rows] >= f.PITY_FAILURES)
+    roll = rng.random(len(rows))
+    success = np.where(major, roll < tribulation_win, pity | (roll <= tables.break_success[level]))
+    stats = result.stats
+    stats["breaks"] += len(rows)
+    stats["tribulations"] += int(major.sum())
+    stats["pity"] += int(pity.sum())
+
+    won = rows[success]
+    cost = tables.break_cost[p.level[won]]
+    p.level[won] += 1
+    p.qi[won] = np.maximum(0.0, p.qi[won] - cost)
+    p.failures[won[~major[success]]] = 0
+    p.debuff_expire[won] = 0.0
+    p.next_event[won] = next_event_time(p.time[won], tables.event_probability[p.level[won]], rng)
+    entered = won[(p.level[won] - 1) % f.LEVELS_PER_STAGE == 0]
+    result.stage_times[p.id[entered], tables.stage[p.level[entered]]] = p.time[entered]
+
+    lost = rows[~success]
+    lost_major = major[~success]
+    stats["failures"] += len(lost)
+    p.failures[lost[~lost_major]] += 1
+    protected = p.charms[lost] > 0
+    p.charms[lost[protected]] -= 1
+    stats["charms_used"] += int(protected.sum())
+    result.add_stage("stage_charms_used", tables.stage[p.level[lost]], protected)
+    hurt = lost[~protected]
+    p.qi[hurt] *= 1.0 - tables.break_fail_penalty[p.level[hurt]]
+    # attemptBreak 只在没有 debuff 时附加；finalizeMiniGame 直接覆盖
+    debuffed = p.time[hurt] < p.debuff_expire[hurt]
+    unstable = hurt[(p.level[hurt] >= f.DEBUFF_MIN_LEVEL) & (lost_major[~protected] | ~debuffed)]
+    p.debuff[unstable] = f.DEBUFF_MULTIPLIER
+    p.debuff_expire[unstable] = p.time[unstable] + f.DEBUFF_SECONDS
+
+def _finish(p, result, horizon):
+    finished = p.level >= f.MAX_LEVEL
+    result.finish_times[p.id[finished]] = p.time[finished]
+    done = finished | (p.time >= horizon)
+    if done.any():
+        p.take(~done)
+
+# ==========================================
+# 步进模型 (默认)
+# ==========================================
+
+def binomial(rng, counts, prob):
+    """二项分布；方差大时用正态近似 (NumPy 大 n 的二项抽样比正态慢好几倍)"""
+    prob = np.broadcast_to(prob, counts.shape)
+    mean = counts * prob
+    var = mean * (1.0 - prob)
+    result = np.zeros(len(counts), dtype=np.int64)
+    large = var > BINOMIAL_NORMAL_VAR
+    small = ~large & (mean > 0)
+    result[small] = rng.binomial(counts[small], prob[small])
+    noise = rng.standard_normal(int(large.sum())) * np.sqrt(var[large])
+    result[large] = np.clip(np.rint(mean[large] + noise), 0, counts[large])
+    return result
+
+def step_players(p, rows, checks, mix, tables, taps, rng, result):
+    """把 rows 这些玩家推进 checks 次事件检测的时长，越过突破消耗时退回到越线时刻"""
+    level = p.level[rows]
+    now = p.time[rows]
+    span = checks * f.EVENT_CHECK_INTERVAL_SECONDS
+    keys = tables.stage[level] * 2 + (p.charms[rows] >= si.CHARM_EVENT_BLOCK_THRESHOLD)
+    tap = tables.tap_gain[level] * taps
+    auto = tables.auto_gain[level]
+
+    # 基础收益，扣掉「道心不稳」覆盖的那一段
+    unstable = np.clip(p.debuff_expire[rows] - now, 0.0, span) * (p.debuff[rows] < 1.0)
+    base = (tap + auto) * (span - (1.0 - p.debuff[rows]) * unstable)
+
+    triggered = binomial(rng, checks, tables.event_probability[level])
+    triggered[mix.empty[keys]] = 0
+    # 护身符攒到拦截线之后的事件改从拦截后的池子里抽 (按期望在第几次事件攒满来拆分)
+    room = np.maximum(si.CHARM_EVENT_BLOCK_THRESHOLD - p.charms[rows], 0)
+    grant = mix.grant[keys]
+    blocking = (room > 0) & (grant * triggered > room) & (mix.grant[keys | 1] == 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        before = np.where(blocking, np.minimum(np.ceil(room / grant), triggered), triggered).astype(np.int64)
+    after = triggered - before
+
+    qi, tap_seconds, auto_seconds, halved, jumps = mix.totals(keys, before, after, rng)
+    gain = base + qi + tap * tap_seconds + auto * np.maximum(auto_seconds, 0.0)
+    gain -= (1.0 - f.GAMBLE_AUTO_LOSE_MULTIPLIER) * (tap + auto) * np.maximum(halved, 0.0)
+
+    start = p.qi[rows]
+    end = np.maximum(0.0, start + gain)
+    cost = tables.break_cost[level]
+    crossed = end >= cost
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = np.where(crossed, np.clip((cost - start) / (end - start), 0.0, 1.0), 1.0)
+    p.time[rows] = now + share * span
+    # 越线那一下多半是事件跳过去的，按事件收益占比补上平均超出量
+    overshoot = mix.overshoot[keys] * jumps / np.maximum(jumps + base, 1e-300)
+    p.qi[rows] = np.where(crossed, cost + np.minimum(overshoot, end - cost), end)
+
+    # 退回的那一段里的事件不算
+    with np.errstate(divide="ignore", invalid="ignore"):
+        grant = np.where(triggered > 0, (before * grant + after * mix.grant[keys | 1]) / triggered, 0.0)
+    granted = binomial(rng, triggered, grant * share)
+    granted = np.where(blocking, np.minimum(granted, room), granted)
+    p.charms[rows] += granted
+    result.stats["charms_granted"] += int(granted.sum())
+    stage = tables.stage[level]
+    result.add_stage("stage_charms_granted", stage, granted)
+    result.add_stage("stage_seconds", stage, share * span)
+    result.stats["events"] += int(np.round(triggered * share).sum())
+
+def simulate(events, players=100000, seed=0, taps=0.5, tribulation_win=0.8, choice_policy="random",
+             weighted=False, charms=0, reincarnation=0, max_days=365.0, table=None):
+    """步进模型：把 players 个玩家从 1 级推进到 144 级 (或 max_days 天)，返回 SimulationResult"""
+    rng = np.random.default_rng(seed)
+    tables = f.LevelTables(reincarnation)
+    table = table or EventTable(events, weighted)
+    mix = EventMix(table, choice_policy)
+    result = SimulationResult(players)
+    p = Players(players, charms)
+    horizon = max_days * DAY
+    interval = f.EVENT_CHECK_INTERVAL_SECONDS
+
+    while len(p.id):
+        result.stats["rounds"] += 1
+        breaking = np.flatnonzero(p.qi >= tables.break_cost[p.level])
+        if len(breaking):
+            attempt_breaks(p, breaking, tables, tribulation_win, rng, result)
+            # 刚升到满级的玩家在突破时刻就结束，不能再走一步
+            _finish(p, result, horizon)
+            if not len(p.id):
+                break
+
+        stepping = np.flatnonzero(p.qi < tables.break_cost[p.level])
+        level = p.level[stepping]
+        keys = tables.stage[level] * 2 + (p.charms[stepping] >= si.CHARM_EVENT_BLOCK_THRESHOLD)
+        # 预计够突破的时长：基础收益 + 事件即时灵气期望 (为负时不计)
+        cost = tables.break_cost[level]
+        rate = tables.tap_gain[level] * taps + tables.auto_gain[level]
+        rate = rate + tables.event_probability[level] / interval * np.maximum(mix.mean[mix.QI, keys], 0.0)
+        seconds = np.maximum((cost - p.qi[stepping]) * STEP_SHARE, cost * MIN_STEP_SHARE) / rate
+        remaining = np.maximum(np.ceil((horizon - p.time[stepping]) / interval), 1)
+        checks = np.minimum(np.maximum(np.ceil(seconds / interval), 1), remaining).astype(np.int64)
+        step_players(p, stepping, checks, mix, tables, taps, rng, result)
+        _finish(p, result, horizon)
+    return result
+
+# ==========================================
+# 逐事件模型 (--exact)
+# ==========================================
+
+def gain_rate(p, tables, taps):
+    """当前每秒灵气 = (点击收益 * 点击频率 + 自动收益) * debuff，与 getCurrentTapGain / getCurrentAutoGain 一致"""
+    now = p.time
+    tap = tables.tap_gain[p.level] * (1.0 + np.where(now < p.tap_expire, p.tap_bonus, 0.0))
+    auto = tables.auto_gain[p.level] * (1.0 + np.where(now < p.auto_expire, p.auto_bonus, 0.0))
+    return (tap * taps + auto) * np.where(now < p.debuff_expire, p.debuff, 1.0)
+
+def apply_events(p, rows, table, choice_policy, best, tables, rng, result):
+    """triggerRandomEvent + selectEventChoice + applyEventEffect 的批量结算"""
+    stage = tables.stage[p.level[rows]]
+    capped = (p.charms[rows] >= si.CHARM_EVENT_BLOCK_THRESHOLD).astype(np.int64)
+    events = table.draw(stage, capped, rng)
+    p.next_event[rows] = next_event_time(p.time[rows], tables.event_probability[p.level[rows]], rng)
+    keep = events >= 0
+    result.stats["events"] += int(keep.sum())
+    keep &= table.choice_count[np.maximum(events, 0)] > 0
+    rows = rows[keep]
+    events = events[keep]
+
+    index = choose(table, events, choice_policy, best, rng)
+    kind = table.effect_type[index]
+    value = table.effect_value[index]
+    duration = table.effect_duration[index]
+    has_value = ~np.isnan(value)
+    timed = has_value & ~np.isnan(duration)
+    now = p.time[rows]
+    win = rng.random(len(rows)) < f.GAMBLE_WIN_RATE
+
+    sel = (kind == GAIN_QI) & has_value
+    p.qi[rows[sel]] += value[sel]
+    sel = (kind == LOSE_QI) & has_value
+    p.qi[rows[sel]] = np.maximum(0.0, p.qi[rows[sel]] - value[sel])
+    sel = (kind == GAMBLE) & has_value
+    gain = np.where(win, value * f.GAMBLE_WIN_FACTOR, -value * f.GAMBLE_LOSE_FACTOR)
+    p.qi[rows[sel]] = np.maximum(0.0, p.qi[rows[sel]] + gain[sel])
+    sel = kind == GRANT_ITEM
+    p.charms[rows[sel]] += 1
+    result.stats["charms_granted"] += int(sel.sum())
+    result.add_stage("stage_charms_granted", tables.stage[p.level[rows[sel]]])
+
+    # 临时 Buff 智能叠加：未过期时剩余时间 + 新时长、倍率取高
+    for code, bonus_name, expire_name in ((GAIN_TAP_TEMP, "tap_bonus", "tap_expire"),
+                                          (GAIN_AUTO_TEMP, "auto_bonus", "auto_expire")):
+        sel = (kind == code) & timed
+        target = rows[sel]
+        bonus, expire = getattr(p, bonus_name), getattr(p, expire_name)
+        active = now[sel] < expire[target]
+        new_bonus = np.where(active, np.maximum(bonus[target], value[sel]), value[sel])
+        expire[target] = np.where(active, expire[target], now[sel]) + duration[sel]
+        bonus[target] = new_bonus
+
+    sel = (kind == GAMBLE_TAP) & timed
+    target = rows[sel]
+    p.tap_bonus[target] = np.where(win[sel], value[sel], f.GAMBLE_TAP_LOSE_BONUS)
+    p.tap_expire[target] = now[sel] + duration[sel]
+
+    sel = (kind == GAMBLE_AUTO) & timed
+    won, lost = sel & win, sel & ~win
+    p.auto_bonus[rows[won]] = value[won]
+    p.auto_expire[rows[won]] = now[won] + duration[won]
+    p.debuff[rows[lost]] = f.GAMBLE_AUTO_LOSE_MULTIPLIER
+    p.debuff_expire[rows[lost]] = now[lost] + duration[lost]
+
+def simulate_exact(events, players=2000, seed=0, taps=0.5, tribulation_win=0.8, choice_policy="random",
+                   weighted=False, charms=0, reincarnation=0, max_days=365.0, table=None):
+    """逐事件模型，参数与 simulate 相同"""
+    rng = np.random.default_rng(seed)
+    tables = f.LevelTables(reincarnation)
+    table = table or EventTable(events, weighted)
+    best = best_choices(table) if choice_policy == "best" else None
+    result = SimulationResult(players)
+    p = Players(players, charms)
+    p.next_event = next_event_time(p.time, tables.event_probability[p.level], rng)
+    horizon = max_days * DAY
+
+    while len(p.id):
+        result.stats["rounds"] += 1
+        rate = gain_rate(p, tables, taps)
+        cost = tables.break_cost[p.level]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            afford = p.time + np.where(p.qi >= cost, 0.0, (cost - p.qi) / rate)
+        now = p.time
+        expire = np.minimum(np.minimum(np.where(p.tap_expire > now, p.tap_expire, np.inf),
+                                       np.where(p.auto_expire > now, p.auto_expire, np.inf)),
+                            np.where(p.debuff_expire > now, p.debuff_expire, np.inf))
+        target = np.minimum(np.minimum(afford, p.next_event), np.minimum(expire, horizon))
+        p.qi += rate * (target - now)
+        result.add_stage("stage_seconds", tables.stage[p.level], target - now)
+        p.time = target
+
+        breaking = np.flatnonzero(afford <= target)
+        if len(breaking):
+            p.qi[breaking] = np.maximum(p.qi[breaking], cost[breaking])
+            attempt_breaks(p, breaking, tables, tribulation_win, rng, result)
+        # 同一时刻既够突破又有事件时先突破，事件留到下一轮 (时间不变) 再结算
+        triggered = np.flatnonzero((p.next_event <= target) & (afford > target))
+        if len(triggered):
+            apply_events(p, triggered, table, choice_policy, best, tables, rng, result)
+        _finish(p, result, horizon)
+    return result
+
+# ==========================================
+# 汇总输出
+# ==========================================
+
+PERCENTILES = (10, 50, 90, 99)
+
+def summarize(result):
+    """每个段位：到达比例与到达时刻分位数 (秒)"""
+    rows = []
+    columns = [result.stage_times[:, s] for s in range(f.STAGE_COUNT)] + [result.finish_times]
+    names = list(g.STAGES) + [f"满级 {f.MAX_LEVEL}"]
+    for name, times in zip(names, columns):
+        reached = times[~np.isnan(times)]
+        row = {"stage": name, "reached": len(reached) / len(times)}
+        for q in PERCENTILES:
+            row[f"p{q}"] = float(np.percentile(reached, q)) if len(reached) else None
+        rows.append(row)
+    return rows
+
+def format_duration(seconds):
+    if seconds is None:
+        return "-"
+    if seconds < 3600:
+        return f"{seconds / 60:.1f}m"
+    if seconds < DAY:
+        return f"{seconds / 3600:.1f}h"
+    return f"{seconds / DAY:.1f}d"
+
+def print_summary(rows, result, players, seconds):
+    stats = result.stats
+    print(f"📊 {players:,} 个玩家，{stats['rounds']:,} 轮，耗时 {seconds:.1f}s")
+    print(f"   事件 {stats['events'] / players:,.0f} 次/人，突破 {stats['breaks'] / players:,.1f} 次/人 "
+          f"(失败 {stats['failures'] / players:.1f}，保底 {stats['pity'] / players:.2f})，"
+          f"护身符 获得 {stats['charms_granted'] / players:.1f} / 消耗 {stats['charms_used'] / players:.1f} 个/人")
+    header = "".join(f"{'p' + str(q):>10}" for q in PERCENTILES)
+    print(f"   {'段位':<10}{'到达':>8}{header}")
+    for row in rows:
+        cells = "".join(f"{format_duration(row['p' + str(q)]):>10}" for q in PERCENTILES)
+        print(f"   {row['stage']:<10}{row['reached']:>8.1%}{cells}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="玩家成长蒙特卡洛模拟：各段位的到达时间分布 (在线时长)")
+    parser.add_argument("json_path", help="events.json")
+    parser.add_argument("--players", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--taps", type=float, default=0.5, help="每秒点击次数")
+    parser.add_argument("--tribulation-win", type=float, default=0.8, help="渡劫小游戏胜率")
+    parser.add_argument("--choice", choices=CHOICE_POLICIES, default="random",
+                        help="事件选项策略：random 等概率 / first 总选第一个 / best 即时灵气期望最高")
+    parser.add_argument("--weighted", action="store_true", help="按 rarity 权重抽事件 (Swift 目前均匀抽)")
+    parser.add_argument("--charms", type=int, default=0, help="初始护身符数量")
+    parser.add_argument("--reincarnation", type=int, default=0)
+    parser.add_argument("--max-days", type=float, default=365.0, help="模拟时长上限 (天)")
+    parser.add_argument("--exact", action="store_true", help="逐个事件模拟 (慢，建议 --players 2000 以内)")
+    parser.add_argument("--json", dest="json_output", help="把分位数表写到该文件")
+    args = parser.parse_args(argv)
+
+    with open(args.json_path, encoding="utf-8") as file:
+        events = json.load(file)
+    run = simulate_exact if args.exact else simulate
+    start = time.perf_counter()
+    result = run(events, args.players, args.seed, args.taps, args.tribulation_win, args.choice,
+                 args.weighted, args.charms, args.reincarnation, args.max_days)
+    seconds = time.perf_counter() - start
+    rows = summarize(result)
+    print_summary(rows, result, args.players, seconds)
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as file:
+            json.dump({"players": args.players, "seed": args.seed, "exact": args.exact,
+                       "stats": result.stats, "stages": rows}, file, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
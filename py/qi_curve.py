@@ -0,0 +1,101 @@
+import argparse
+import math
+import random
+
+# ==========================================
+# 灵气奖励曲线
+# ==========================================
+# 各版本 calculate_qi_gain 的公式都是：
+#   段位基准 = base * growth ^ stage_idx * (各段加成系数)
+#   最终值   = 取整(int(段位基准 * 随机抖动))
+# 段位基准只和 stage_idx 有关，这里一次性算好 16 个值，
+# 生成循环和数值工具只做查表 + 抖动 + 取整，不再每个事件算一遍 pow。
+
+STAGE_COUNT = 16
+
+class QiRewardCurve:
+    """
+    tiers:    [(最后一个段位, base, growth), ...]，按段位升序
+    bonuses:  [(起始段位, 结束段位, factor, offset), ...]，区间内乘 factor ^ (stage_idx - offset)
+    jitter:   随机抖动区间 (low, high)
+    coarse_threshold: 超过该值按 100 取整，否则按 10 取整；None 表示始终按 10 取整
+    """
+
+    def __init__(self, tiers, bonuses=(), jitter=(0.8, 1.2), coarse_threshold=10000):
+        self.tiers = [tuple(tier) for tier in tiers]
+        self.bonuses = [tuple(bonus) for bonus in bonuses]
+        self.jitter = tuple(jitter)
+        self.coarse_threshold = coarse_threshold
+        self.base_values = tuple(self._compute_base(stage_idx) for stage_idx in range(STAGE_COUNT))
+
+    def _compute_base(self, stage_idx):
+        """与原 calculate_qi_gain 相同的运算顺序，保证浮点结果逐位一致"""
+        for last_stage, base, growth in self.tiers:
+            if stage_idx <= last_stage:
+                break
+        val = base * math.pow(growth, stage_idx)
+        for first_stage, last_stage, factor, offset in self.bonuses:
+            if first_stage <= stage_idx <= last_stage:
+                val *= math.pow(factor, stage_idx - offset)
+        return val
+
+    def round_reward(self, final_val):
+        """10 / 100 取整"""
+        if self.coarse_threshold is not None and final_val > self.coarse_threshold:
+            return (final_val // 100) * 100
+        return (final_val // 10) * 10
+
+    def sample(self, stage_idx, rng=random):
+        """单个事件：查表 + 抖动 + 取整 (随机数消耗与原 calculate_qi_gain 一致)"""
+        final_val = int(self.base_values[stage_idx] * rng.uniform(*self.jitter))
+        return self.round_reward(final_val)
+
+    def sample_batch(self, stage_idx, jitter):
+        """批量：jitter 为 NumPy 抖动系数数组，返回取整后的 int64 数组"""
+        final_val = (self.base_values[stage_idx] * jitter).astype("int64")
+        rewards = final_val // 10 * 10
+        if self.coarse_threshold is not None:
+            coarse = final_val > self.coarse_threshold
+            rewards[coarse] = final_val[coarse] // 100 * 100
+        return rewards
+
+    def expected_reward(self, stage_idx):
+        """不计取整的期望奖励 (抖动均值 * 段位基准)"""
+        low, high = self.jitter
+        return self.base_values[stage_idx] * (low + high) / 2
+
+    def to_dict(self):
+        return {
+            "tiers": [list(tier) for tier in self.tiers],
+            "bonuses": [list(bonus) for bonus in self.bonuses],
+            "jitter": list(self.jitter),
+            "coarse_threshold": self.coarse_threshold,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            tiers=data["tiers"],
+            bonuses=data.get("bonuses", ()),
+            jitter=data.get("jitter", (0.8, 1.2)),
+            coarse_threshold=data.get("coarse_threshold", 10000),
+        )
+
+def print_curve(curve, stage_names=None):
+    """打印每个段位的基准值与抖动后的取值范围"""
+    low, high = curve.jitter
+    print(f"{'段位':<8}{'基准值':>18}{'最小':>18}{'最大':>18}")
+    for stage_idx, base in enumerate(curve.base_values):
+        name = stage_names[stage_idx] if stage_names else str(stage_idx)
+        print(f"{name:<8}{base:>18,.0f}{curve.round_reward(int(base * low)):>18,}"
+              f"{curve.round_reward(int(base * high)):>18,}")
+
+def main(argv=None):
+    import generate_events12 as g
+
+    parser = argparse.ArgumentParser(description="打印事件灵气奖励曲线")
+    parser.parse_args(argv)
+    print_curve(g.QI_CURVE, g.STAGES)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import game_formulas as f
+import generate_events12 as g
+from profile_engine import load_profile_file
+from qi_curve import STAGE_COUNT, QiRewardCurve
+
+# ==========================================
+# 灵气奖励曲线系数调优
+# ==========================================
+# generate_events12 的 QI_CURVE：三段 (base, growth) 加上中期 2.2^(s-6)、后期 1.8^(s-12) 两段补偿，
+# 都是十二个版本里手调出来的。这里固定曲线结构 (分段边界、补偿区间与 offset)，
+# 搜索每段的 base / growth 和每段补偿的 factor，让每个等级的
+#   期望奖励 (段位基准 * 抖动均值) / breakCost(level)
+# 贴近目标比例。目标按段位给 (log 空间线性插值)，默认全程 1%。
+#
+# 不计取整和递增约束时这是个线性最小二乘，先解出来当起点；
+# 再用交叉熵法：每一代在 log 参数空间里围绕当前均值采样一批候选，取前 elite 更新均值 / 方差。
+# 候选先取整到「人会写的」精度 (base 三位有效数字、系数两位小数)，按取整后的参数缓存曲线和目标值，
+# 收敛阶段大量重复候选直接命中缓存；未命中的平均切成 jobs 块分给进程池，每块在 NumPy 里一次算完。
+# 结果写成 profile_engine.load_profile_file 能读的 profile：{"name", "base", "qi_curve"}。
+
+DEFAULT_TARGET = "0:0.01"
+GROWTH_BOUNDS = (1.0, 6.0)   # 同段位内 breakCost 每段涨 1.18^9 ≈ 4.4 倍
+BASE_BOUNDS = (1.0, 1e7)
+
+def parse_target(text):
+    """"0:0.3,6:0.03,12:0.01" -> 16 个段位的目标比例 (log 线性插值，两端取端点值)"""
+    points = sorted((int(stage), float(ratio)) for stage, ratio in
+                    (item.split(":") for item in text.split(",")))
+    stages, ratios = zip(*points)
+    return 10 ** np.interp(np.arange(STAGE_COUNT), stages, np.log10(ratios))
+
+class CurveSpace:
+    """
+    曲线结构 + 参数向量之间的换算。
+    参数 = [base_0, growth_0, base_1, growth_1, ..., factor_0, factor_1, ...]，对应 tiers 与 bonuses 的顺序。
+    """
+
+    def __init__(self, curve):
+        self.curve = curve
+        self.tiers = curve.tiers
+        self.bonuses = curve.bonuses
+        stages = np.arange(STAGE_COUNT)
+        self.stage_tier = np.searchsorted([last for last, _, _ in self.tiers], stages)
+        self.bonus_masks = [(first <= stages) & (stages <= last) for first, last, _, _ in self.bonuses]
+        self.bonus_powers = [stages - offset for _, _, _, offset in self.bonuses]
+        self.is_base = np.array([True, False] * len(self.tiers) + [False] * len(self.bonuses))
+        self.mean_jitter = sum(curve.jitter) / 2
+
+    def params(self, curve=None):
+        curve = curve or self.curve
+        values = [value for _, base, growth in curve.tiers for value in (base, growth)]
+        return np.array(values + [factor for _, _, factor, _ in curve.bonuses], dtype=float)
+
+    def build(self, params):
+        """参数向量 -> QiRewardCurve (结构与起点曲线相同)"""
+        tiers = [(last, _clean(params[2 * k]), _clean(params[2 * k + 1])) for k, (last, _, _) in enumerate(self.tiers)]
+        offset = 2 * len(self.tiers)
+        bonuses = [(first, last, _clean(params[offset + j]), power)
+                   for j, (first, last, _, power) in enumerate(self.bonuses)]
+        return QiRewardCurve(tiers, bonuses, self.curve.jitter, self.curve.coarse_threshold)
+
+    def base_values(self, params):
+        """(K, 参数) -> (K, 16) 段位基准值，与 QiRewardCurve._compute_base 相同的公式"""
+        stages = np.arange(STAGE_COUNT)
+        base = params[:, 2 * self.stage_tier] * params[:, 2 * self.stage_tier + 1] ** stages
+        offset = 2 * len(self.tiers)
+        for j, (mask, power) in enumerate(zip(self.bonus_masks, self.bonus_powers)):
+            base[:, mask] *= params[:, offset + j, None] ** power[mask]
+        return base
+
+    def snap(self, params):
+        """取整到 base 三位有效数字、growth / factor 两位小数，并夹到边界内"""
+        params = params.copy()
+        base = np.clip(params[:, self.is_base], *BASE_BOUNDS)
+        scale = 10.0 ** (np.floor(np.log10(base)) - 2)
+        params[:, self.is_base] = np.round(base / scale) * scale
+        params[:, ~self.is_base] = np.round(np.clip(params[:, ~self.is_base], *GROWTH_BOUNDS), 2)
+        return params
+
+def _clean(value):
+    value = float(value)
+    return int(value) if value.is_integer() else round(value, 6)
+
+class Objective:
+    """
+    每个等级 log10(期望奖励 / breakCost / 目标比例) 的加权均方，加上两项约束：
+      - 段位基准必须随段位递增，下降的部分按 monotone 加罚；
+      - stay * 参数离起点的 log 距离平方，避免为了一点点拟合改得面目全非。
+    """
+
+    def __init__(self, space, target, stay=0.01, monotone=10.0, stage_weights=None):
+        levels = np.arange(1, f.MAX_LEVEL + 1)
+        self.space = space
+        self.level_stage = f.stage_of(levels)
+        self.log_target = np.log10(target[self.level_stage] * f.break_cost(levels))
+        weights = np.ones(STAGE_COUNT) if stage_weights is None else np.asarray(stage_weights, dtype=float)
+        self.level_weights = weights[self.level_stage] / weights[self.level_stage].sum()
+        self.log_anchor = np.log(space.params())
+        self.stay = stay
+        self.monotone = monotone
+
+    def least_squares(self):
+        """
+        log 奖励对 log 参数是线性的，不计取整和递增约束时目标值就是带岭项的加权最小二乘，
+        直接解出来给交叉熵搜索当起点 (从手调系数出发要挪好几个数量级，CEM 容易中途收缩)。
+        """
+        count = len(self.log_anchor)
+        design = np.zeros((STAGE_COUNT, count))
+        stages = np.arange(STAGE_COUNT)
+        design[stages, 2 * self.space.stage_tier] = 1.0
+        design[stages, 2 * self.space.stage_tier + 1] = stages
+        offset = 2 * len(self.space.tiers)
+        for j, (mask, power) in enumerate(zip(self.space.bonus_masks, self.space.bonus_powers)):
+            design[mask, offset + j] = power[mask]
+        design = design[self.level_stage] / math.log(10)
+        rhs = self.log_target - math.log10(self.space.mean_jitter)
+        sqrt_weights = np.sqrt(self.level_weights)[:, None]
+        ridge = math.sqrt(max(self.stay, 1e-9))
+        lhs = np.vstack([design * sqrt_weights, ridge * np.eye(count)])
+        rhs = np.concatenate([(rhs - design @ self.log_anchor) * sqrt_weights[:, 0], np.zeros(count)])
+        delta = np.linalg.lstsq(lhs, rhs, rcond=None)[0]
+        return np.exp(self.log_anchor + delta)
+
+    def __call__(self, params):
+        """(K, 参数) -> (目标值 (K,), 段位基准 (K, 16))"""
+        base = self.space.base_values(params)
+        log_reward = np.log10(base * self.space.mean_jitter)
+        error = log_reward[:, self.level_stage] - self.log_target
+        loss = (error ** 2) @ self.level_weights
+        loss += self.monotone * (np.maximum(-np.diff(log_reward, axis=1), 0.0) ** 2).sum(axis=1)
+        loss += self.stay * ((np.log(params) - self.log_anchor) ** 2).sum(axis=1)
+        return loss, base
+
+def _evaluate_chunk(task):
+    objective, params = task
+    return objective(params)
+
+class Tuner:
+    """交叉熵搜索 + 候选缓存 (键为取整后的参数元组，值为 (目标值, 段位基准))"""
+
+    def __init__(self, objective, population=2000, elite=0.05, jobs=1, seed=0):
+        self.objective = objective
+        self.space = objective.space
+        self.population = population
+        self.elite = max(2, int(population * elite))
+        self.jobs = jobs
+        self.rng = np.random.default_rng(seed)
+        self.cache = {}
+        self.hits = 0
+        self.evaluated = 0
+
+    def evaluate(self, params, pool=None):
+        keys = [tuple(row) for row in params.tolist()]
+        missing = list(dict.fromkeys(key for key in keys if key not in self.cache))
+        self.hits += len(keys) - len(missing)
+        if missing:
+            self.evaluated += len(missing)
+            batch = np.array(missing)
+            chunks = np.array_split(batch, min(self.jobs, len(batch)))
+            tasks = [(self.objective, chunk) for chunk in chunks]
+            results = pool.map(_evaluate_chunk, tasks) if pool else map(_evaluate_chunk, tasks)
+            for chunk, (loss, base) in zip(chunks, results):
+                for key, value, curve in zip(map(tuple, chunk.tolist()), loss, base):
+                    self.cache[key] = (float(value), curve)
+        return np.array([self.cache[key][0] for key in keys])
+
+    def run(self, start, generations=60, sigma=0.3, tolerance=1e-3, log=None):
+        """从参数向量 start 出发，返回 (最优参数向量, 目标值)；log(代数, 最优目标值, sigma 均值) 用于打印进度"""
+        best = self.space.snap(np.asarray(start, dtype=float)[None, :])
+        mean = np.log(best[0])
+        std = np.full(len(mean), sigma)
+        pool = ProcessPoolExecutor(max_workers=self.jobs) if self.jobs > 1 else None
+        try:
+            best_loss = self.evaluate(best, pool)[0]
+            for generation in range(generations):
+                samples = mean + std * self.rng.standard_normal((self.population, len(mean)))
+                params = self.space.snap(np.exp(samples))
+                loss = self.evaluate(params, pool)
+                order = np.argsort(loss)[:self.elite]
+                if loss[order[0]] < best_loss:
+                    best_loss, best = loss[order[0]], params[order[:1]]
+                elite = np.log(params[order])
+                mean = 0.7 * elite.mean(axis=0) + 0.3 * mean
+                std = 0.7 * elite.std(axis=0) + 0.3 * std
+                if log:
+                    log(generation, best_loss, float(std.mean()))
+                if std.max() < tolerance:
+                    break
+        finally:
+            if pool:
+                pool.shutdown()
+        return best[0], best_loss
+
+def curve_rows(curve, target):
+    """每个段位：基准值、期望奖励 / 段内 breakCost 几何均值、目标比例"""
+    rows = []
+    for stage in range(STAGE_COUNT):
+        levels = np.arange(stage * f.LEVELS_PER_STAGE + 1, (stage + 1) * f.LEVELS_PER_STAGE + 1)
+        cost = math.exp(np.log(f.break_cost(levels)).mean())
+        rows.append((g.STAGES[stage], curve.base_values[stage], curve.expected_reward(stage) / cost, target[stage]))
+    return rows
+
+def print_comparison(before, after, target):
+    print(f"{'段位':<8}{'原基准值':>18}{'原比例':>10}{'新基准值':>18}{'新比例':>10}{'目标':>10}")
+    for (name, old_base, old_ratio, goal), (_, new_base, new_ratio, _) in zip(
+            curve_rows(before, target), curve_rows(after, target)):
+        print(f"{name:<8}{old_base:>18,.0f}{old_ratio:>10.3%}{new_base:>18,.0f}{new_ratio:>10.3%}{goal:>10.3%}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="搜索 calculate_qi_gain 的分段系数，使奖励 / 突破消耗贴近目标比例")
+    parser.add_argument("--target", default=DEFAULT_TARGET,
+                        help="目标比例 段位:比例,...，段位间 log 线性插值，如 0:0.3,6:0.03,12:0.01")
+    parser.add_argument("--start", metavar="PATH", help="起点 profile 文件 (默认 generate_events12 的 QI_CURVE)")
+    parser.add_argument("--generations", type=int, default=60)
+    parser.add_argument("--population", type=int, default=2000)
+    parser.add_argument("--stay", type=float, default=0.01, help="离起点系数的 log 距离惩罚权重")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="并行进程数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--name", default="v12-tuned", help="输出 profile 的名字")
+    parser.add_argument("-o", "--output", default="qi_tuned.json", help="输出 profile 文件")
+    args = parser.parse_args(argv)
+
+    start_curve = load_profile_file(args.start).qi_curve if args.start else g.QI_CURVE
+    target = parse_target(args.target)
+    space = CurveSpace(start_curve)
+    objective = Objective(space, target, args.stay)
+    tuner = Tuner(objective, args.population, jobs=args.jobs, seed=args.seed)
+
+    def log(generation, loss, sigma):
+        if generation % 10 == 0:
+            print(f"   第 {generation:>3} 代  目标值 {loss:.5f}  sigma {sigma:.4f}")
+
+    start = time.perf_counter()
+    initial = tuner.evaluate(space.params()[None, :])[0]
+    params, loss = tuner.run(objective.least_squares(), args.generations, log=log)
+    seconds = time.perf_counter() - start
+    curve = space.build(params)
+    print(f"⏱️  {seconds:.1f}s，计算 {tuner.evaluated:,} 个候选，缓存命中 {tuner.hits:,} 次；"
+          f"目标值 {initial:.5f} -> {loss:.5f}")
+    print_comparison(start_curve, curve, target)
+
+    profile = {
+        "name": args.name,
+        "base": "v12",
+        "qi_curve": curve.to_dict(),
+        "tuning": {"target": args.target, "objective": loss, "start_objective": initial},
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(profile, file, ensure_ascii=False, indent=2)
+    print(f"💾 {args.output} (python profile_engine.py v12 --profile-file {args.output} 生成对比)")
+
+if __name__ == "__main__":
+    main()
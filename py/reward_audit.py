@@ -0,0 +1,234 @@
+import argparse
+import heapq
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import game_formulas as f
+import generate_events12 as g
+from stage_index import STAGE_COUNT, resolve_window
+from validate_events import EventStream, split_points
+
+# ==========================================
+# 事件奖励 / 突破消耗 比例审计
+# ==========================================
+# calculate_qi_gain 的注释说后期事件奖励「大致维持在突破需求的 1% 左右」，这里把它量出来：
+# 每个带灵气数值的效果 (gain_qi / lose_qi / gamble)，在事件 minStage ~ maxStage 窗口内
+# 每个段位的 9 层上各算一次 value / breakCost(level)，按 (效果类型, 段位) 汇总分位数，
+# 并列出离目标比例最远的效果。
+#
+# breakCost 只和等级有关，先算成 (16, 9) 的表；事件用 validate_events.EventStream 流式读取，
+# 每攒一块效果就用 NumPy 一次算完所有段位 / 层的比例。比例取 log10 落进 0.01 dex 的直方图，
+# 分位数由直方图给出 (相对误差约 2%)，内存与池子大小无关。--jobs 按事件边界分段并行。
+
+QI_EFFECTS = ("gain_qi", "lose_qi", "gamble")
+QI_EFFECT_CODES = {name: code for code, name in enumerate(QI_EFFECTS)}
+
+COST_TABLE = f.break_cost(np.arange(1, STAGE_COUNT * f.LEVELS_PER_STAGE + 1)).reshape(
+    STAGE_COUNT, f.LEVELS_PER_STAGE)
+
+LOG_MIN = -9.0
+LOG_MAX = 6.0
+BIN_WIDTH = 0.01
+BINS = int(round((LOG_MAX - LOG_MIN) / BIN_WIDTH))
+BLOCK_EFFECTS = 50000
+PERCENTILES = (1, 10, 50, 90, 99)
+
+class RewardAudit:
+    """
+    hist[type, stage, bin]   log10(比例) 直方图，比例 <= 0 的计入 zero
+    low / high               低于 target / band、高于 target * band 的 (效果, 层) 数
+    lowest / highest         精确的最小 / 最大比例
+    outliers                 [(超出 dex, 事件 id, 字节偏移, 选项 id, 类型, value, 段位区间)]，按超出量取前 top 个
+    """
+
+    def __init__(self, target=0.01, band=10.0, top=20):
+        self.target = target
+        self.band = band
+        self.top = top
+        shape = (len(QI_EFFECTS), STAGE_COUNT)
+        self.hist = np.zeros(shape + (BINS,), dtype=np.int64)
+        self.zero = np.zeros(shape, dtype=np.int64)
+        self.low = np.zeros(shape, dtype=np.int64)
+        self.high = np.zeros(shape, dtype=np.int64)
+        self.lowest = np.full(shape, np.inf)
+        self.highest = np.full(shape, -np.inf)
+        self.outliers = []
+        self.events = 0
+        self.effects = 0
+        self._block = []
+
+    def add_event(self, offset, event):
+        self.events += 1
+        if not isinstance(event, dict) or not isinstance(event.get("choices"), list):
+            return
+        lo, hi = resolve_window(event)
+        for choice in event["choices"]:
+            effect = choice.get("effect") if isinstance(choice, dict) else None
+            if not isinstance(effect, dict):
+                continue
+            code = QI_EFFECT_CODES.get(effect.get("type"))
+            value = effect.get("value")
+            if code is None or value.__class__ not in (int, float):
+                continue
+            self._block.append((value, lo, hi, code, offset, event.get("id"), choice.get("id")))
+            if len(self._block) >= BLOCK_EFFECTS:
+                self.flush()
+
+    def flush(self):
+        if not self._block:
+            return
+        block, self._block = self._block, []
+        self.effects += len(block)
+        value, lo, hi, code = (np.array(column) for column in list(zip(*block))[:4])
+        value = value.astype(float)
+        low_limit = self.target / self.band
+        high_limit = self.target * self.band
+
+        for stage in range(STAGE_COUNT):
+            rows = np.flatnonzero((lo <= stage) & (stage <= hi))
+            if not len(rows):
+                continue
+            ratio = value[rows, None] / COST_TABLE[stage]
+            codes = np.repeat(code[rows], f.LEVELS_PER_STAGE)
+            ratio = ratio.ravel()
+            positive = ratio > 0
+            with np.errstate(divide="ignore"):
+                bins = np.clip(((np.log10(ratio[positive]) - LOG_MIN) / BIN_WIDTH).astype(np.int64), 0, BINS - 1)
+            types = len(QI_EFFECTS)
+            self.hist[:, stage] += np.bincount(codes[positive] * BINS + bins, minlength=types * BINS).reshape(types, BINS)
+            self.zero[:, stage] += np.bincount(codes[~positive], minlength=types)
+            self.low[:, stage] += np.bincount(codes[ratio < low_limit], minlength=types)
+            self.high[:, stage] += np.bincount(codes[ratio > high_limit], minlength=types)
+            np.minimum.at(self.lowest[:, stage], codes, ratio)
+            np.maximum.at(self.highest[:, stage], codes, ratio)
+
+        # 离目标区间最远的效果：窗口最低层的最大比例、窗口最高层的最小比例
+        with np.errstate(divide="ignore"):
+            above = np.log10(np.maximum(value, 0) / COST_TABLE[lo, 0] / high_limit)
+            below = np.log10(low_limit / (np.maximum(value, 0) / COST_TABLE[hi, -1]))
+        excess = np.maximum(np.maximum(above, below), 0.0)
+        candidates = np.flatnonzero(excess > 0)
+        if len(candidates) > self.top:
+            candidates = candidates[np.argpartition(-excess[candidates], self.top - 1)[:self.top]]
+        for index in candidates:
+            item_value, item_lo, item_hi, item_code, offset, event_id, choice_id = block[index]
+            self.outliers.append((float(excess[index]), event_id, offset, choice_id, QI_EFFECTS[item_code],
+                                  item_value, int(item_lo), int(item_hi)))
+        self.outliers = heapq.nlargest(self.top, self.outliers, key=lambda item: item[0])
+
+    def merge(self, other):
+        self.hist += other.hist
+        self.zero += other.zero
+        self.low += other.low
+        self.high += other.high
+        np.minimum(self.lowest, other.lowest, out=self.lowest)
+        np.maximum(self.highest, other.highest, out=self.highest)
+        self.outliers = heapq.nlargest(self.top, self.outliers + other.outliers, key=lambda item: item[0])
+        self.events += other.events
+        self.effects += other.effects
+
+    def rows(self):
+        """每个 (效果类型, 段位) 一行；分位数取直方图 bin 的中点，再夹到精确的最小 / 最大值之间"""
+        centers = 10 ** (LOG_MIN + (np.arange(BINS) + 0.5) * BIN_WIDTH)
+        rows = []
+        for code, name in enumerate(QI_EFFECTS):
+            for stage in range(STAGE_COUNT):
+                hist = self.hist[code, stage]
+                zero = int(self.zero[code, stage])
+                count = int(hist.sum()) + zero
+                if not count:
+                    continue
+                cumulative = zero + np.cumsum(hist)
+                row = {
+                    "type": name,
+                    "stage": g.STAGES[stage],
+                    "samples": count,
+                    "min": float(self.lowest[code, stage]),
+                    "max": float(self.highest[code, stage]),
+                    "below_share": int(self.low[code, stage]) / count,
+                    "above_share": int(self.high[code, stage]) / count,
+                }
+                for q in PERCENTILES:
+                    rank = q / 100 * count
+                    value = 0.0 if rank <= zero else centers[np.searchsorted(cumulative, rank)]
+                    row[f"p{q}"] = float(min(max(value, row["min"]), row["max"]))
+                rows.append(row)
+        return rows
+
+def audit_segment(file_path, start=0, limit=None, target=0.01, band=10.0, top=20):
+    audit = RewardAudit(target, band, top)
+    with open(file_path, "rb") as handle:
+        handle.seek(start)
+        for offset, event in EventStream(handle, start, limit):
+            audit.add_event(offset, event)
+    audit.flush()
+    return audit
+
+def _audit_segment_task(task):
+    return audit_segment(*task)
+
+def audit_file(file_path, target=0.01, band=10.0, top=20, jobs=1):
+    segments = split_points(file_path, jobs) if jobs > 1 else [(0, None)]
+    if len(segments) == 1:
+        return audit_segment(file_path, target=target, band=band, top=top)
+    tasks = [(file_path, start, limit, target, band, top) for start, limit in segments]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(_audit_segment_task, tasks))
+    audit = results[0]
+    for other in results[1:]:
+        audit.merge(other)
+    return audit
+
+def print_audit(audit, seconds):
+    print(f"📊 {audit.events:,} 个事件，{audit.effects:,} 个灵气效果，耗时 {seconds:.2f}s；"
+          f"目标比例 {audit.target:.2%}，正常区间 {audit.target / audit.band:.3%} ~ {audit.target * audit.band:.1%}")
+    header = "".join(f"{'p' + str(q):>10}" for q in PERCENTILES)
+    print(f"   {'类型':<10}{'段位':<8}{'样本':>10}{header}{'最小':>10}{'最大':>10}{'偏低':>8}{'偏高':>8}")
+    for row in audit.rows():
+        cells = "".join(f"{row['p' + str(q)]:>10.3%}" for q in PERCENTILES)
+        print(f"   {row['type']:<10}{row['stage']:<8}{row['samples']:>10,}{cells}"
+              f"{row['min']:>10.3%}{row['max']:>10.3%}{row['below_share']:>8.1%}{row['above_share']:>8.1%}")
+    if audit.outliers:
+        print(f"⚠️  离目标最远的 {len(audit.outliers)} 个效果 (超出正常区间的 dex)：")
+        for excess, event_id, offset, choice_id, name, value, lo, hi in audit.outliers:
+            print(f"   {excess:>6.2f}  字节 {offset} [{event_id}/{choice_id}] {name} {value:,} "
+                  f"{g.STAGES[lo]} ~ {g.STAGES[hi]}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="审计事件灵气奖励与突破消耗的比例 (按段位 / 效果类型)")
+    parser.add_argument("file", help="events.json")
+    parser.add_argument("--target", type=float, default=0.01, help="目标比例，默认 1%%")
+    parser.add_argument("--band", type=float, default=10.0, help="target / band ~ target * band 之外算离群")
+    parser.add_argument("--top", type=int, default=20, help="列出离目标最远的多少个效果")
+    parser.add_argument("--jobs", type=int, default=1, help="并行进程数，按事件边界把文件分段")
+    parser.add_argument("--json", dest="json_output", help="把分段统计写到该文件")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        audit = audit_file(args.file, args.target, args.band, args.top, args.jobs)
+    except ValueError as error:
+        print(f"❌ {args.file}: {error}", file=sys.stderr)
+        sys.exit(1)
+    print_audit(audit, time.perf_counter() - start)
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as file:
+            json.dump({
+                "target": audit.target,
+                "band": audit.band,
+                "events": audit.events,
+                "effects": audit.effects,
+                "rows": audit.rows(),
+                "outliers": [
+                    {"excess_dex": excess, "id": event_id, "offset": offset, "choice": choice_id,
+                     "type": name, "value": value, "min_stage": g.STAGES[lo], "max_stage": g.STAGES[hi]}
+                    for excess, event_id, offset, choice_id, name, value, lo, hi in audit.outliers
+                ],
+            }, file, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
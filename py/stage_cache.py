@@ -0,0 +1,136 @@
+import glob
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import generate_events12 as g
+import lexicon_sampler
+import qi_curve
+
+# ==========================================
+# 段位分片缓存 (增量生成)
+# ==========================================
+# 每个段位分片只依赖：所在档次的词库、模板与权重、奖励曲线、生成代码本身，
+# 以及 (seed, 数量, 起始编号, unique)。把这些输入做成 sha256 指纹，
+# 分片编码结果按指纹存盘；下次只重算指纹变了的段位，其余直接读缓存拼接。
+# 改一个 DATA_HIGH 的词只会让 high 档的 6 个段位重算。
+# seed 也在指纹里：不给 --seed 时沿用缓存目录里上次的种子，否则每次随机种子都不会命中。
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = ".event_cache"
+SEED_FILE = "seed"
+
+# 分片内容依赖的生成代码：改了这些函数，所有段位的缓存都会失效
+CODE_DEPENDENCIES = [
+    g.get_title_and_action_a,
+    g.get_level_key,
+    g.get_action_b_pool,
+    g.get_action_b_text,
+    g.UniqueStageText,
+    g.pick_template,
+    g.calculate_qi_gain,
+    g.build_effect,
+    g.polish_choice_text,
+    g.event_fields,
+    g.event_id,
+    g.stage_rarity,
+    g.build_event,
+    g.stage_rng,
+    g.generate_stage,
+    g.encode_event,
+    g.encode_stage_shard,
+    qi_curve.QiRewardCurve,
+    lexicon_sampler,
+]
+
+def code_fingerprint():
+    digest = hashlib.sha256()
+    for obj in CODE_DEPENDENCIES:
+        digest.update(inspect.getsource(obj).encode("utf-8"))
+    return digest.hexdigest()
+
+def tier_lexicon(level_key):
+    """一个档次用到的全部词库"""
+    data, prefixes, desc_format = g.UniqueStageText.TIER_DATA[level_key]
+    return {
+        "data": data,
+        "prefixes": prefixes,
+        "desc_format": desc_format,
+        "leave": g.ACTION_B_LEAVE[level_key],
+        "safe": g.ACTION_B_SAFE[level_key],
+        "fight": g.ACTION_B_FIGHT[level_key],
+    }
+
+def stage_fingerprint(task, code_hash):
+    """task 为 stage_tasks() 产出的 (stage_idx, count, seed, start_number, unique)"""
+    stage_idx, count, seed, start_number, unique = task
+    inputs = {
+        "version": CACHE_VERSION,
+        "code": code_hash,
+        "task": [stage_idx, count, seed, start_number, unique],
+        "lexicon": tier_lexicon(g.get_level_key(stage_idx)),
+        "templates": g.EVENT_TEMPLATES,
+        "weights": g.get_weights_by_stage(stage_idx),
+        "qi_curve": g.QI_CURVE.to_dict(),
+        "stages": g.STAGES,
+    }
+    encoded = json.dumps(inputs, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+def shard_path(cache_dir, stage_idx, fingerprint):
+    return os.path.join(cache_dir, f"stage{stage_idx:02d}-{fingerprint[:24]}.shard")
+
+def store_shard(cache_dir, stage_idx, fingerprint, shard):
+    """原子写入新分片，并删掉该段位的旧分片"""
+    path = shard_path(cache_dir, stage_idx, fingerprint)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(shard)
+    os.replace(tmp_path, path)
+    for stale in glob.glob(os.path.join(cache_dir, f"stage{stage_idx:02d}-*.shard")):
+        if stale != path:
+            os.remove(stale)
+
+def load_seed(cache_dir, default):
+    """缓存目录里上次用的种子；没有 (或损坏) 时返回 default"""
+    try:
+        with open(os.path.join(cache_dir, SEED_FILE), encoding="utf-8") as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return default
+
+def save_seed(cache_dir, seed):
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(cache_dir, SEED_FILE), "w", encoding="utf-8") as f:
+        f.write(f"{seed}\n")
+
+def load_shard(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+def write_events_cached(stages, counts, seed, file_path, cache_dir=DEFAULT_CACHE_DIR, jobs=1, unique=False):
+    """
+    只重算指纹变化的段位，其余读缓存，按段位顺序拼成 pretty JSON。
+    输出与 write_events_stream(generate(...)) 字节一致。
+    返回 (事件数, 重算的段位列表)。
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    code_hash = code_fingerprint()
+    tasks = g.stage_tasks(stages, counts, seed, unique)
+    fingerprints = [stage_fingerprint(task, code_hash) for task in tasks]
+    paths = [shard_path(cache_dir, task[0], fp) for task, fp in zip(tasks, fingerprints)]
+    missing = [i for i, path in enumerate(paths) if not os.path.exists(path)]
+
+    if jobs > 1 and len(missing) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            fresh = dict(zip(missing, pool.map(g.encode_stage_shard, [tasks[i] for i in missing])))
+    else:
+        fresh = {i: g.encode_stage_shard(tasks[i]) for i in missing}
+    for i, shard in fresh.items():
+        store_shard(cache_dir, tasks[i][0], fingerprints[i], shard)
+
+    shards = (fresh[i] if i in fresh else load_shard(paths[i]) for i in range(len(tasks)))
+    g.write_json_chunks(shards, file_path)
+    return sum(task[1] for task in tasks), [tasks[i][0] for i in missing]
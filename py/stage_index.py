@@ -0,0 +1,696 @@
+import argparse
+import base64
+import bisect
+import itertools
+import json
+import math
+import random
+import time
+
+import generate_events12 as g
+
+# ==========================================
+# 段位可选事件索引 (events.json 的 sidecar)
+# ==========================================
+# EventPool.randomEvent 每次都线性扫描整个事件数组，逐个把 minStage / maxStage
+# 字符串通过 GameConstants.stageIndex(for:) (两次 firstIndex) 解析成下标。
+# 这里在生成时一次性算好：16 个玩家段位各自可选的事件位置，存成若干 [start, end) 区间。
+# v12 的事件按段位顺序排列、窗口连续，每个段位只有一个区间，随机取事件是 O(1)。
+#
+# {"format": "palmsky-stage-index", "version": 1, "count": 事件数,
+#  "stages": [[[start, end], ...], ... 16 个段位],
+#  "fallback": [[start, end], ...],   # min / max 都为空的兜底事件
+#  "rarity": {"weights": {...}, "stages": [...]}}   # 可选，按稀有度加权抽取用
+#
+# rarity 部分：同一段位里权重只取决于 rarity，所以把可选事件按 rarity 分组，
+# 对「组」建 Vose 别名表 (组概率 = 权重 * 组内事件数)，组内再均匀取。
+# 两步都是 O(1)，表的大小只和 rarity 种类数有关，不随事件数增长。
+#   stage = {"groups": [{"rarity": r, "ranges": [[start, end], ...]}, ...],
+#            "prob": [...], "alias": [...], "capped": [各组不含 grant_item 的事件数]}
+#
+# 护身符拦截：protectCharmCount >= 20 时 randomEvent 会把可选事件再过滤一遍，
+# 逐个扫描选项去掉含 grant_item 的事件 (过滤后为空则不拦截)。索引里一次算好：
+#  "grantItem": base64 位图，第 p 位 = 第 p 个事件含 grant_item
+#  "capped": [16 个段位各自不含 grant_item 的可选事件数]   # 0 表示不拦截
+# 可选集合减去位图就是拦截后的池子。抽取时在段位区间里取，命中位图就重抽
+# (拒绝采样，不改变其余事件之间的相对概率)；拦截后剩不到一半的段位，
+# 加载时把差集展开成区间，避免重抽次数过多。
+
+FORMAT_NAME = "palmsky-stage-index"
+VERSION = 1
+LEVELS_PER_STAGE = 9
+STAGE_COUNT = len(g.STAGES)
+
+# GameConstants.stageNamesCanonical / stageNamesTraditional
+STAGE_NAMES_CANONICAL = list(g.STAGES)
+STAGE_NAMES_TRADITIONAL = [
+    "築基", "開光", "胎息", "辟穀", "金丹", "元嬰", "出竅", "分神",
+    "合體", "大乘", "渡劫", "地仙", "天仙", "金仙", "大羅金仙", "九天玄仙",
+]
+STAGE_CODES = {name: idx for idx, name in enumerate(STAGE_NAMES_TRADITIONAL)}
+STAGE_CODES.update({name: idx for idx, name in enumerate(STAGE_NAMES_CANONICAL)})
+
+# 稀有度权重 (可配置)；没有 rarity 或 rarity 不在表里的事件按 DEFAULT_RARITY 计
+RARITY_WEIGHTS = {"common": 10.0, "rare": 4.0, "epic": 1.0}
+DEFAULT_RARITY = "common"
+
+# EventPool.charmEventBlockThreshold
+CHARM_EVENT_BLOCK_THRESHOLD = 20
+
+def parse_weights(text):
+    """"common=10,rare=4,epic=1" -> dict"""
+    weights = {}
+    for item in text.split(","):
+        name, _, value = item.partition("=")
+        weight = float(value)
+        if weight < 0 or weight != weight:
+            raise ValueError(f"权重必须是非负数: {item}")
+        weights[name.strip()] = weight
+    return weights
+
+def player_stage(level):
+    """EventPool：(playerLevel - 1) / 9"""
+    return (level - 1) // LEVELS_PER_STAGE
+
+# ==========================================
+# Swift 线性过滤的忠实移植 (对照组)
+# ==========================================
+
+def swift_stage_index(name):
+    """GameConstants.stageIndex(for:)：先查简体再查繁体，各一次线性 firstIndex"""
+    if name in STAGE_NAMES_CANONICAL:
+        return STAGE_NAMES_CANONICAL.index(name)
+    if name in STAGE_NAMES_TRADITIONAL:
+        return STAGE_NAMES_TRADITIONAL.index(name)
+    return None
+
+def linear_valid_events(events, player_level):
+    """randomEvent 第 1、2 步：逐个事件解析字符串并比较"""
+    player_stage_index = (player_level - 1) // LEVELS_PER_STAGE
+    valid = []
+    for event in events:
+        min_str = event.get("minStage")
+        if min_str is not None:
+            min_index = swift_stage_index(min_str)
+            if min_index is not None and player_stage_index < min_index:
+                continue
+        max_str = event.get("maxStage")
+        if max_str is not None:
+            max_index = swift_stage_index(max_str)
+            if max_index is not None and player_stage_index > max_index:
+                continue
+        valid.append(event)
+    return valid
+
+def contains_grant_item(event):
+    """EventPool.containsGrantItemEvent"""
+    return any(choice["effect"]["type"] == "grant_item" for choice in event["choices"])
+
+def linear_eligible_events(events, player_level, protect_charm_count=0):
+    """randomEvent 第 3 步：护身符达到上限时再扫一遍，去掉含 grant_item 的事件"""
+    valid = linear_valid_events(events, player_level)
+    if protect_charm_count >= CHARM_EVENT_BLOCK_THRESHOLD:
+        filtered = [event for event in valid if not contains_grant_item(event)]
+        return filtered or valid
+    return valid
+
+def linear_random_event(events, player_level, rng=random, protect_charm_count=0):
+    """randomEvent 的逐事件实现"""
+    valid = linear_eligible_events(events, player_level, protect_charm_count)
+    if not valid:
+        fallback = [e for e in events if e.get("minStage") is None and e.get("maxStage") is None]
+        return rng.choice(fallback) if fallback else None
+    return rng.choice(valid)
+
+# ==========================================
+# 索引构建
+# ==========================================
+
+def resolve_window(event):
+    """事件可出现的段位区间 [lo, hi]；未知名称与 null 一样视为不限制"""
+    lo = STAGE_CODES.get(event.get("minStage"))
+    hi = STAGE_CODES.get(event.get("maxStage"))
+    return (0 if lo is None else lo), (STAGE_COUNT - 1 if hi is None else hi)
+
+def is_fallback(event):
+    return event.get("minStage") is None and event.get("maxStage") is None
+
+def _append_position(ranges, position):
+    if ranges and ranges[-1][1] == position:
+        ranges[-1][1] = position + 1
+    else:
+        ranges.append([position, position + 1])
+
+def _set_bit(bits, position):
+    bits[position >> 3] |= 1 << (position & 7)
+
+def has_bit(bits, position):
+    return bits[position >> 3] >> (position & 7) & 1
+
+def subtract_bits(ranges, bits):
+    """区间列表减去位图里置位的位置，返回新的区间列表"""
+    result = []
+    for start, end in ranges:
+        for position in range(start, end):
+            if not has_bit(bits, position):
+                _append_position(result, position)
+    return result
+
+def build_alias(weights):
+    """
+    Vose 别名表：返回 (prob, alias)。
+    抽样时 i = randrange(n)，random() < prob[i] 取 i，否则取 alias[i]。
+    """
+    n = len(weights)
+    total = sum(weights)
+    if n == 0 or total <= 0:
+        raise ValueError("别名表需要至少一个正权重")
+    scaled = [w * n / total for w in weights]
+    prob = [0.0] * n
+    alias = list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        less = small.pop()
+        more = large.pop()
+        prob[less] = scaled[less]
+        alias[less] = more
+        scaled[more] = (scaled[more] + scaled[less]) - 1.0
+        (small if scaled[more] < 1.0 else large).append(more)
+    # 剩下的只差浮点误差，概率记为 1
+    for i in large + small:
+        prob[i] = 1.0
+    return prob, alias
+
+def event_weight(event, rarity_weights):
+    rarity = event.get("rarity")
+    if rarity not in rarity_weights:
+        rarity = DEFAULT_RARITY
+    return rarity, rarity_weights.get(rarity, 0.0)
+
+def _rarity_stage(groups, capped_counts, rarity_weights):
+    """一个段位：{rarity: 区间列表} -> 组 + 别名表 (权重为 0 的组不参与)"""
+    kept = []
+    weights = []
+    capped = []
+    for rarity, ranges in groups.items():
+        size = sum(end - start for start, end in ranges)
+        weight = rarity_weights.get(rarity, 0.0) * size
+        if weight > 0:
+            kept.append({"rarity": rarity, "ranges": ranges})
+            weights.append(weight)
+            capped.append(capped_counts.get(rarity, 0))
+    if not kept:
+        return {"groups": [], "prob": [], "alias": [], "capped": []}
+    prob, alias = build_alias(weights)
+    return {"groups": kept, "prob": prob, "alias": alias, "capped": capped}
+
+class IndexBuilder:
+    """逐个 add 事件 (按文件中的顺序)，index() 得到索引；可以边生成边建"""
+
+    def __init__(self, rarity_weights=RARITY_WEIGHTS):
+        self.rarity_weights = rarity_weights
+        self.stages = [[] for _ in range(STAGE_COUNT)]
+        self.rarity_groups = [{} for _ in range(STAGE_COUNT)]
+        self.rarity_capped = [{} for _ in range(STAGE_COUNT)]
+        self.capped = [0] * STAGE_COUNT
+        self.grant_bits = bytearray()
+        self.fallback = []
+        self.count = 0
+
+    def add(self, event):
+        position = self.count
+        lo, hi = resolve_window(event)
+        rarity = event_weight(event, self.rarity_weights or {})[0]
+        if position & 7 == 0:
+            self.grant_bits.append(0)
+        grant = contains_grant_item(event)
+        if grant:
+            _set_bit(self.grant_bits, position)
+        for stage in range(lo, hi + 1):
+            _append_position(self.stages[stage], position)
+            _append_position(self.rarity_groups[stage].setdefault(rarity, []), position)
+            if not grant:
+                self.capped[stage] += 1
+                self.rarity_capped[stage][rarity] = self.rarity_capped[stage].get(rarity, 0) + 1
+        if is_fallback(event):
+            _append_position(self.fallback, position)
+        self.count += 1
+
+    def index(self):
+        index = {
+            "format": FORMAT_NAME, "version": VERSION, "count": self.count, "stages": self.stages,
+            "fallback": self.fallback, "grantItem": base64.b64encode(bytes(self.grant_bits)).decode("ascii"),
+            "capped": self.capped,
+        }
+        if self.rarity_weights is not None:
+            weights = dict(self.rarity_weights)
+            weights.setdefault(DEFAULT_RARITY, 0.0)
+            index["rarity"] = {
+                "weights": weights,
+                "stages": [_rarity_stage(groups, counts, weights)
+                           for groups, counts in zip(self.rarity_groups, self.rarity_capped)],
+            }
+        return index
+
+def build_index(events, rarity_weights=RARITY_WEIGHTS):
+    """一次遍历事件流，得到每个段位的可选区间；rarity_weights 为 None 时不建加权表"""
+    builder = IndexBuilder(rarity_weights)
+    for event in events:
+        builder.add(event)
+    return builder.index()
+
+def save_index(index, file_path):
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+    return index
+
+def write_index(events, file_path, rarity_weights=RARITY_WEIGHTS):
+    return save_index(build_index(events, rarity_weights), file_path)
+
+def index_path_for(json_path):
+    base = json_path[:-5] if json_path.endswith(".json") else json_path
+    return base + ".index.json"
+
+def load_index(file_path):
+    with open(file_path, encoding="utf-8") as f:
+        index = json.load(f)
+    if index.get("format") != FORMAT_NAME or index.get("version") != VERSION:
+        raise ValueError(f"{file_path}: 不支持的索引格式")
+    return index
+
+# ==========================================
+# 基于索引的抽取
+# ==========================================
+
+class RangeSet:
+    """若干 [start, end) 区间；按序号取位置，区间只有一个时就是一次加法"""
+
+    def __init__(self, ranges):
+        self.starts = [start for start, _ in ranges]
+        self.offsets = []
+        total = 0
+        for start, end in ranges:
+            self.offsets.append(total)
+            total += end - start
+        self.size = total
+
+    def __len__(self):
+        return self.size
+
+    def position(self, k):
+        i = bisect.bisect_right(self.offsets, k) - 1
+        return self.starts[i] + k - self.offsets[i]
+
+    def positions(self):
+        for start, offset, next_offset in zip(self.starts, self.offsets, self.offsets[1:] + [self.size]):
+            yield from range(start, start + next_offset - offset)
+
+class AliasStage:
+    """一个段位的加权抽样：别名表选组 + 组内均匀"""
+
+    def __init__(self, table):
+        self.rarities = [group["rarity"] for group in table["groups"]]
+        self.group_ranges = [group["ranges"] for group in table["groups"]]
+        self.groups = [RangeSet(ranges) for ranges in self.group_ranges]
+        self.prob = table["prob"]
+        self.alias = table["alias"]
+        self.capped_counts = table.get("capped")
+        # 拦截后剩下的权重占比，决定重抽还是展开差集
+        if self.capped_counts is not None and self.groups:
+            shares = [w / len(self.prob) for w in self._group_weights()]
+            self.capped_share = sum(s * c / len(g) for s, c, g in zip(shares, self.capped_counts, self.groups))
+        else:
+            self.capped_share = None
+
+    def _group_weights(self):
+        """由别名表还原各组的归一化权重 (乘以组数)"""
+        weights = [0.0] * len(self.prob)
+        for i, (p, a) in enumerate(zip(self.prob, self.alias)):
+            weights[i] += p
+            weights[a] += 1.0 - p
+        return weights
+
+    def __bool__(self):
+        return bool(self.groups)
+
+    def draw_group(self, rng):
+        i = rng.randrange(len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+    def position(self, rng):
+        group = self.groups[self.draw_group(rng)]
+        return group.position(rng.randrange(len(group)))
+
+    def capped(self, bits):
+        """拦截后的加权表：各组减去位图后重建 (只给拦截后剩余很少的段位用)"""
+        groups = []
+        weights = []
+        for rarity, ranges, group, weight in zip(self.rarities, self.group_ranges, self.groups, self._group_weights()):
+            remaining = subtract_bits(ranges, bits)
+            size = sum(end - start for start, end in remaining)
+            if size:
+                groups.append({"rarity": rarity, "ranges": remaining})
+                weights.append(weight / len(group) * size)
+        prob, alias = build_alias(weights)
+        return AliasStage({"groups": groups, "prob": prob, "alias": alias})
+
+# 拦截后剩余占比低于它就展开差集，否则重抽 (期望重抽次数 < 1 / REJECTION_MIN_SHARE)
+REJECTION_MIN_SHARE = 0.5
+
+class StageIndex:
+    def __init__(self, index):
+        self.count = index["count"]
+        self.stage_ranges = index["stages"]
+        self.stages = [RangeSet(ranges) for ranges in self.stage_ranges]
+        self.fallback = RangeSet(index["fallback"])
+        rarity = index.get("rarity")
+        self.rarity_weights = rarity["weights"] if rarity else None
+        self.weighted = [AliasStage(table) for table in rarity["stages"]] if rarity else None
+        self.grant_bits = base64.b64decode(index["grantItem"]) if "grantItem" in index else None
+        self.capped_counts = index.get("capped")
+        self._capped_sparse = {}
+        self._weighted_sparse = {}
+
+    def _stage(self, player_level):
+        return min(max(player_stage(player_level), 0), STAGE_COUNT - 1)
+
+    def eligible(self, player_level):
+        return self.stages[self._stage(player_level)]
+
+    def _capping(self, stage, protect_charm_count):
+        """是否启用护身符拦截 (拦截后为空时与 Swift 一样不拦截)"""
+        if protect_charm_count < CHARM_EVENT_BLOCK_THRESHOLD:
+            return False
+        if self.grant_bits is None:
+            raise ValueError("索引里没有 grant_item 位图")
+        return self.capped_counts[stage] > 0
+
+    def eligible_positions(self, player_level, protect_charm_count=0):
+        """候选事件下标 (校验用)"""
+        stage = self._stage(player_level)
+        positions = self.stages[stage].positions()
+        if self._capping(stage, protect_charm_count):
+            bits = self.grant_bits
+            return [p for p in positions if not has_bit(bits, p)]
+        return list(positions)
+
+    def _capped_position(self, stage, rng):
+        eligible = self.stages[stage]
+        if self.capped_counts[stage] < len(eligible) * REJECTION_MIN_SHARE:
+            sparse = self._capped_sparse.get(stage)
+            if sparse is None:
+                sparse = self._capped_sparse[stage] = RangeSet(subtract_bits(self.stage_ranges[stage], self.grant_bits))
+            return sparse.position(rng.randrange(len(sparse)))
+        bits = self.grant_bits
+        size = len(eligible)
+        while True:
+            position = eligible.position(rng.randrange(size))
+            if not has_bit(bits, position):
+                return position
+
+    def random_position(self, player_level, rng=random, protect_charm_count=0):
+        """返回事件下标；没有可选事件也没有兜底事件时返回 None"""
+        stage = self._stage(player_level)
+        if self._capping(stage, protect_charm_count):
+            return self._capped_position(stage, rng)
+        eligible = self.stages[stage]
+        if not eligible:
+            eligible = self.fallback
+            if not eligible:
+                return None
+        return eligible.position(rng.randrange(len(eligible)))
+
+    def weighted_position(self, player_level, rng=random, protect_charm_count=0):
+        """按 rarity 权重抽取；该段位 (拦截后) 权重全为 0 时退回均匀抽取"""
+        if self.weighted is None:
+            raise ValueError("索引里没有 rarity 加权表")
+        stage = self._stage(player_level)
+        table = self.weighted[stage]
+        if self._capping(stage, protect_charm_count):
+            if not table or not table.capped_share:
+                return self._capped_position(stage, rng)
+            if table.capped_share < REJECTION_MIN_SHARE:
+                sparse = self._weighted_sparse.get(stage)
+                if sparse is None:
+                    sparse = self._weighted_sparse[stage] = table.capped(self.grant_bits)
+                return sparse.position(rng)
+            bits = self.grant_bits
+            while True:
+                position = table.position(rng)
+                if not has_bit(bits, position):
+                    return position
+        if not table:
+            return self.random_position(player_level, rng)
+        return table.position(rng)
+
+def random_event(events, index, player_level, rng=random, weighted=False, protect_charm_count=0):
+    """与 linear_random_event 同样的候选集合，但不扫描事件；weighted=True 按 rarity 加权"""
+    if weighted:
+        position = index.weighted_position(player_level, rng, protect_charm_count)
+    else:
+        position = index.random_position(player_level, rng, protect_charm_count)
+    return None if position is None else events[position]
+
+# ==========================================
+# 校验与基准
+# ==========================================
+
+def check_index(events, index):
+    """逐等级对比索引与线性过滤的候选集合 (护身符未满 / 已满)，返回不一致的等级"""
+    mismatched = []
+    for level in range(1, LEVELS_PER_STAGE * STAGE_COUNT + 1):
+        for charms in (0, CHARM_EVENT_BLOCK_THRESHOLD):
+            expected = [id(e) for e in linear_eligible_events(events, level, charms)]
+            actual = [id(events[p]) for p in index.eligible_positions(level, charms)]
+            if expected != actual:
+                mismatched.append(level)
+                break
+    return mismatched
+
+def chi_square_sf(statistic, dof):
+    """卡方分布的右尾概率 Q(dof/2, x/2) (正则化上不完全伽马函数)"""
+    if dof <= 0:
+        return 1.0
+    a = dof / 2.0
+    x = statistic / 2.0
+    if x <= 0:
+        return 1.0
+    log_prefix = -x + a * math.log(x) - math.lgamma(a)
+    if x < a + 1:
+        # 级数求 P，再取 1 - P
+        term = total = 1.0 / a
+        n = a
+        for _ in range(10000):
+            n += 1
+            term *= x / n
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_prefix))
+    # 连分式 (Lentz) 直接求 Q
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 10000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return math.exp(log_prefix) * h
+
+MIN_EXPECTED = 5
+
+def verify_weights(events, index, samples, seed, alpha, protect_charm_count=0):
+    """
+    每个段位抽 samples 次，分别对「稀有度组」和「单个事件」做卡方拟合优度检验。
+    期望频率 = 样本数 * 权重 / 段位总权重；单事件期望频率不足 MIN_EXPECTED 时
+    卡方近似不成立，该段位只做稀有度检验。返回 [(段位, 检验, 卡方, 自由度, p 值), ...]
+    """
+    rng = random.Random(seed)
+    weights = index.rarity_weights
+    rows = []
+    for stage in range(STAGE_COUNT):
+        table = index.weighted[stage]
+        if not table:
+            continue
+        level = stage * LEVELS_PER_STAGE + 1
+        counts = {}
+        for _ in range(samples):
+            position = index.weighted_position(level, rng, protect_charm_count)
+            counts[position] = counts.get(position, 0) + 1
+
+        positions = index.eligible_positions(level, protect_charm_count)
+        event_weights = [event_weight(events[p], weights)[1] for p in positions]
+        total_weight = sum(event_weights)
+        observed = [counts.get(p, 0) for p in positions]
+        expected = [samples * w / total_weight for w in event_weights]
+
+        by_rarity = {}
+        for p, o, e in zip(positions, observed, expected):
+            rarity = event_weight(events[p], weights)[0]
+            acc = by_rarity.setdefault(rarity, [0, 0.0])
+            acc[0] += o
+            acc[1] += e
+
+        # 权重为 0 或被拦截的事件一旦被抽到就直接判失败
+        stray = sum(o for o, e in zip(observed, expected) if e == 0) + samples - sum(observed)
+        tests = [("稀有度", list(by_rarity.values()))]
+        if min((e for e in expected if e > 0), default=0) >= MIN_EXPECTED:
+            tests.append(("单事件", list(zip(observed, expected))))
+        for name, pairs in tests:
+            pairs = [(o, e) for o, e in pairs if e > 0]
+            statistic = sum((o - e) ** 2 / e for o, e in pairs)
+            p_value = chi_square_sf(statistic, len(pairs) - 1) if not stray else 0.0
+            rows.append((stage, name, statistic, len(pairs) - 1, p_value))
+    failed = [row for row in rows if row[4] < alpha]
+    return rows, failed
+
+def _time_per_call(func, min_seconds=0.2):
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls
+
+def benchmark(sizes, seed):
+    print(f"{'事件数':>10}{'建索引':>10}{'线性过滤/次':>14}{'索引/次':>12}{'加权/次':>12}{'加速':>12}")
+    rng = random.Random(seed)
+    for total in sizes:
+        events = list(g.generate(counts=g.scale_counts(total), seed=seed))
+        start = time.perf_counter()
+        index = StageIndex(build_index(events))
+        build_seconds = time.perf_counter() - start
+        levels = [rng.randint(1, 144) for _ in range(64)]
+        cursor = itertools.cycle(levels)
+        linear = _time_per_call(lambda: linear_random_event(events, next(cursor), rng))
+        indexed = _time_per_call(lambda: random_event(events, index, next(cursor), rng))
+        weighted = _time_per_call(lambda: random_event(events, index, next(cursor), rng, weighted=True))
+        print(f"{total:>10,}{build_seconds * 1000:>8.1f}ms{linear * 1000:>12.3f}ms"
+              f"{indexed * 1e6:>10.2f}µs{weighted * 1e6:>10.2f}µs{linear / indexed:>11,.0f}x")
+        del events, index
+
+def rescan_random_event(events, index, player_level, rng=random, protect_charm_count=0):
+    """有段位索引、没有位图：拦截时仍像 Swift 一样把候选事件逐个扫一遍选项"""
+    valid = [events[p] for p in index.eligible(player_level).positions()]
+    if protect_charm_count >= CHARM_EVENT_BLOCK_THRESHOLD:
+        valid = [event for event in valid if not contains_grant_item(event)] or valid
+    if not valid:
+        return random_event(events, index, player_level, rng)
+    return rng.choice(valid)
+
+def benchmark_charm(sizes, seed):
+    """护身符拦截 (protectCharmCount = 20) 时每次抽取的耗时"""
+    charms = CHARM_EVENT_BLOCK_THRESHOLD
+    print(f"护身符 {charms} 个，每次抽取耗时")
+    print(f"{'事件数':>10}{'线性两遍':>12}{'索引+重扫':>12}{'位图':>10}{'位图加权':>10}{'不拦截':>10}")
+    rng = random.Random(seed)
+    for total in sizes:
+        events = list(g.generate(counts=g.scale_counts(total), seed=seed))
+        index = StageIndex(build_index(events))
+        levels = [rng.randint(1, 144) for _ in range(64)]
+        cursor = itertools.cycle(levels)
+        linear = _time_per_call(lambda: linear_random_event(events, next(cursor), rng, charms))
+        rescan = _time_per_call(lambda: rescan_random_event(events, index, next(cursor), rng, charms))
+        capped = _time_per_call(lambda: random_event(events, index, next(cursor), rng, protect_charm_count=charms))
+        weighted = _time_per_call(
+            lambda: random_event(events, index, next(cursor), rng, weighted=True, protect_charm_count=charms))
+        plain = _time_per_call(lambda: random_event(events, index, next(cursor), rng))
+        print(f"{total:>10,}{linear * 1000:>10.3f}ms{rescan * 1000:>10.3f}ms"
+              f"{capped * 1e6:>8.2f}µs{weighted * 1e6:>8.2f}µs{plain * 1e6:>8.2f}µs")
+        del events, index
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="段位可选事件索引：生成 / 校验 / 抽取 / 基准")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build_cmd = sub.add_parser("build", help="events.json -> 索引 sidecar")
+    build_cmd.add_argument("json_path")
+    build_cmd.add_argument("index_path", nargs="?", help="默认 <json>.index.json")
+    build_cmd.add_argument("--weights", default=None, help="稀有度权重，如 common=10,rare=4,epic=1")
+
+    check_cmd = sub.add_parser("check", help="逐等级对比索引与线性过滤")
+    check_cmd.add_argument("json_path")
+    check_cmd.add_argument("index_path")
+
+    roll_cmd = sub.add_parser("roll", help="按等级随机抽一个事件")
+    roll_cmd.add_argument("json_path")
+    roll_cmd.add_argument("index_path")
+    roll_cmd.add_argument("level", type=int)
+    roll_cmd.add_argument("--weighted", action="store_true", help="按 rarity 权重抽取")
+    roll_cmd.add_argument("--charms", type=int, default=0, help="护身符数量")
+
+    verify_cmd = sub.add_parser("verify", help="卡方检验加权抽样频率是否符合配置的权重")
+    verify_cmd.add_argument("json_path")
+    verify_cmd.add_argument("index_path")
+    verify_cmd.add_argument("--samples", type=int, default=200000, help="每个段位的抽样次数")
+    verify_cmd.add_argument("--seed", type=int, default=0)
+    verify_cmd.add_argument("--alpha", type=float, default=0.001, help="显著性水平")
+    verify_cmd.add_argument("--charms", type=int, default=0, help="护身符数量 (>= 20 时检验拦截后的池子)")
+
+    bench_cmd = sub.add_parser("bench", help="索引 vs 线性过滤")
+    bench_cmd.add_argument("--sizes", default="2000,100000,1000000", help="逗号分隔的事件数")
+    bench_cmd.add_argument("--seed", type=int, default=0)
+
+    charm_cmd = sub.add_parser("bench-charm", help="护身符拦截：逐个重扫 vs 位图")
+    charm_cmd.add_argument("--sizes", default="2000,100000,1000000", help="逗号分隔的事件数")
+    charm_cmd.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args(argv)
+    if args.command == "bench":
+        benchmark([int(size) for size in args.sizes.split(",")], args.seed)
+        return
+    if args.command == "bench-charm":
+        benchmark_charm([int(size) for size in args.sizes.split(",")], args.seed)
+        return
+
+    with open(args.json_path, encoding="utf-8") as f:
+        events = json.load(f)
+    if args.command == "build":
+        index_path = args.index_path or index_path_for(args.json_path)
+        try:
+            weights = parse_weights(args.weights) if args.weights else RARITY_WEIGHTS
+        except ValueError as error:
+            parser.error(str(error))
+        index = write_index(events, index_path, weights)
+        print(f"✅ {index['count']} 个事件 -> {index_path}")
+    elif args.command == "check":
+        index = load_index(args.index_path)
+        if index["count"] != len(events):
+            parser.exit(1, f"❌ 索引记录 {index['count']} 个事件，文件里有 {len(events)} 个\n")
+        mismatched = check_index(events, StageIndex(index))
+        if mismatched:
+            parser.exit(1, f"❌ 这些等级的候选集合不一致: {mismatched}\n")
+        print("✅ 144 个等级的候选集合与线性过滤一致")
+    elif args.command == "verify":
+        index = StageIndex(load_index(args.index_path))
+        if index.weighted is None:
+            parser.exit(1, "❌ 索引里没有 rarity 加权表\n")
+        rows, failed = verify_weights(events, index, args.samples, args.seed, args.alpha, args.charms)
+        print(f"权重 {index.rarity_weights}，护身符 {args.charms}，每段位 {args.samples:,} 次抽样")
+        print(f"   {'段位':<8}{'检验':<8}{'卡方':>12}{'自由度':>8}{'p 值':>10}")
+        for stage, name, statistic, dof, p_value in rows:
+            mark = "  ❌" if p_value < args.alpha else ""
+            print(f"   {g.STAGES[stage]:<8}{name:<8}{statistic:>12.2f}{dof:>8}{p_value:>10.4f}{mark}")
+        if failed:
+            parser.exit(1, f"❌ {len(failed)} 项检验 p < {args.alpha}\n")
+        print(f"✅ 全部检验 p >= {args.alpha}")
+    else:
+        index = StageIndex(load_index(args.index_path))
+        event = random_event(events, index, args.level, weighted=args.weighted, protect_charm_count=args.charms)
+        print(json.dumps(event, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
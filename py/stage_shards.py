@@ -0,0 +1,280 @@
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import generate_events12 as g
+from stage_index import STAGE_CODES, STAGE_NAMES_TRADITIONAL
+
+# ==========================================
+# 按段位分片输出 + manifest
+# ==========================================
+# EventPool.randomEvent 只会返回 minStage <= 玩家段位 <= maxStage 的事件，
+# 所以按 minStage 把事件拆到 16 个分片 (缺 minStage 或段位名未知的进 any 分片)，
+# 每个分片记录覆盖的段位区间 [minStage, 分片内最大的 maxStage]。
+# 加载时只读覆盖玩家段位的分片，启动解码量和窗口宽度成正比，而不是整个池子。
+# 分片本身仍是 [GameEvent] 数组，格式与 events.json 相同。
+
+MANIFEST_NAME = "manifest.json"
+FORMAT_NAME = "palmsky-shards"
+VERSION = 1
+ANY_SHARD = "any"
+LEVELS_PER_STAGE = 9
+LAST_STAGE = len(g.STAGES) - 1
+
+def stage_index(name):
+    """与 GameConstants.stageIndex(for:) 一致：简体 / 繁体名都认，未知名称 / null 视为无限制"""
+    if name is None:
+        return None
+    return STAGE_CODES.get(name)
+
+def player_stage(level):
+    """与 EventPool 一致：(playerLevel - 1) / 9"""
+    return (level - 1) // LEVELS_PER_STAGE
+
+def event_window(event):
+    """事件可出现的段位区间 (lo, hi)，缺省一端按 0 / 15 处理"""
+    lo = stage_index(event.get("minStage"))
+    hi = stage_index(event.get("maxStage"))
+    return (0 if lo is None else lo), (LAST_STAGE if hi is None else hi)
+
+def shard_key(event):
+    lo = stage_index(event.get("minStage"))
+    return ANY_SHARD if lo is None else lo
+
+def shard_file(key):
+    return f"events_{ANY_SHARD}.json" if key == ANY_SHARD else f"events_stage{key:02d}.json"
+
+class ShardWriter:
+    """流式写一个分片，同时累计字节数、sha256 和覆盖区间"""
+
+    def __init__(self, out_dir, key):
+        self.key = key
+        self.file = shard_file(key)
+        self.handle = open(os.path.join(out_dir, self.file), "wb")
+        self.digest = hashlib.sha256()
+        self.bytes = 0
+        self.count = 0
+        self.coverage = None
+        self._write("[")
+
+    def _write(self, text):
+        data = text.encode("utf-8")
+        self.handle.write(data)
+        self.digest.update(data)
+        self.bytes += len(data)
+
+    def add(self, event):
+        self._write(",\n  " if self.count else "\n  ")
+        self._write(g.encode_event(event))
+        self.count += 1
+        lo, hi = event_window(event)
+        if self.coverage is None:
+            self.coverage = [lo, hi]
+        else:
+            self.coverage = [min(self.coverage[0], lo), max(self.coverage[1], hi)]
+
+    def close(self):
+        self._write("\n]" if self.count else "]")
+        self.handle.close()
+        return {
+            "file": self.file,
+            "stage": None if self.key == ANY_SHARD else self.key,
+            "stageName": None if self.key == ANY_SHARD else g.STAGES[self.key],
+            "count": self.count,
+            "bytes": self.bytes,
+            "sha256": self.digest.hexdigest(),
+            "coverage": self.coverage,
+        }
+
+class ShardSet:
+    """按 shard_key 把事件分发给各分片的 ShardWriter；可以边生成边 add，close 时写 manifest"""
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        self.writers = {}
+        os.makedirs(out_dir, exist_ok=True)
+
+    def add(self, event):
+        key = shard_key(event)
+        writer = self.writers.get(key)
+        if writer is None:
+            writer = self.writers[key] = ShardWriter(self.out_dir, key)
+        writer.add(event)
+
+    def close(self):
+        writers = self.writers
+        shards = [writers[key].close() for key in sorted(writers, key=lambda k: (k == ANY_SHARD, k))]
+        manifest = {
+            "format": FORMAT_NAME,
+            "version": VERSION,
+            "total": sum(shard["count"] for shard in shards),
+            "bytes": sum(shard["bytes"] for shard in shards),
+            "shards": shards,
+        }
+        with open(os.path.join(self.out_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return manifest
+
+def write_shards(events, out_dir):
+    """事件流 -> 分片文件 + manifest，返回 manifest"""
+    shard_set = ShardSet(out_dir)
+    try:
+        for event in events:
+            shard_set.add(event)
+    except BaseException:
+        for writer in shard_set.writers.values():
+            writer.close()
+        raise
+    return shard_set.close()
+
+# ==========================================
+# 参考加载器
+# ==========================================
+
+def load_manifest(shard_dir):
+    with open(os.path.join(shard_dir, MANIFEST_NAME), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_NAME or manifest.get("version") != VERSION:
+        raise ValueError(f"{shard_dir}: 不支持的分片格式")
+    return manifest
+
+def shards_for_level(manifest, level):
+    """覆盖玩家段位的分片 (空分片跳过)"""
+    stage = player_stage(level)
+    return [
+        shard for shard in manifest["shards"]
+        if shard["count"] and shard["coverage"][0] <= stage <= shard["coverage"][1]
+    ]
+
+def load_for_level(shard_dir, level, manifest=None, verify=False):
+    """
+    只解码覆盖该等级的分片，返回其中的事件 (尚未按单个事件的窗口过滤)。
+    EventPool 的兜底事件 (min / max 都为空) 在 any 分片里，覆盖全部段位，总会被加载。
+    """
+    manifest = manifest or load_manifest(shard_dir)
+    events = []
+    for shard in shards_for_level(manifest, level):
+        with open(os.path.join(shard_dir, shard["file"]), "rb") as f:
+            data = f.read()
+        if verify and hashlib.sha256(data).hexdigest() != shard["sha256"]:
+            raise ValueError(f"{shard['file']}: sha256 不匹配")
+        events.extend(json.loads(data))
+    return events
+
+def valid_events(events, level):
+    """EventPool.randomEvent 第 2 步的过滤"""
+    stage = player_stage(level)
+    result = []
+    for event in events:
+        lo = stage_index(event.get("minStage"))
+        if lo is not None and stage < lo:
+            continue
+        hi = stage_index(event.get("maxStage"))
+        if hi is not None and stage > hi:
+            continue
+        result.append(event)
+    return result
+
+def verify_shards(shard_dir):
+    """校验所有分片的字节数与 sha256，返回出错的文件列表"""
+    manifest = load_manifest(shard_dir)
+    bad = []
+    for shard in manifest["shards"]:
+        with open(os.path.join(shard_dir, shard["file"]), "rb") as f:
+            data = f.read()
+        if len(data) != shard["bytes"] or hashlib.sha256(data).hexdigest() != shard["sha256"]:
+            bad.append(shard["file"])
+    return bad
+
+def compare_with_full(shard_dir, json_path):
+    """对每个等级，确认分片加载后的可选事件与整池过滤结果一致"""
+    with open(json_path, encoding="utf-8") as f:
+        full = json.load(f)
+    compare_events(shard_dir, full)
+
+def compare_events(shard_dir, full):
+    manifest = load_manifest(shard_dir)
+    for level in range(1, LEVELS_PER_STAGE * len(g.STAGES) + 1):
+        expected = sorted(event["id"] for event in valid_events(full, level))
+        actual = sorted(event["id"] for event in valid_events(load_for_level(shard_dir, level, manifest), level))
+        if expected != actual:
+            raise SystemExit(f"❌ 等级 {level}: 分片加载结果与整池过滤不一致")
+
+def check_traditional_names():
+    """繁体段位名 (GameConstants.stageNamesTraditional) 要和简体一样分进对应段位的分片"""
+    events = list(g.generate(counts=[2] * len(g.STAGES), seed=0))
+    for event in events[::2]:
+        for key in ("minStage", "maxStage"):
+            if event.get(key) in STAGE_CODES:
+                event[key] = STAGE_NAMES_TRADITIONAL[STAGE_CODES[event[key]]]
+        if event.get("minStage") is not None and shard_key(event) == ANY_SHARD:
+            raise SystemExit(f"❌ 繁体段位名 {event['minStage']} 被分进了 any 分片")
+    with tempfile.TemporaryDirectory() as tmp:
+        write_shards(events, tmp)
+        compare_events(tmp, events)
+
+def benchmark(shard_dir, json_path, repeat):
+    def best_of(func):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    manifest = load_manifest(shard_dir)
+    full_time = best_of(lambda: json.load(open(json_path, encoding="utf-8")))
+    print(f"📊 整池解码 {manifest['total']:,} 个事件: {full_time * 1000:.1f}ms")
+    print(f"   {'等级':<6}{'段位':<8}{'分片':>6}{'事件':>10}{'字节':>14}{'耗时':>10}{'占比':>8}")
+    for stage in range(len(g.STAGES)):
+        level = stage * LEVELS_PER_STAGE + 1
+        shards = shards_for_level(manifest, level)
+        seconds = best_of(lambda: load_for_level(shard_dir, level, manifest))
+        print(f"   {level:<6}{g.STAGES[stage]:<8}{len(shards):>6}{sum(s['count'] for s in shards):>10,}"
+              f"{sum(s['bytes'] for s in shards):>14,}{seconds * 1000:>8.1f}ms{seconds / full_time:>8.1%}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="按段位分片的事件池：写出 / 校验 / 加载基准")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    write_cmd = sub.add_parser("write", help="events.json -> 分片目录")
+    write_cmd.add_argument("json_path")
+    write_cmd.add_argument("out_dir")
+
+    verify_cmd = sub.add_parser("verify", help="校验分片 sha256，并与整池过滤结果逐级对比")
+    verify_cmd.add_argument("shard_dir")
+    verify_cmd.add_argument("json_path", nargs="?", help="原始 events.json (可选)")
+
+    load_cmd = sub.add_parser("load", help="加载某个等级可见的事件")
+    load_cmd.add_argument("shard_dir")
+    load_cmd.add_argument("level", type=int)
+
+    bench_cmd = sub.add_parser("bench", help="各段位加载耗时 vs 整池解码")
+    bench_cmd.add_argument("shard_dir")
+    bench_cmd.add_argument("json_path")
+    bench_cmd.add_argument("--repeat", type=int, default=5)
+
+    args = parser.parse_args(argv)
+    if args.command == "write":
+        manifest = write_shards(g.iter_output(args.json_path), args.out_dir)
+        print(f"✅ {manifest['total']} 个事件 -> {len(manifest['shards'])} 个分片 ({args.out_dir})")
+    elif args.command == "verify":
+        bad = verify_shards(args.shard_dir)
+        if bad:
+            parser.exit(1, f"❌ 校验失败: {', '.join(bad)}\n")
+        if args.json_path:
+            compare_with_full(args.shard_dir, args.json_path)
+        check_traditional_names()
+        print("✅ 分片校验通过")
+    elif args.command == "load":
+        events = load_for_level(args.shard_dir, args.level, verify=True)
+        valid = valid_events(events, args.level)
+        print(f"等级 {args.level} ({g.STAGES[player_stage(args.level)]}): 解码 {len(events)} 个，可遇到 {len(valid)} 个")
+    else:
+        benchmark(args.shard_dir, args.json_path, args.repeat)
+
+if __name__ == "__main__":
+    main()
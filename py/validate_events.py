@@ -0,0 +1,357 @@
+import argparse
+import codecs
+import json
+import os
+import re
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from stage_index import STAGE_CODES
+
+# ==========================================
+# 事件池流式校验
+# ==========================================
+# JSONDecoder 解码 [GameEvent] 时任何一处不合法 (比如 effect.type 不在 EffectType 里)
+# 都会让整个 events.json 解码失败，手表上就一个事件都没有。
+# 这里按块读文件，用 raw_decode 一次解出一个事件，逐个检查，内存与池子大小无关。
+# 报错带字节偏移 (事件起始位置)，可以直接 `tail -c +N+1` 定位。
+#
+# 检查项：
+#   - 字段类型与 GameEvent / EventChoice / EventEffect 的 Codable 定义一致
+#   - effect.type 在 EffectType 枚举里，value / duration 按类型必填
+#   - minStage / maxStage 是已知段位名 (GameConstants.stageIndex 认的简体或繁体)，且 min <= max
+#   - 事件 id 不重复
+#
+# 单进程的瓶颈是 JSON 解码本身。--jobs 按事件边界把文件切成几段并行校验，
+# 最后在主进程里合并 id 查重复。
+
+CHUNK_SIZE = 1 << 20
+
+# EventEffect.EffectType -> 必填字段 (对应 GameManager 里 guard let / if let 取的值)
+EFFECT_FIELDS = {
+    "gain_qi": ("value",),
+    "lose_qi": ("value",),
+    "gain_tap_ratio_temp": ("value", "duration"),
+    "gain_auto_temp": ("value", "duration"),
+    "grant_item": (),
+    "nothing": (),
+    "gamble_tap": ("value", "duration"),
+    "gamble_auto": ("value", "duration"),
+    "gamble": ("value",),
+}
+
+EVENT_STRINGS = ("id", "title", "desc")
+EVENT_OPTIONAL_STRINGS = ("rarity", "minStage", "maxStage")
+CHOICE_STRINGS = ("id", "text")
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+class _BadConstant:
+    """NaN / Infinity：Python 能解析，JSONDecoder 不能"""
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+def _is_number(value):
+    return value.__class__ is int or value.__class__ is float
+
+def check_effect(effect, where, errors):
+    if not isinstance(effect, dict):
+        errors.append(f"{where}.effect 缺失或不是对象")
+        return
+    effect_type = effect.get("type")
+    required = EFFECT_FIELDS.get(effect_type)
+    if required is None:
+        errors.append(f"{where}.effect.type 不在 EffectType 里: {effect_type!r}")
+        required = ()
+    for key in ("value", "duration"):
+        value = effect.get(key)
+        if value is None:
+            if key in required:
+                errors.append(f"{where}.effect ({effect_type}) 缺少 {key}")
+        elif not _is_number(value):
+            shown = value.text if isinstance(value, _BadConstant) else repr(value)
+            errors.append(f"{where}.effect.{key} 不是数字: {shown}")
+
+def check_event(event):
+    """返回错误信息列表 (空列表表示合法)；id 重复由调用方检查"""
+    if not isinstance(event, dict):
+        return ["事件不是对象"]
+    errors = []
+    for key in EVENT_STRINGS:
+        if event.get(key).__class__ is not str:
+            errors.append(f"{key} 缺失或不是字符串")
+    for key in EVENT_OPTIONAL_STRINGS:
+        value = event.get(key)
+        if value is not None and value.__class__ is not str:
+            errors.append(f"{key} 不是字符串")
+
+    lo = hi = None
+    for key in ("minStage", "maxStage"):
+        name = event.get(key)
+        if name.__class__ is str:
+            code = STAGE_CODES.get(name)
+            if code is None:
+                errors.append(f"{key} 不是已知段位: {name!r}")
+            elif key == "minStage":
+                lo = code
+            else:
+                hi = code
+    if lo is not None and hi is not None and lo > hi:
+        errors.append(f"minStage ({event['minStage']}) 高于 maxStage ({event['maxStage']})")
+
+    choices = event.get("choices")
+    if not isinstance(choices, list):
+        errors.append("choices 缺失或不是数组")
+        return errors
+    for i, choice in enumerate(choices):
+        where = f"choices[{i}]"
+        if not isinstance(choice, dict):
+            errors.append(f"{where} 不是对象")
+            continue
+        for key in CHOICE_STRINGS:
+            if choice.get(key).__class__ is not str:
+                errors.append(f"{where}.{key} 缺失或不是字符串")
+        check_effect(choice.get("effect"), where, errors)
+    return errors
+
+# ==========================================
+# 流式读取
+# ==========================================
+
+class EventStream:
+    """
+    逐个产出 (字节偏移, 事件)。缓冲区只保留未解析的部分。
+    字节偏移从上一个已知位置 (mark) 往后增量计算：把中间这段文本编码回 UTF-8 数字节，
+    每个事件只编码它自己那一段。
+    start > 0 时 handle 已定位到数组中间某个事件的开头；limit 不为空时只读这么多字节，
+    读完后停在下一段第一个事件之前的 ','。
+    """
+
+    def __init__(self, handle, start=0, limit=None, chunk_size=CHUNK_SIZE):
+        self.handle = handle
+        self.start = start
+        self.remaining = limit
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder(parse_constant=_BadConstant)
+        self.utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.mark_pos = 0      # buffer[mark_pos] 的字节偏移是 mark_byte
+        self.mark_byte = start
+        self.eof = False
+
+    def _fill(self):
+        size = self.chunk_size if self.remaining is None else min(self.chunk_size, self.remaining)
+        data = self.handle.read(size) if size else b""
+        if not data:
+            self.eof = True
+            try:
+                self.utf8.decode(b"", final=True)
+            except UnicodeDecodeError:
+                raise ValueError(f"字节 {self.byte_offset(len(self.buffer))}: 以不完整的 UTF-8 字符结尾") from None
+            return False
+        if self.remaining is not None:
+            self.remaining -= len(data)
+        # 块边界上截断的多字节字符留在增量解码器里，下一块接上
+        pending = len(self.utf8.getstate()[0])
+        try:
+            text = self.utf8.decode(data)
+        except UnicodeDecodeError as error:
+            offset = self.byte_offset(len(self.buffer)) - pending + error.start
+            raise ValueError(f"字节 {offset}: 不是合法的 UTF-8") from None
+        self.buffer += text
+        return True
+
+    def _compact(self, pos):
+        self.mark_byte = self.byte_offset(pos)
+        self.mark_pos = 0
+        self.buffer = self.buffer[pos:]
+
+    def byte_offset(self, pos):
+        if pos < self.mark_pos:
+            return self.mark_byte - len(self.buffer[pos:self.mark_pos].encode("utf-8"))
+        self.mark_byte += len(self.buffer[self.mark_pos:pos].encode("utf-8"))
+        self.mark_pos = pos
+        return self.mark_byte
+
+    def _skip(self, pos):
+        """跳过空白，必要时读入更多数据；返回下一个非空白字符的位置"""
+        while True:
+            pos = _WHITESPACE.match(self.buffer, pos).end()
+            if pos < len(self.buffer) or not self._fill():
+                return pos
+
+    def _expect(self, pos, allowed, what):
+        pos = self._skip(pos)
+        if pos >= len(self.buffer):
+            raise ValueError(f"字节 {self.byte_offset(pos)}: 文件意外结束，应为{what}")
+        if self.buffer[pos] not in allowed:
+            raise ValueError(f"字节 {self.byte_offset(pos)}: 应为{what}，实际是 {self.buffer[pos]!r}")
+        return pos
+
+    def __iter__(self):
+        pos = 0
+        if self.start == 0:
+            self._fill()
+            if self.buffer.startswith("\ufeff"):
+                raise ValueError("字节 0: 文件带 UTF-8 BOM")
+            pos = self._expect(0, "[", "数组开头 '['") + 1
+            pos = self._skip(pos)
+            if pos < len(self.buffer) and self.buffer[pos] == "]":
+                self._finish(pos + 1)
+                return
+        decode = self.decoder.raw_decode
+        while True:
+            pos = self._skip(pos)
+            last_error = None
+            while True:
+                try:
+                    event, end = decode(self.buffer, pos)
+                    break
+                except json.JSONDecodeError as error:
+                    # 缓冲区可能只截到事件的一半：再读一块重试；出错位置不变说明是真的语法错误
+                    if error.pos != last_error and not self.eof and self._fill():
+                        last_error = error.pos
+                        continue
+                    raise ValueError(f"字节 {self.byte_offset(error.pos)}: JSON 语法错误: {error.msg}") from None
+            yield self.byte_offset(pos), event
+            pos = self._expect(end, ",]", " ',' 或 ']'")
+            if self.buffer[pos] == "]":
+                self._finish(pos + 1)
+                return
+            pos += 1
+            if self.remaining is not None and self._skip(pos) == len(self.buffer):
+                return
+            if pos > self.chunk_size:
+                self._compact(pos)
+                pos = 0
+
+    def _finish(self, pos):
+        pos = self._skip(pos)
+        if pos < len(self.buffer):
+            raise ValueError(f"字节 {self.byte_offset(pos)}: 数组结束后还有多余内容")
+
+# ==========================================
+# 校验 (单进程 / 分段并行)
+# ==========================================
+
+# 顶层事件的开头：第一个键是 id、第二个键是 title (选项对象的第二个键是 text)。
+# 字符串里的引号必然转义，这个模式不会落在字符串内部。
+EVENT_START = re.compile(
+    rb'[,\[][ \t\n\r]*(\{[ \t\n\r]*"id"[ \t\n\r]*:[ \t\n\r]*"[^"\\]*"[ \t\n\r]*,[ \t\n\r]*"title")'
+)
+SPLIT_PROBE = 1 << 16
+
+def split_points(file_path, parts):
+    """
+    按字节大致等分，再对齐到顶层事件开头，返回 [(起始字节, 长度), ...]；
+    最后一段长度为 None (读到文件尾)。附近找不到对齐点时少分一段。
+    """
+    size = os.path.getsize(file_path)
+    starts = [0]
+    with open(file_path, "rb") as f:
+        for k in range(1, parts):
+            target = max(size * k // parts, starts[-1] + 1)
+            f.seek(target)
+            match = EVENT_START.search(f.read(SPLIT_PROBE))
+            if match:
+                starts.append(target + match.start(1))
+    starts = sorted(set(starts))
+    return [(start, end - start) for start, end in zip(starts, starts[1:])] + [(starts[-1], None)]
+
+def check_segment(file_path, start=0, limit=None, max_errors=None, seen=None):
+    """
+    校验一段，返回 (事件数, 问题列表, id 列表, 偏移列表)。
+    问题为 (字节偏移, 事件 id, 错误信息)；JSON 语法错误之后无法继续，这条的偏移为 None。
+    seen 不为空时直接在这里查 id 重复，不再收集 id / 偏移 (单进程)；
+    否则把它们交给主进程跨分段合并。
+    """
+    problems = []
+    ids = []
+    offsets = array("q")
+    count = 0
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        try:
+            for offset, event in EventStream(f, start, limit):
+                count += 1
+                errors = check_event(event)
+                event_id = event.get("id") if isinstance(event, dict) else None
+                if event_id.__class__ is not str:
+                    event_id = None
+                elif seen is None:
+                    ids.append(event_id)
+                    offsets.append(offset)
+                elif event_id in seen:
+                    errors.append(f"id 重复: {event_id}")
+                else:
+                    seen.add(event_id)
+                for message in errors:
+                    problems.append((offset, event_id, message))
+                if max_errors is not None and len(problems) >= max_errors:
+                    break
+        except ValueError as error:
+            problems.append((None, None, str(error)))
+    return count, problems, ids, offsets
+
+def _check_segment_task(task):
+    return check_segment(*task)
+
+def validate_file(file_path, max_errors=None, jobs=1):
+    """返回 (事件数, [(字节偏移, 事件 id, 错误信息), ...])，按文件顺序排列"""
+    segments = split_points(file_path, jobs) if jobs > 1 else [(0, None)]
+    if len(segments) == 1:
+        count, problems, _, _ = check_segment(file_path, max_errors=max_errors, seen=set())
+        return count, problems
+
+    tasks = [(file_path, start, limit, max_errors) for start, limit in segments]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = pool.map(_check_segment_task, tasks)
+
+    count = 0
+    problems = []
+    seen = set()
+    for segment_count, segment_problems, ids, offsets in results:
+        count += segment_count
+        for event_id, offset in zip(ids, offsets):
+            if event_id in seen:
+                problems.append((offset, event_id, f"id 重复: {event_id}"))
+            else:
+                seen.add(event_id)
+        problems.extend(segment_problems)
+        # 语法错误之后的分段已经没有意义
+        if any(offset is None for offset, _, _ in segment_problems):
+            break
+    problems.sort(key=lambda problem: (problem[0] is None, problem[0] or 0))
+    if max_errors is not None:
+        problems = problems[:max_errors]
+    return count, problems
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="流式校验事件池 JSON 能否被 Swift 端完整解码")
+    parser.add_argument("files", nargs="+", help="events.json (pretty 或 minified)")
+    parser.add_argument("--max-errors", type=int, default=50, help="每个文件最多报告多少条错误 (0 表示不限)")
+    parser.add_argument("--jobs", type=int, default=1, help="并行进程数，按事件边界把文件分段")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for file_path in args.files:
+        start = time.perf_counter()
+        count, problems = validate_file(file_path, args.max_errors or None, args.jobs)
+        seconds = time.perf_counter() - start
+        if not problems:
+            print(f"✅ {file_path}: {count:,} 个事件全部合法 ({seconds:.2f}s)")
+            continue
+        failed = True
+        print(f"❌ {file_path}: 已检查 {count:,} 个事件，{len(problems)} 条错误", file=sys.stderr)
+        for offset, event_id, message in problems:
+            location = f"字节 {offset}" if offset is not None else "解析中止"
+            label = f" [{event_id}]" if event_id.__class__ is str else ""
+            print(f"   {location}{label}: {message}", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import game_formulas as f
+import generate_events12 as g
+import progression_sim as ps
+
+# ==========================================
+# 模板权重优化：护身符经济
+# ==========================================
+# get_weights_by_stage 按前 / 中 / 后期三档手挑 5 个模板的比例，其中 item_reward (送护身符)
+# 从 4 -> 8 -> 8，注释里一直担心免费护身符冲淡付费价值；EventPool 还会在手上 >= 20 个时拦掉送护身符的事件。
+# 这里给定每个段位「每在线小时获得几个护身符」的目标曲线，搜索每档的 item_reward 权重：
+#   候选权重 -> 骨架事件池 (只有效果、没有文案，模板 / 灵气 / 效果的抽法与 generate_events12 相同)
+#            -> progression_sim.simulate 一次推进一批玩家，按段位统计护身符获得 / 消耗 (attemptBreak 与
+#               finalizeMiniGame 失败时烧掉的) 和在线时长
+#            -> 各段位 log(获得速率 / 目标) 的均方。
+# 其余四个模板决定的是灵气节奏，不参与搜索，保持手调值。
+# 三档逐个做网格搜索 (粗网格 + 最优点附近的整数细化)，同一档的候选交给进程池并行模拟。
+# 模拟结果按 (权重向量, 模拟参数) 缓存，--cache 给文件时跨次运行复用，重复搜索不再重新模拟。
+
+BANDS = ((0, 3), (4, 9), (10, 15))   # 与 get_weights_by_stage 的三档一致
+TEMPLATE_NAMES = [template["type"] for template in g.EVENT_TEMPLATES]
+ITEM_TEMPLATE = TEMPLATE_NAMES.index("item_reward")
+COARSE_GRID = (0, 1, 2, 4, 8, 12, 16, 24, 32, 48)
+DEFAULT_TARGET = "0:0.5,4:0.2,10:0.1"
+RATE_FLOOR = 1e-3   # 护身符/小时，log 误差里的下限，避免 0 取对数
+
+def band_of(stage_idx):
+    return next(band for band, (first, last) in enumerate(BANDS) if first <= stage_idx <= last)
+
+def current_weights():
+    """generate_events12 里手调的三档权重"""
+    return tuple(tuple(g.get_weights_by_stage(first)) for first, _ in BANDS)
+
+def parse_target(text):
+    """"0:0.5,4:0.2,10:0.1" -> 16 个段位的目标 (护身符/在线小时，log 线性插值)"""
+    points = sorted((int(stage), float(rate)) for stage, rate in
+                    (item.split(":") for item in text.split(",")))
+    stages, rates = zip(*points)
+    return 10 ** np.interp(np.arange(f.STAGE_COUNT), stages, np.log10(rates))
+
+def skeleton_pool(band_weights, counts=g.STAGE_COUNTS, seed=0):
+    """按给定三档权重生成只含效果的事件池 (每个段位独立随机流，与 generate_events12 一样)"""
+    events = []
+    number = 1
+    for stage_idx in range(f.STAGE_COUNT):
+        rng = g.stage_rng(seed, stage_idx)
+        weights = list(band_weights[band_of(stage_idx)])
+        for _ in range(counts[stage_idx]):
+            logic_a, logic_b, _ = g.pick_template(stage_idx, rng, weights)
+            qi_val = g.calculate_qi_gain(stage_idx, rng)
+            events.append({
+                "id": g.event_id(number),
+                "rarity": g.stage_rarity(stage_idx),
+                "minStage": g.STAGES[stage_idx],
+                "maxStage": g.STAGES[min(stage_idx + 2, 15)],
+                "choices": [
+                    {"id": "a", "effect": g.build_effect(logic_a, qi_val, stage_idx)},
+                    {"id": "b", "effect": g.build_effect(logic_b, qi_val, stage_idx)},
+                ],
+            })
+            number += 1
+    return events
+
+class Settings:
+    """模拟参数；与权重向量一起组成缓存键"""
+
+    def __init__(self, players=2000, seed=0, taps=0.5, tribulation_win=0.8, choice_policy="random",
+                 charms=0, max_days=90.0, total=None):
+        self.players = players
+        self.seed = seed
+        self.taps = taps
+        self.tribulation_win = tribulation_win
+        self.choice_policy = choice_policy
+        self.charms = charms
+        self.max_days = max_days
+        self.total = total
+
+    def key(self, band_weights):
+        return json.dumps([[list(weights) for weights in band_weights], vars(self)], sort_keys=True)
+
+def simulate_flows(band_weights, settings):
+    """一组权重 -> 每个段位的 {在线小时, 获得, 消耗} (所有玩家合计)"""
+    counts = g.scale_counts(settings.total) if settings.total else g.STAGE_COUNTS
+    events = skeleton_pool(band_weights, counts, settings.seed)
+    result = ps.simulate(events, settings.players, settings.seed, settings.taps, settings.tribulation_win,
+                         settings.choice_policy, charms=settings.charms, max_days=settings.max_days)
+    return {
+        "hours": (result.stage_seconds / 3600).tolist(),
+        "granted": result.stage_charms_granted.tolist(),
+        "used": result.stage_charms_used.tolist(),
+    }
+
+def _simulate_task(task):
+    return simulate_flows(*task)
+
+def rates(flows):
+    """(获得/小时, 消耗/小时, 在线小时)；没人到达的段位速率为 NaN"""
+    hours = np.asarray(flows["hours"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        granted = np.where(hours > 0, np.asarray(flows["granted"]) / hours, np.nan)
+        used = np.where(hours > 0, np.asarray(flows["used"]) / hours, np.nan)
+    return granted, used, hours
+
+def objective(flows, target):
+    granted, _, hours = rates(flows)
+    reached = hours > 0
+    error = np.log10(np.maximum(granted[reached], RATE_FLOOR) / target[reached])
+    return float(np.mean(error ** 2)) if reached.any() else float("inf")
+
+class WeightOptimizer:
+    """逐档网格搜索 item_reward 权重；cache: 缓存键 -> 模拟结果"""
+
+    def __init__(self, target, settings, jobs=1, cache=None):
+        self.target = target
+        self.settings = settings
+        self.jobs = jobs
+        self.cache = {} if cache is None else cache
+        self.simulated = 0
+        self.hits = 0
+
+    def flows(self, candidates, pool=None):
+        keys = [self.settings.key(weights) for weights in candidates]
+        missing = {key: weights for key, weights in zip(keys, candidates) if key not in self.cache}
+        self.hits += len(keys) - len(missing)
+        if missing:
+            self.simulated += len(missing)
+            tasks = [(weights, self.settings) for weights in missing.values()]
+            results = pool.map(_simulate_task, tasks) if pool else map(_simulate_task, tasks)
+            self.cache.update(zip(missing, results))
+        return [self.cache[key] for key in keys]
+
+    def score(self, candidates, pool=None):
+        return [objective(flows, self.target) for flows in self.flows(candidates, pool)]
+
+    def _with_item(self, weights, band, item):
+        band_weights = [list(row) for row in weights]
+        band_weights[band][ITEM_TEMPLATE] = item
+        return tuple(tuple(row) for row in band_weights)
+
+    def _search_band(self, weights, band, pool):
+        """粗网格找到最优点，再把两侧相邻网格点之间的整数都试一遍"""
+        current = weights[band][ITEM_TEMPLATE]
+        grid = sorted(set(COARSE_GRID) | {current})
+        scores = self.score([self._with_item(weights, band, item) for item in grid], pool)
+        best = int(np.argmin(scores))
+        low = grid[max(best - 1, 0)]
+        high = grid[min(best + 1, len(grid) - 1)]
+        fine = [item for item in range(low, high + 1) if item not in grid]
+        if fine:
+            fine_scores = self.score([self._with_item(weights, band, item) for item in fine], pool)
+            grid += fine
+            scores += fine_scores
+        best = int(np.argmin(scores))
+        return self._with_item(weights, band, grid[best]), scores[best]
+
+    def run(self, start, passes=3, log=None):
+        """从 start 出发逐档优化，一轮下来权重不再变化就停；返回 (权重, 目标值)"""
+        weights = tuple(tuple(row) for row in start)
+        pool = ProcessPoolExecutor(max_workers=self.jobs) if self.jobs > 1 else None
+        try:
+            score = self.score([weights], pool)[0]
+            for round_index in range(passes):
+                previous = weights
+                for band in range(len(BANDS)):
+                    weights, score = self._search_band(weights, band, pool)
+                    if log:
+                        log(round_index, band, weights, score)
+                if weights == previous:
+                    break
+        finally:
+            if pool:
+                pool.shutdown()
+        return weights, score
+
+def load_cache(path):
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    return {}
+
+def save_cache(cache, path):
+    if path:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(cache, file, ensure_ascii=False)
+
+def print_comparison(before, after, target, players):
+    old_granted, old_used, _ = rates(before)
+    new_granted, new_used, hours = rates(after)
+    print(f"{'段位':<10}{'目标/h':>9}{'原获得/h':>11}{'原消耗/h':>11}{'新获得/h':>11}{'新消耗/h':>11}{'在线/人':>10}")
+    for stage in range(f.STAGE_COUNT):
+        print(f"{g.STAGES[stage]:<10}{target[stage]:>9.3f}{old_granted[stage]:>11.3f}{old_used[stage]:>11.3f}"
+              f"{new_granted[stage]:>11.3f}{new_used[stage]:>11.3f}{ps.format_duration(hours[stage] * 3600 / players):>10}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="按护身符获得速率目标搜索各档 item_reward 模板权重")
+    parser.add_argument("--target", default=DEFAULT_TARGET,
+                        help="每在线小时获得护身符数 段位:速率,...，段位间 log 线性插值")
+    parser.add_argument("--players", type=int, default=2000, help="每个候选模拟的玩家数")
+    parser.add_argument("--seed", type=int, default=0, help="事件池与模拟共用的种子 (所有候选相同)")
+    parser.add_argument("--taps", type=float, default=0.5, help="每秒点击次数")
+    parser.add_argument("--tribulation-win", type=float, default=0.8, help="渡劫小游戏胜率")
+    parser.add_argument("--choice", choices=ps.CHOICE_POLICIES, default="random", help="事件选项策略")
+    parser.add_argument("--charms", type=int, default=0, help="初始护身符数量")
+    parser.add_argument("--max-days", type=float, default=90.0, help="模拟时长上限 (在线天数)")
+    parser.add_argument("--total", type=int, default=None, help="骨架事件池总量 (默认与 generate_events12 相同)")
+    parser.add_argument("--passes", type=int, default=3, help="逐档搜索的最多轮数")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="并行进程数")
+    parser.add_argument("--cache", metavar="PATH", help="模拟结果缓存文件 (JSON)，存在时先读入")
+    parser.add_argument("--json", dest="json_output", help="把结果写到该文件")
+    args = parser.parse_args(argv)
+
+    target = parse_target(args.target)
+    settings = Settings(args.players, args.seed, args.taps, args.tribulation_win, args.choice,
+                        args.charms, args.max_days, args.total)
+    optimizer = WeightOptimizer(target, settings, args.jobs, load_cache(args.cache))
+    start_weights = current_weights()
+
+    def log(round_index, band, weights, score):
+        first, last = BANDS[band]
+        print(f"   第 {round_index + 1} 轮  段位 {first}~{last}  item_reward = {weights[band][ITEM_TEMPLATE]:<4}"
+              f"目标值 {score:.4f}")
+
+    start = time.perf_counter()
+    weights, score = optimizer.run(start_weights, args.passes, log)
+    seconds = time.perf_counter() - start
+    save_cache(optimizer.cache, args.cache)
+    before, after = optimizer.flows([start_weights, weights])
+    print(f"⏱️  {seconds:.1f}s，模拟 {optimizer.simulated} 组权重，缓存命中 {optimizer.hits} 次；"
+          f"目标值 {objective(before, target):.4f} -> {score:.4f}")
+    print_comparison(before, after, target, args.players)
+    print(f"模板顺序: {TEMPLATE_NAMES}")
+    for (first, last), old, new in zip(BANDS, start_weights, weights):
+        print(f"   段位 {first:>2}~{last:<2}  {list(old)} -> {list(new)}")
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as file:
+            json.dump({
+                "target": args.target,
+                "templates": TEMPLATE_NAMES,
+                "bands": [list(band) for band in BANDS],
+                "before": {"weights": [list(row) for row in start_weights], "flows": before},
+                "after": {"weights": [list(row) for row in weights], "flows": after, "objective": score},
+            }, file, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()